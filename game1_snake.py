@@ -1,252 +1,121 @@
-import pygame, sys, random, math, json, os
+import pygame, sys, random, threading
+from collections import OrderedDict
+from snake_world import (
+    SnakeWorld, UP, DOWN, LEFT, RIGHT, MODE_SNAKE, MODE_APPLE, MODE_2PLAYERS, MODE_ARENA,
+    EVENT_APPLE_EATEN, EVENT_SNAKE_EATEN, EVENT_SNAKE_DIED, EVENT_GAME_OVER,
+)
+from snake_ai import PathfindingController, ArenaBot
+from snake_clock import FixedTimestep, InputQueue, TICK_RATE, DISPLAY_FPS
+from snake_replay import start_recording
+from snake_save import AutoSaver, open_record
+from snake_session import GameSession
+from snake_catalog import GridLayout, load_catalog
+from snake_audio import SOUND_FILES, NullAudio, open_audio
+from snake_render import (
+    BoardRenderer, ArenaRenderer, Camera, sprites, get_font, render_text, CELL_SIZE, BLACK, WHITE, RED, GRAY,
+    OVERLAY_RESTART_RECT, OVERLAY_QUIT_RECT, OVERLAY_VOLUME_RECT,
+)
 
 # --------------------- 自动存档相关函数 ---------------------
+# 存档在后台线程里写入（见 snake_save.py），金币、购买、升级一有变化就交给它
+autosave = AutoSaver("savegame.json")
+
 def load_game_record():
-    if os.path.exists("savegame.json"):
-        with open("savegame.json", "r") as f:
-            return json.load(f)
-    else:
-        return None
-
-def save_game_record(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head, reputation_level, reputation_upgrade_cost):
-    data = {
-        "coin_count": coin_count,
-        "purchased_skins": purchased_skins,
-        "selected_skin": selected_skin,
-        "purchased_heads": purchased_heads,
-        "selected_head": selected_head,
-        "reputation_level": reputation_level,
-        "reputation_upgrade_cost": reputation_upgrade_cost
-    }
-    with open("savegame.json", "w") as f:
-        json.dump(data, f)
-
-def exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head):
-    save_game_record(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head, reputation_level, reputation_upgrade_cost)
+    """
+    读取并校验存档，返回 (GameSession, 是否应按当前版本重写存档)；没有存档时返回新存档的默认进度。
+    存档比程序新或读不出时由 open_record 备份成 savegame.json.bak，同样返回默认进度。
+    """
+    record, outdated = open_record("savegame.json")
+    return GameSession.from_record(record, len(SKIN_COLORS), len(HEAD_ITEMS)), outdated
+
+def save_game_record(session):
+    """进度有改动时交给后台自动存档，立即返回；没有改动时什么也不做。"""
+    session.save(autosave)
+
+def exit_game(session):
+    save_game_record(session)
+    autosave.close()
     pygame.quit()
     sys.exit()
 
 # --------------------- 基础设置 ---------------------
 WINDOW_WIDTH = 1000
 WINDOW_HEIGHT = 800
-CELL_SIZE = 20
 CELL_WIDTH = WINDOW_WIDTH // CELL_SIZE  # e.g. 50
 CELL_HEIGHT = WINDOW_HEIGHT // CELL_SIZE  # e.g. 40
 
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED   = (255, 0, 0)
-GRAY  = (128, 128, 128)
 GOLD  = (255, 215, 0)  # 用于金币文本
 
-# 下面是 30 种可供购买的皮肤颜色（扩展自原来的 20 种）
-SKIN_COLORS = [
-    (255, 0, 0),      (0, 255, 0),    (0, 0, 255),      (255, 255, 0),
-    (255, 0, 255),    (0, 255, 255),  (128, 128, 128),  (255, 128, 0),
-    (128, 0, 128),    (0, 128, 128),  (128, 255, 128),  (255, 128, 128),
-    (128, 128, 255),  (255, 255, 128),(255, 128, 255),  (128, 255, 255),
-    (192, 192, 192),  (64, 64, 64),   (255, 200, 100),  (100, 200, 255),
-    (0, 100, 0),      (75, 0, 130),   (173, 216, 230),  (240, 230, 140),
-    (152, 251, 152),  (0, 191, 255),  (219, 112, 147),  (255, 182, 193),
-    (160, 32, 240),   (255, 105, 180)
-]
-
-# --------------------- 新增：20 个头饰（以颜色表示）及价格 ---------------------
-HEAD_ITEMS = [
-    (100, 0, 0),    (0, 100, 0),    (0, 0, 100),    (100, 100, 0),
-    (100, 0, 100),  (0, 100, 100),  (150, 150, 150),(255, 165, 0),
-    (128, 0, 0),    (0, 128, 0),    (0, 0, 128),    (128, 128, 0),
-    (128, 0, 128),  (0, 128, 128),  (64, 0, 0),     (0, 64, 0),
-    (0, 0, 64),     (64, 64, 0),    (64, 0, 64),    (0, 64, 64)
-]
-HEAD_COST = 200  # 每个头饰的购买价格
-
-UP = 'up'
-DOWN = 'down'
-LEFT = 'left'
-RIGHT = 'right'
+# Arena 模式的棋盘大小（格）与机器人数，与窗口大小无关
+ARENA_WIDTH = 200
+ARENA_HEIGHT = 200
+ARENA_BOTS = 15
+
+# 商店里的皮肤和头饰（颜色、价格、解锁条件）都在 catalog.json 里
+CATALOG = load_catalog()
+SKIN_COLORS = [item.color for item in CATALOG.skins]
+HEAD_ITEMS = [item.color for item in CATALOG.heads]
 
 # --------------------- 全局变量 ---------------------
-muted = False  # 声音初始为开启状态
-
-# 新增：声望等级及其升级价格，全局变量
-reputation_level = 0
-reputation_upgrade_cost = 50
-
-# 静态背景列表（共 30 种背景）
-static_backgrounds = []
-
-# --------------------- 覆盖菜单相关全局变量 ---------------------
-OVERLAY_RESTART_RECT = pygame.Rect(10, 10, 100, 30)
-OVERLAY_QUIT_RECT = pygame.Rect(10, 50, 100, 30)
-OVERLAY_VOLUME_RECT = pygame.Rect(10, 90, 100, 30)
-
-# --------------------- 绘制函数 ---------------------
-def draw_snake(surface, snake_coords, snake_color, head_item=None):
-    """绘制蛇（使用选定的皮肤颜色），在蛇头上加上笑脸标识。
-       如果 head_item 不为 None，则在蛇头上绘制头饰（简单用三角形表示）。"""
-    for i, coord in enumerate(snake_coords):
-        x = coord['x'] * CELL_SIZE
-        y = coord['y'] * CELL_SIZE
-        rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-        pygame.draw.rect(surface, snake_color, rect)
-        # 如果是蛇头，则绘制笑脸
-        if i == 0:
-            center_x = x + CELL_SIZE // 2
-            center_y = y + CELL_SIZE // 2
-            eye_radius = 2
-            eye_offset_x = 4
-            eye_offset_y = 4
-            pygame.draw.circle(surface, BLACK, (center_x - eye_offset_x, center_y - eye_offset_y), eye_radius)
-            pygame.draw.circle(surface, BLACK, (center_x + eye_offset_x, center_y - eye_offset_y), eye_radius)
-            mouth_rect = pygame.Rect(x + 3, y + CELL_SIZE // 2, CELL_SIZE - 6, CELL_SIZE // 2)
-            pygame.draw.arc(surface, BLACK, mouth_rect, math.pi, 2*math.pi, 3)
-            # 如果有头饰，则在蛇头上绘制一个三角形帽子
-            if head_item is not None:
-                hat_points = [
-                    (x, y), 
-                    (x + CELL_SIZE, y),
-                    (x + CELL_SIZE/2, y - CELL_SIZE/2)
-                ]
-                pygame.draw.polygon(surface, head_item, hat_points)
-
-def draw_apple(surface, apple):
-    """绘制苹果（基于像素坐标）。"""
-    rect = pygame.Rect(int(apple['x']), int(apple['y']), CELL_SIZE, CELL_SIZE)
-    pygame.draw.rect(surface, RED, rect)
-
-def draw_obstacles(surface, obstacles):
-    """绘制地图上的所有障碍物。"""
-    for obs in obstacles:
-        x = obs['x'] * CELL_SIZE
-        y = obs['y'] * CELL_SIZE
-        rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-        pygame.draw.rect(surface, GRAY, rect)
-
-def draw_overlay_menu(screen, font_overlay, muted):
-    """在屏幕左上角绘制始终可见的覆盖菜单。"""
-    pygame.draw.rect(screen, WHITE, OVERLAY_RESTART_RECT, 2)
-    pygame.draw.rect(screen, WHITE, OVERLAY_QUIT_RECT, 2)
-    pygame.draw.rect(screen, WHITE, OVERLAY_VOLUME_RECT, 2)
-    restart_text = font_overlay.render("Restart", True, WHITE)
-    quit_text = font_overlay.render("Quit", True, WHITE)
-    volume_text = font_overlay.render("Volume: " + ("Off" if muted else "On"), True, WHITE)
-    screen.blit(restart_text, (OVERLAY_RESTART_RECT.x + 5, OVERLAY_RESTART_RECT.y + 5))
-    screen.blit(quit_text, (OVERLAY_QUIT_RECT.x + 5, OVERLAY_QUIT_RECT.y + 5))
-    screen.blit(volume_text, (OVERLAY_VOLUME_RECT.x + 5, OVERLAY_VOLUME_RECT.y + 5))
-
-# --------------------- 障碍物、随机位置 ---------------------
-def create_obstacles():
-    """
-    随机生成 30 个短障碍，每个障碍段长度在 1~2 之间，
-    并避免左上角 10x10 的安全区。
-    """
-    obstacles = set()
-    num_segments = 30
-    max_length = 2
-    safe_zone = {(x, y) for x in range(10) for y in range(10)}
-    for _ in range(num_segments):
-        while True:
-            start_x = random.randint(0, CELL_WIDTH - 1)
-            start_y = random.randint(0, CELL_HEIGHT - 1)
-            if (start_x, start_y) not in safe_zone:
-                break
-        orientation = random.choice(['horizontal', 'vertical'])
-        length = random.randint(1, max_length)
-        for i in range(length):
-            if orientation == 'horizontal':
-                x = start_x + i
-                y = start_y
-            else:
-                x = start_x
-                y = start_y + i
-            if 0 <= x < CELL_WIDTH and 0 <= y < CELL_HEIGHT:
-                obstacles.add((x, y))
-    return [{'x': x, 'y': y} for (x, y) in obstacles]
-
-def get_random_location(obstacles=None):
-    """获取随机网格位置，若 obstacles 不为空，则不与障碍物重叠。"""
-    while True:
-        loc = {'x': random.randint(0, CELL_WIDTH - 1), 'y': random.randint(0, CELL_HEIGHT - 1)}
-        if obstacles and any(loc['x'] == obs['x'] and loc['y'] == obs['y'] for obs in obstacles):
-            continue
-        return loc
+# 音效，main() 中换成真正出声的 AudioManager
+audio = NullAudio()
 
-# --------------------- 苹果随机移动（Snake模式） ---------------------
-def update_apple_position(apple, snake_coords, obstacles):
-    """
-    在 Snake 模式下，苹果有 50% 的几率随机移动一格。
-    """
-    if random.random() < 0.5:
-        moves = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        random.shuffle(moves)
-        for dx, dy in moves:
-            new_x = apple['x'] + dx
-            new_y = apple['y'] + dy
-            if not (0 <= new_x < CELL_WIDTH and 0 <= new_y < CELL_HEIGHT):
-                continue
-            if any(seg['x'] == new_x and seg['y'] == new_y for seg in snake_coords):
-                continue
-            if any(obs['x'] == new_x and obs['y'] == new_y for obs in obstacles):
-                continue
-            apple['x'] = new_x
-            apple['y'] = new_y
-            break
-    return apple
+# 菜单背景，按声望等级按需生成
+menu_backgrounds = None
 
 # --------------------- 游戏结束 ---------------------
-def game_over(screen, clock, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head):
+def game_over(screen, clock):
     """显示 Game Over 并暂停 2 秒，同时播放碰撞音效，然后返回主菜单。"""
-    collision_sound.play()
-    font_over = pygame.font.SysFont(None, 48)
-    text = font_over.render("Game Over", True, RED)
+    audio.play("over")
+    font_over = get_font(48)
+    text = render_text(font_over, "Game Over", RED)
     rect = text.get_rect(center=(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2))
     screen.fill(BLACK)
     screen.blit(text, rect)
     pygame.display.update()
     pygame.time.wait(2000)
-    return "MENU", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
+    return "MENU"
 
 # --------------------- Snake模式 ---------------------
-def game_loop(screen, clock, apple_eat_sound, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head):
+def game_loop(screen, clock, session):
     """
     玩家控制蛇的模式：
       - 吃苹果 +10 金币
       - 蛇头碰到身体或出界则游戏结束
       - 蛇移动若碰到障碍则停留
-      - 使用 selected_skin 对应的颜色绘制蛇，同时在蛇头上绘制选购的头饰（若有）
+      - 使用 session.selected_skin 对应的颜色绘制蛇，同时在蛇头上绘制选购的头饰（若有）
     新增覆盖菜单，允许随时重启、退出（返回主菜单）或切换音量状态
-    返回 (state, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head) 以便在主循环更新记录。
+    金币直接记在 session 上，返回下一个状态（"MENU"）。
     """
-    global muted
     while True:  # 外层循环，支持重启
         restart_pressed = False
-        snake_coords = [
-            {'x': 3, 'y': 5},
-            {'x': 2, 'y': 5},
-            {'x': 1, 'y': 5}
-        ]
-        direction = RIGHT
-        obstacles = create_obstacles()
-        apple = get_random_location(obstacles)
-        overlay_font = pygame.font.SysFont(None, 24)
+        world = SnakeWorld(MODE_SNAKE, CELL_WIDTH, CELL_HEIGHT)
+        inputs = InputQueue()
+        overlay_font = get_font(24)
+        renderer = BoardRenderer(screen, overlay_font)
+        timestep = FixedTimestep(TICK_RATE)
+        recorder = start_recording(world, ai=None)
 
         running = True
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                    recorder.close(world)
+                    exit_game(session)
+                elif event.type == pygame.VIDEOEXPOSE:
+                    renderer.invalidate()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
-                        exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                        recorder.close(world)
+                        exit_game(session)
                     if event.key == pygame.K_UP:
-                        direction = UP
+                        inputs.push(UP)
                     elif event.key == pygame.K_DOWN:
-                        direction = DOWN
+                        inputs.push(DOWN)
                     elif event.key == pygame.K_LEFT:
-                        direction = LEFT
+                        inputs.push(LEFT)
                     elif event.key == pygame.K_RIGHT:
-                        direction = RIGHT
+                        inputs.push(RIGHT)
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     pos = pygame.mouse.get_pos()
                     if OVERLAY_RESTART_RECT.collidepoint(pos):
@@ -254,135 +123,67 @@ def game_loop(screen, clock, apple_eat_sound, collision_sound, coin_count, purch
                         running = False
                         break
                     elif OVERLAY_QUIT_RECT.collidepoint(pos):
-                        return "MENU", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
+                        recorder.close(world)
+                        return "MENU"
                     elif OVERLAY_VOLUME_RECT.collidepoint(pos):
-                        muted = not muted
-                        apple_eat_sound.set_volume(0 if muted else 1)
-                        collision_sound.set_volume(0 if muted else 1)
+                        audio.toggle_mute()
             if not running:
+                recorder.close(world)
                 break
 
-            head = snake_coords[0].copy()
-            if direction == UP:
-                head['y'] -= 1
-            elif direction == DOWN:
-                head['y'] += 1
-            elif direction == LEFT:
-                head['x'] -= 1
-            elif direction == RIGHT:
-                head['x'] += 1
-
-            if not (0 <= head['x'] < CELL_WIDTH and 0 <= head['y'] < CELL_HEIGHT):
-                return game_over(screen, clock, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
-            if any(obs['x'] == head['x'] and obs['y'] == head['y'] for obs in obstacles):
-                head = snake_coords[0].copy()
-            else:
-                if head in snake_coords[1:]:
-                    return game_over(screen, clock, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
-
-            if head != snake_coords[0]:
-                snake_coords.insert(0, head)
-                if head['x'] == apple['x'] and head['y'] == apple['y']:
-                    apple_eat_sound.play()
-                    coin_count += 10
-                    apple = get_random_location(obstacles)
-                else:
-                    snake_coords.pop()
-
-            apple = update_apple_position(apple, snake_coords, obstacles)
-
-            screen.fill(BLACK)
-            draw_obstacles(screen, obstacles)
-            snake_color = SKIN_COLORS[selected_skin]
-            head_item = HEAD_ITEMS[selected_head] if selected_head != -1 else None
-            draw_snake(screen, snake_coords, snake_color, head_item)
-            apple_pixel = {'x': apple['x'] * CELL_SIZE, 'y': apple['y'] * CELL_SIZE}
-            draw_apple(screen, apple_pixel)
-            draw_overlay_menu(screen, overlay_font, muted)
-            pygame.display.update()
-            clock.tick(16)
+            for _ in range(timestep.advance()):
+                actions = [inputs.pop()]
+                recorder.tick(actions, world.directions)
+                for kind, _ in world.step(actions):
+                    if kind == EVENT_APPLE_EATEN:
+                        audio.play("eat")
+                        session.add_coins(10)
+                    elif kind == EVENT_GAME_OVER:
+                        recorder.close(world)
+                        return game_over(screen, clock)
+
+            save_game_record(session)
+
+            snake_color = SKIN_COLORS[session.selected_skin]
+            head_item = HEAD_ITEMS[session.selected_head] if session.selected_head != -1 else None
+            rects = renderer.draw(world, [(snake_color, head_item)], muted=audio.muted, alpha=timestep.alpha)
+            pygame.display.update(rects)
+            clock.tick(DISPLAY_FPS)
         
         if restart_pressed:
             continue
 
-# --------------------- AI 控制蛇的简单函数 ---------------------
-def get_snake_direction(snake_coords, apple, obstacles):
-    head = snake_coords[0]
-    dx = apple['x'] - head['x']
-    dy = apple['y'] - head['y']
-    candidate_dirs = []
-    if abs(dx) >= abs(dy):
-        if dx > 0:
-            candidate_dirs.append(RIGHT)
-        elif dx < 0:
-            candidate_dirs.append(LEFT)
-        if dy > 0:
-            candidate_dirs.append(DOWN)
-        elif dy < 0:
-            candidate_dirs.append(UP)
-    else:
-        if dy > 0:
-            candidate_dirs.append(DOWN)
-        elif dy < 0:
-            candidate_dirs.append(UP)
-        if dx > 0:
-            candidate_dirs.append(RIGHT)
-        elif dx < 0:
-            candidate_dirs.append(LEFT)
-    for d in [UP, DOWN, LEFT, RIGHT]:
-        if d not in candidate_dirs:
-            candidate_dirs.append(d)
-
-    for d in candidate_dirs:
-        new_head = head.copy()
-        if d == UP:
-            new_head['y'] -= 1
-        elif d == DOWN:
-            new_head['y'] += 1
-        elif d == LEFT:
-            new_head['x'] -= 1
-        elif d == RIGHT:
-            new_head['x'] += 1
-        if not (0 <= new_head['x'] < CELL_WIDTH and 0 <= new_head['y'] < CELL_HEIGHT):
-            continue
-        if new_head in snake_coords[1:]:
-            continue
-        if any(obs['x'] == new_head['x'] and obs['y'] == new_head['y'] for obs in obstacles):
-            continue
-        return d
-    return None
-
 # --------------------- Apple模式 ---------------------
-def game_loop_apple(screen, clock, apple_eat_sound, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head):
-    global muted
+def game_loop_apple(screen, clock, session):
     while True:
         restart_pressed = False
-        snake_coords = [
-            {'x': 3, 'y': 5},
-            {'x': 2, 'y': 5},
-            {'x': 1, 'y': 5}
-        ]
-        obstacles = create_obstacles()
-        apple = get_random_location(obstacles)
-        apple_direction = RIGHT
-        overlay_font = pygame.font.SysFont(None, 24)
+        world = SnakeWorld(MODE_APPLE, CELL_WIDTH, CELL_HEIGHT, snake_ai=PathfindingController())
+        inputs = InputQueue()
+        overlay_font = get_font(24)
+        renderer = BoardRenderer(screen, overlay_font)
+        timestep = FixedTimestep(TICK_RATE)
+        recorder = start_recording(world, ai="path")
 
         running = True
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                    recorder.close(world)
+                    exit_game(session)
+                elif event.type == pygame.VIDEOEXPOSE:
+                    renderer.invalidate()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
-                        exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                        recorder.close(world)
+                        exit_game(session)
                     if event.key == pygame.K_UP:
-                        apple_direction = UP
+                        inputs.push(UP)
                     elif event.key == pygame.K_DOWN:
-                        apple_direction = DOWN
+                        inputs.push(DOWN)
                     elif event.key == pygame.K_LEFT:
-                        apple_direction = LEFT
+                        inputs.push(LEFT)
                     elif event.key == pygame.K_RIGHT:
-                        apple_direction = RIGHT
+                        inputs.push(RIGHT)
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     pos = pygame.mouse.get_pos()
                     if OVERLAY_RESTART_RECT.collidepoint(pos):
@@ -390,109 +191,76 @@ def game_loop_apple(screen, clock, apple_eat_sound, collision_sound, coin_count,
                         running = False
                         break
                     elif OVERLAY_QUIT_RECT.collidepoint(pos):
-                        return "MENU", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
+                        recorder.close(world)
+                        return "MENU"
                     elif OVERLAY_VOLUME_RECT.collidepoint(pos):
-                        muted = not muted
-                        apple_eat_sound.set_volume(0 if muted else 1)
-                        collision_sound.set_volume(0 if muted else 1)
+                        audio.toggle_mute()
             if not running:
+                recorder.close(world)
                 break
 
-            new_apple = apple.copy()
-            if apple_direction == UP:
-                new_apple['y'] -= 1
-            elif apple_direction == DOWN:
-                new_apple['y'] += 1
-            elif apple_direction == LEFT:
-                new_apple['x'] -= 1
-            elif apple_direction == RIGHT:
-                new_apple['x'] += 1
-            if (0 <= new_apple['x'] < CELL_WIDTH and 0 <= new_apple['y'] < CELL_HEIGHT) and \
-               not any(obs['x'] == new_apple['x'] and obs['y'] == new_apple['y'] for obs in obstacles):
-                apple = new_apple
-
-            snake_direction = get_snake_direction(snake_coords, apple, obstacles)
-            if snake_direction:
-                head = snake_coords[0].copy()
-                if snake_direction == UP:
-                    head['y'] -= 1
-                elif snake_direction == DOWN:
-                    head['y'] += 1
-                elif snake_direction == LEFT:
-                    head['x'] -= 1
-                elif snake_direction == RIGHT:
-                    head['x'] += 1
-                if not (0 <= head['x'] < CELL_WIDTH and 0 <= head['y'] < CELL_HEIGHT):
-                    new_head = snake_coords[0].copy()
-                else:
-                    new_head = head
-                    if new_head in snake_coords[1:]:
-                        return game_over(screen, clock, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
-            else:
-                new_head = snake_coords[0].copy()
-
-            if new_head != snake_coords[0]:
-                snake_coords.insert(0, new_head)
-                if new_head['x'] == apple['x'] and new_head['y'] == apple['y']:
-                    apple_eat_sound.play()
-                    coin_count += 10
-                    apple = get_random_location(obstacles)
-                else:
-                    snake_coords.pop()
-
-            screen.fill(BLACK)
-            draw_obstacles(screen, obstacles)
-            snake_color = SKIN_COLORS[selected_skin]
-            head_item = HEAD_ITEMS[selected_head] if selected_head != -1 else None
-            draw_snake(screen, snake_coords, snake_color, head_item)
-            apple_pixel = {'x': apple['x'] * CELL_SIZE, 'y': apple['y'] * CELL_SIZE}
-            draw_apple(screen, apple_pixel)
-            draw_overlay_menu(screen, overlay_font, muted)
-            pygame.display.update()
-            clock.tick(16)
+            for _ in range(timestep.advance()):
+                actions = [inputs.pop()]
+                recorder.tick(actions, world.directions)
+                for kind, _ in world.step(actions):
+                    if kind == EVENT_APPLE_EATEN:
+                        audio.play("eat")
+                        session.add_coins(10)
+                    elif kind == EVENT_GAME_OVER:
+                        recorder.close(world)
+                        return game_over(screen, clock)
+
+            save_game_record(session)
+
+            snake_color = SKIN_COLORS[session.selected_skin]
+            head_item = HEAD_ITEMS[session.selected_head] if session.selected_head != -1 else None
+            rects = renderer.draw(world, [(snake_color, head_item)], muted=audio.muted, alpha=timestep.alpha)
+            pygame.display.update(rects)
+            clock.tick(DISPLAY_FPS)
         
         if restart_pressed:
             continue
 
 # --------------------- 2 Players 模式 ---------------------
-def game_loop_2players(screen, clock, apple_eat_sound, collision_sound, snake_eaten_sound,
-                        coin_count, purchased_skins, selected_skin, purchased_heads, selected_head):
-    global muted
+def game_loop_2players(screen, clock, session):
     while True:
         restart_pressed = False
-        snake1_coords = [{'x': 5, 'y': 10}, {'x': 4, 'y': 10}, {'x': 3, 'y': 10}]
-        snake2_coords = [{'x': CELL_WIDTH - 6, 'y': 10}, {'x': CELL_WIDTH - 5, 'y': 10}, {'x': CELL_WIDTH - 4, 'y': 10}]
-        direction1 = RIGHT
-        direction2 = LEFT
-        apple = get_random_location()
-        apple_count = 0
-        phase = 1
-        overlay_font = pygame.font.SysFont(None, 24)
+        world = SnakeWorld(MODE_2PLAYERS, CELL_WIDTH, CELL_HEIGHT)
+        inputs1 = InputQueue()
+        inputs2 = InputQueue()
+        overlay_font = get_font(24)
+        renderer = BoardRenderer(screen, overlay_font)
+        timestep = FixedTimestep(TICK_RATE)
+        recorder = start_recording(world, ai=None)
 
         running = True
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                    recorder.close(world)
+                    exit_game(session)
+                elif event.type == pygame.VIDEOEXPOSE:
+                    renderer.invalidate()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
-                        exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                        recorder.close(world)
+                        exit_game(session)
                     if event.key == pygame.K_UP:
-                        direction1 = UP
+                        inputs1.push(UP)
                     elif event.key == pygame.K_DOWN:
-                        direction1 = DOWN
+                        inputs1.push(DOWN)
                     elif event.key == pygame.K_LEFT:
-                        direction1 = LEFT
+                        inputs1.push(LEFT)
                     elif event.key == pygame.K_RIGHT:
-                        direction1 = RIGHT
+                        inputs1.push(RIGHT)
                     if event.key == pygame.K_w:
-                        direction2 = UP
+                        inputs2.push(UP)
                     elif event.key == pygame.K_s:
-                        direction2 = DOWN
+                        inputs2.push(DOWN)
                     elif event.key == pygame.K_a:
-                        direction2 = LEFT
+                        inputs2.push(LEFT)
                     elif event.key == pygame.K_d:
-                        direction2 = RIGHT
+                        inputs2.push(RIGHT)
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     pos = pygame.mouse.get_pos()
                     if OVERLAY_RESTART_RECT.collidepoint(pos):
@@ -500,132 +268,246 @@ def game_loop_2players(screen, clock, apple_eat_sound, collision_sound, snake_ea
                         running = False
                         break
                     elif OVERLAY_QUIT_RECT.collidepoint(pos):
-                        return "MENU", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
+                        recorder.close(world)
+                        return "MENU"
                     elif OVERLAY_VOLUME_RECT.collidepoint(pos):
-                        muted = not muted
-                        apple_eat_sound.set_volume(0 if muted else 1)
-                        collision_sound.set_volume(0 if muted else 1)
-                        snake_eaten_sound.set_volume(0 if muted else 1)
+                        audio.toggle_mute()
             if not running:
+                recorder.close(world)
                 break
 
-            new_head1 = snake1_coords[0].copy()
-            if direction1 == UP:
-                new_head1['y'] -= 1
-            elif direction1 == DOWN:
-                new_head1['y'] += 1
-            elif direction1 == LEFT:
-                new_head1['x'] -= 1
-            elif direction1 == RIGHT:
-                new_head1['x'] += 1
-
-            new_head2 = snake2_coords[0].copy()
-            if direction2 == UP:
-                new_head2['y'] -= 1
-            elif direction2 == DOWN:
-                new_head2['y'] += 1
-            elif direction2 == LEFT:
-                new_head2['x'] -= 1
-            elif direction2 == RIGHT:
-                new_head2['x'] += 1
-
-            if not (0 <= new_head1['x'] < CELL_WIDTH and 0 <= new_head1['y'] < CELL_HEIGHT):
-                return game_over(screen, clock, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
-            if not (0 <= new_head2['x'] < CELL_WIDTH and 0 <= new_head2['y'] < CELL_HEIGHT):
-                return game_over(screen, clock, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
-
-            if phase == 1:
-                snake1_grow = False
-                snake2_grow = False
-                if new_head1['x'] == apple['x'] and new_head1['y'] == apple['y']:
-                    snake1_grow = True
-                    apple_eat_sound.play()
-                    apple_count += 1
-                    apple = get_random_location()
-                if new_head2['x'] == apple['x'] and new_head2['y'] == apple['y']:
-                    snake2_grow = True
-                    apple_eat_sound.play()
-                    apple_count += 1
-                    apple = get_random_location()
-
-                snake1_coords.insert(0, new_head1)
-                snake2_coords.insert(0, new_head2)
-                if not snake1_grow:
-                    snake1_coords.pop()
-                if not snake2_grow:
-                    snake2_coords.pop()
-
-                if apple_count >= 5:
-                    phase = 2
+            for _ in range(timestep.advance()):
+                actions = [inputs1.pop(), inputs2.pop()]
+                recorder.tick(actions, world.directions)
+                for kind, _ in world.step(actions):
+                    if kind == EVENT_APPLE_EATEN:
+                        audio.play("eat")
+                    elif kind == EVENT_SNAKE_EATEN:
+                        audio.play("eaten")
+                    elif kind == EVENT_GAME_OVER:
+                        recorder.close(world)
+                        return game_over(screen, clock)
+
+            snake1_color = SKIN_COLORS[session.selected_skin]
+            head_item = HEAD_ITEMS[session.selected_head] if session.selected_head != -1 else None
+            snake2_color = SKIN_COLORS[0]
+            if world.phase == 1:
+                info = f"Phase 1: {world.apple_count} apple(s) eaten"
             else:
-                snake1_coords.insert(0, new_head1)
-                snake2_coords.insert(0, new_head2)
-                collision1 = False
-                collision2 = False
-                for seg in snake2_coords[1:]:
-                    if new_head1['x'] == seg['x'] and new_head1['y'] == seg['y']:
-                        collision1 = True
-                        break
-                for seg in snake1_coords[1:]:
-                    if new_head2['x'] == seg['x'] and new_head2['y'] == seg['y']:
-                        collision2 = True
-                        break
-
-                if collision1:
-                    if len(snake2_coords) > 1:
-                        snake2_coords.pop()
-                        snake_eaten_sound.play()
-                else:
-                    snake1_coords.pop()
+                info = "Phase 2: Mutual Eating"
+            rects = renderer.draw(world, [(snake1_color, head_item), (snake2_color, None)],
+                                  show_apple=world.phase == 1, muted=audio.muted, hud=info, alpha=timestep.alpha)
+            pygame.display.update(rects)
+            clock.tick(DISPLAY_FPS)
+        if restart_pressed:
+            continue
 
-                if collision2:
-                    if len(snake1_coords) > 1:
-                        snake1_coords.pop()
-                        snake_eaten_sound.play()
-                else:
-                    snake2_coords.pop()
+# --------------------- Arena模式 ---------------------
+def game_loop_arena(screen, clock, session, width=ARENA_WIDTH, height=ARENA_HEIGHT, bots=ARENA_BOTS):
+    """
+    玩家（方向键）和 bots 条 AI 蛇在 width x height 的大棋盘上互相吃尾巴，规则见 SnakeWorld._step_arena：
+      - 吃苹果 +10 金币
+      - 撞墙、撞障碍、咬到自己、被吃到只剩蛇头或迎头撞上不比自己短的蛇则游戏结束；其他蛇都被淘汰时同样结束
+    镜头跟着玩家的蛇头滚动，+/- 键或鼠标滚轮缩放。
+    """
+    while True:
+        restart_pressed = False
+        world = SnakeWorld(MODE_ARENA, width, height, players=bots + 1)
+        controllers = [None] + [ArenaBot() for _ in range(bots)]
+        inputs = InputQueue()
+        overlay_font = get_font(24)
+        camera = Camera(WINDOW_WIDTH, WINDOW_HEIGHT, width, height)
+        camera.follow(world.snakes[0][0], smoothing=1)
+        renderer = ArenaRenderer(screen, overlay_font, camera)
+        timestep = FixedTimestep(TICK_RATE)
+        recorder = start_recording(world, ai=None)
+        skin = (SKIN_COLORS[session.selected_skin], HEAD_ITEMS[session.selected_head] if session.selected_head != -1 else None)
+        # 机器人的颜色从皮肤里隔几个取一个，尽量与玩家和彼此区分开
+        skins = [skin] + [(SKIN_COLORS[(session.selected_skin + 7 * (k + 1)) % len(SKIN_COLORS)], None) for k in range(bots)]
 
-                if len(snake1_coords) <= 1 or len(snake2_coords) <= 1:
-                    return game_over(screen, clock, collision_sound, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    recorder.close(world)
+                    exit_game(session)
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        recorder.close(world)
+                        exit_game(session)
+                    if event.key == pygame.K_UP:
+                        inputs.push(UP)
+                    elif event.key == pygame.K_DOWN:
+                        inputs.push(DOWN)
+                    elif event.key == pygame.K_LEFT:
+                        inputs.push(LEFT)
+                    elif event.key == pygame.K_RIGHT:
+                        inputs.push(RIGHT)
+                    elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        camera.zoom_by(1)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        camera.zoom_by(-1)
+                elif event.type == pygame.MOUSEWHEEL:
+                    camera.zoom_by(1 if event.y > 0 else -1)
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):
+                    pos = pygame.mouse.get_pos()
+                    if OVERLAY_RESTART_RECT.collidepoint(pos):
+                        restart_pressed = True
+                        running = False
+                        break
+                    elif OVERLAY_QUIT_RECT.collidepoint(pos):
+                        recorder.close(world)
+                        return "MENU"
+                    elif OVERLAY_VOLUME_RECT.collidepoint(pos):
+                        audio.toggle_mute()
+            if not running:
+                recorder.close(world)
+                break
 
-            screen.fill(BLACK)
-            if phase == 1:
-                apple_pixel = {'x': apple['x'] * CELL_SIZE, 'y': apple['y'] * CELL_SIZE}
-                draw_apple(screen, apple_pixel)
-            snake1_color = SKIN_COLORS[selected_skin]
-            head_item = HEAD_ITEMS[selected_head] if selected_head != -1 else None
-            snake2_color = SKIN_COLORS[0]
-            draw_snake(screen, snake1_coords, snake1_color, head_item)
-            draw_snake(screen, snake2_coords, snake2_color)
-            draw_overlay_menu(screen, overlay_font, muted)
-            info_font = pygame.font.SysFont(None, 24)
-            if phase == 1:
-                info_text = info_font.render(f"Phase 1: {apple_count} apple(s) eaten", True, WHITE)
-            else:
-                info_text = info_font.render("Phase 2: Mutual Eating", True, WHITE)
-            screen.blit(info_text, (WINDOW_WIDTH//2 - 100, 20))
-            pygame.display.update()
-            clock.tick(16)
+            for _ in range(timestep.advance()):
+                actions = [inputs.pop()] + [bot(world, i + 1) for i, bot in enumerate(controllers[1:])]
+                recorder.tick(actions, world.directions)
+                for kind, index in world.step(actions):
+                    if kind == EVENT_APPLE_EATEN and index == 0:
+                        audio.play("eat")
+                        session.add_coins(10)
+                    elif kind == EVENT_SNAKE_EATEN and index == 0:
+                        audio.play("eaten")
+                    elif (kind == EVENT_SNAKE_DIED and index == 0) or kind == EVENT_GAME_OVER:
+                        recorder.close(world)
+                        return game_over(screen, clock)
+
+            save_game_record(session)
+
+            camera.follow(world.snakes[0][0])
+            info = f"Alive: {sum(world.alive)}/{world.players}  Length: {len(world.snakes[0])}"
+            rects = renderer.draw(world, skins, muted=audio.muted, hud=info)
+            pygame.display.update(rects)
+            clock.tick(DISPLAY_FPS)
         if restart_pressed:
             continue
 
+# --------------------- 菜单和商店的事件等待 ---------------------
+# 菜单和商店只在有输入时才变化：阻塞等待事件，收到会改变画面的事件才重画
+IDLE_TIMEOUT = 1000  # 等待事件的最长时间（毫秒）
+PASSIVE_EVENTS = (pygame.NOEVENT, pygame.MOUSEMOTION)  # 不改变画面的事件
+
+def wait_events(timeout=IDLE_TIMEOUT):
+    """阻塞到有事件或超时，返回积攒的全部事件（超时时为空列表）。"""
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+def needs_redraw(events):
+    return any(event.type not in PASSIVE_EVENTS for event in events)
+
 # --------------------- 皮肤商店（包含皮肤和头饰切换） ---------------------
-def skins_loop(screen, clock, font_button, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head):
-    shop_mode = "skins"
+SHOP_GRID = GridLayout(50, 150, cols=4, rows=8, box=40, padding=20)  # 一页 32 个商品
+SHOP_PREV_RECT = pygame.Rect(300, 570, 40, 40)  # 商品多于一页时的翻页按钮
+SHOP_NEXT_RECT = pygame.Rect(420, 570, 40, 40)
+
+def shop_label(item, owned, reputation_level):
+    if owned:
+        return "Owned"
+    if not item.unlocked(reputation_level):
+        return f"Lv {item.requires_reputation}"
+    return f"{item.price} coins"
+
+class ShopTiles:
+    """
+    画好的商店格子（色块加下方的标签）的 LRU 缓存，按 (商品 id, 标签) 查找，
+    每帧每个格子只需 blit 一次。标签比格子宽，所以每块带透明通道和相对格子左上角的偏移。
+    """
+
+    def __init__(self, font, box_size, maxsize=512):
+        self.font = font
+        self.box_size = box_size
+        self.maxsize = maxsize
+        self.tiles = OrderedDict()
+
+    def get(self, item, label):
+        """返回 (Surface, (dx, dy))，画到格子左上角加 (dx, dy) 处。"""
+        key = (item.id, label)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+        text = render_text(self.font, label, WHITE)
+        box = pygame.Rect(0, 0, self.box_size, self.box_size)
+        text_rect = text.get_rect(center=(self.box_size / 2, self.box_size + 12))
+        bounds = box.union(text_rect)
+        surf = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        surf.fill(item.color + (255,), box.move(-bounds.x, -bounds.y))
+        # 标签处原本完全透明，按最大值合成等于原样拷贝像素（含透明度），贴到屏幕上与直接画文字一样
+        surf.blit(text, text_rect.move(-bounds.x, -bounds.y), special_flags=pygame.BLEND_RGBA_MAX)
+        tile = self.tiles[key] = (surf, (bounds.x, bounds.y))
+        if len(self.tiles) > self.maxsize:
+            self.tiles.popitem(last=False)
+        return tile
+
+def compose_shop_layer(font_button, label_font, shop_mode):
+    """商店里不随操作变化的部分：黑底、标题、切换按钮、预览框和返回按钮。"""
+    layer = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+    layer.fill(BLACK)
+    switch_text = "Switch to Headwear" if shop_mode == "skin" else "Switch to Skins"
+    switch_button = render_text(font_button, switch_text, WHITE)
+    switch_rect = switch_button.get_rect(topleft=(50, 100))
+    pygame.draw.rect(layer, WHITE, switch_rect.inflate(20, 10), 2)
+    layer.blit(switch_button, switch_rect)
+
+    title_font = get_font(48)
+    title_text = render_text(title_font, "Shop", WHITE)
+    layer.blit(title_text, (50, 50))
+
+    preview_area = pygame.Rect(600, 150, 300, 300)
+    pygame.draw.rect(layer, GRAY, preview_area, 2)
+    preview_title = render_text(label_font, "Preview", WHITE)
+    preview_title_rect = preview_title.get_rect(center=(preview_area.centerx, preview_area.y - 20))
+    layer.blit(preview_title, preview_title_rect)
+
+    back_text = render_text(font_button, "Back to Menu", WHITE)
+    back_rect = back_text.get_rect(topleft=(50, 650))
+    pygame.draw.rect(layer, WHITE, back_rect.inflate(20,10), 2)
+    layer.blit(back_text, back_rect)
+    return layer
+
+def skins_loop(screen, clock, font_button, session):
+    """商店。与菜单一样，没有输入时不重画。"""
+    shop_mode = "skin"
     confirm_purchase_item = None
+    label_font = get_font(24)
+    tiles = ShopTiles(label_font, SHOP_GRID.box)
+    # 每类商品各自记住翻到的页，一开始翻到选中的商品所在的页
+    pages = {"skin": SHOP_GRID.page_of(max(session.selected_skin, 0)),
+             "head": SHOP_GRID.page_of(max(session.selected_head, 0))}
+    layers = {}  # shop_mode -> 不随操作变化的部分（标题、按钮、预览框）
+    events = []
+    redraw = True
     running = True
     while running:
-        for event in pygame.event.get():
+        items = CATALOG.by_kind[shop_mode]
+        page_count = SHOP_GRID.page_count(len(items))
+        for event in events:
             if event.type == pygame.QUIT:
-                exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                exit_game(session)
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    return "MENU", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-            elif event.type == pygame.MOUSEBUTTONDOWN:
+                    return "MENU"
+                elif event.key == pygame.K_PAGEUP:
+                    pages[shop_mode] = max(pages[shop_mode] - 1, 0)
+                elif event.key == pygame.K_PAGEDOWN:
+                    pages[shop_mode] = min(pages[shop_mode] + 1, page_count - 1)
+            elif event.type == pygame.MOUSEWHEEL:
+                pages[shop_mode] = min(max(pages[shop_mode] - event.y, 0), page_count - 1)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # 滚轮也会发按键 4/5 的 MOUSEBUTTONDOWN
                 mx, my = pygame.mouse.get_pos()
                 switch_rect = pygame.Rect(50, 100, 150, 40)
                 if switch_rect.collidepoint(mx, my):
-                    shop_mode = "head" if shop_mode == "skins" else "skins"
+                    shop_mode = "head" if shop_mode == "skin" else "skin"
+                    confirm_purchase_item = None
+                    items = CATALOG.by_kind[shop_mode]
+                    page_count = SHOP_GRID.page_count(len(items))
                     continue
                 if confirm_purchase_item is not None:
                     CONFIRM_WIDTH = 400
@@ -634,318 +516,302 @@ def skins_loop(screen, clock, font_button, coin_count, purchased_skins, selected
                     yes_rect = pygame.Rect(confirm_rect.x + 50, confirm_rect.y + CONFIRM_HEIGHT - 60, 100, 40)
                     no_rect = pygame.Rect(confirm_rect.x + CONFIRM_WIDTH - 150, confirm_rect.y + CONFIRM_HEIGHT - 60, 100, 40)
                     if yes_rect.collidepoint(mx, my):
-                        price = 100 if shop_mode == "skins" else HEAD_COST
-                        if coin_count >= price:
-                            coin_count -= price
-                            if shop_mode == "skins":
-                                purchased_skins[confirm_purchase_item] = True
-                                selected_skin = confirm_purchase_item
-                            else:
-                                purchased_heads[confirm_purchase_item] = True
-                                selected_head = confirm_purchase_item
+                        item = items[confirm_purchase_item]
+                        if shop_mode == "skin":
+                            session.buy_skin(item.index, item.price)
+                        else:
+                            session.buy_head(item.index, item.price)
                         confirm_purchase_item = None
                     elif no_rect.collidepoint(mx, my):
                         confirm_purchase_item = None
                 else:
                     preview_area = pygame.Rect(600, 150, 300, 300)
-                    price = 100 if shop_mode == "skins" else HEAD_COST
-                    if shop_mode == "skins":
-                        if not purchased_skins[selected_skin] and coin_count >= price:
-                            purchase_button_rect = pygame.Rect(preview_area.x + (preview_area.width - 120)//2, preview_area.y + preview_area.height + 20, 120, 40)
-                            if purchase_button_rect.collidepoint(mx, my):
-                                confirm_purchase_item = selected_skin
-                                continue
+                    if shop_mode == "skin":
+                        selected, purchased = session.selected_skin, session.purchased_skins
                     else:
-                        if not purchased_heads[selected_head] and coin_count >= price:
-                            purchase_button_rect = pygame.Rect(preview_area.x + (preview_area.width - 120)//2, preview_area.y + preview_area.height + 20, 120, 40)
-                            if purchase_button_rect.collidepoint(mx, my):
-                                confirm_purchase_item = selected_head
-                                continue
-                    padding = 20
-                    box_size = 40
-                    start_x = 50
-                    start_y = 150
-                    items = SKIN_COLORS if shop_mode == "skins" else HEAD_ITEMS
-                    for i, item in enumerate(items):
-                        row = i // 4
-                        col = i % 4
-                        bx = start_x + col * (box_size + padding)
-                        by = start_y + row * (box_size + padding)
-                        rect = pygame.Rect(bx, by, box_size, box_size)
-                        if rect.collidepoint(mx, my):
-                            if shop_mode == "skins":
-                                selected_skin = i
-                            else:
-                                selected_head = i
-                            break
-                    back_text = font_button.render("Back to Menu", True, WHITE)
+                        selected, purchased = session.selected_head, session.purchased_heads
+                    item = items[selected]
+                    if not purchased[selected] and item.unlocked(session.reputation_level) and session.coin_count >= item.price:
+                        purchase_button_rect = pygame.Rect(preview_area.x + (preview_area.width - 120)//2, preview_area.y + preview_area.height + 20, 120, 40)
+                        if purchase_button_rect.collidepoint(mx, my):
+                            confirm_purchase_item = selected
+                            continue
+                    if page_count > 1 and SHOP_PREV_RECT.collidepoint(mx, my):
+                        pages[shop_mode] = max(pages[shop_mode] - 1, 0)
+                        continue
+                    if page_count > 1 and SHOP_NEXT_RECT.collidepoint(mx, my):
+                        pages[shop_mode] = min(pages[shop_mode] + 1, page_count - 1)
+                        continue
+                    i = SHOP_GRID.index_at(mx, my, pages[shop_mode], len(items))
+                    if i is not None:
+                        changed = session.select_skin(i) if shop_mode == "skin" else session.select_head(i)
+                        if changed:
+                            # 换了皮肤或头饰，丢掉按旧外观画好的图块
+                            sprites.invalidate()
+                    back_text = render_text(font_button, "Back to Menu", WHITE)
                     back_rect = back_text.get_rect(topleft=(50, 650))
                     if back_rect.inflate(20, 10).collidepoint(mx, my):
-                        return "MENU", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-
-        screen.fill(BLACK)
-        switch_text = "Switch to Headwear" if shop_mode == "skins" else "Switch to Skins"
-        switch_button = font_button.render(switch_text, True, WHITE)
-        switch_rect = switch_button.get_rect(topleft=(50, 100))
-        pygame.draw.rect(screen, WHITE, switch_rect.inflate(20, 10), 2)
-        screen.blit(switch_button, switch_rect)
-
-        title_font = pygame.font.SysFont(None, 48)
-        title_text = title_font.render("Shop", True, WHITE)
-        screen.blit(title_text, (50, 50))
-        price = 100 if shop_mode == "skins" else HEAD_COST
-        coin_text = font_button.render(f"Coins: {coin_count}", True, GOLD)
-        screen.blit(coin_text, (WINDOW_WIDTH - 200, 50))
-        padding = 20
-        box_size = 40
-        start_x = 50
-        start_y = 150
-        label_font = pygame.font.SysFont(None, 24)
-        items = SKIN_COLORS if shop_mode == "skins" else HEAD_ITEMS
-        purchased = purchased_skins if shop_mode == "skins" else purchased_heads
-        selected = selected_skin if shop_mode == "skins" else selected_head
-        for i, item in enumerate(items):
-            row = i // 4
-            col = i % 4
-            bx = start_x + col * (box_size + padding)
-            by = start_y + row * (box_size + padding)
-            rect = pygame.Rect(bx, by, box_size, box_size)
-            pygame.draw.rect(screen, item, rect)
-            if purchased[i]:
-                label = label_font.render("Owned", True, WHITE)
+                        return "MENU"
+        save_game_record(session)
+
+        if redraw:
+            layer = layers.get(shop_mode)
+            if layer is None:
+                layer = layers[shop_mode] = compose_shop_layer(font_button, label_font, shop_mode)
+            screen.blit(layer, (0, 0))
+            coin_text = render_text(font_button, f"Coins: {session.coin_count}", GOLD)
+            screen.blit(coin_text, (WINDOW_WIDTH - 200, 50))
+            purchased = session.purchased_skins if shop_mode == "skin" else session.purchased_heads
+            selected = session.selected_skin if shop_mode == "skin" else session.selected_head
+            # 只画当前页的商品
+            page = pages[shop_mode]
+            first = page * SHOP_GRID.per_page
+            for slot, item in enumerate(items[first:first + SHOP_GRID.per_page]):
+                bx, by, _, _ = SHOP_GRID.box_at(slot)
+                tile, (dx, dy) = tiles.get(item, shop_label(item, purchased[item.index], session.reputation_level))
+                screen.blit(tile, (bx + dx, by + dy))
+                if item.index == selected:
+                    pygame.draw.rect(screen, WHITE, (bx, by, SHOP_GRID.box, SHOP_GRID.box), 3)
+            if page_count > 1:
+                for rect, arrow in ((SHOP_PREV_RECT, "<"), (SHOP_NEXT_RECT, ">")):
+                    pygame.draw.rect(screen, WHITE, rect, 2)
+                    arrow_text = render_text(font_button, arrow, WHITE)
+                    screen.blit(arrow_text, arrow_text.get_rect(center=rect.center))
+                page_text = render_text(label_font, f"{page + 1}/{page_count}", WHITE)
+                screen.blit(page_text, page_text.get_rect(center=((SHOP_PREV_RECT.right + SHOP_NEXT_RECT.left) // 2, SHOP_PREV_RECT.centery)))
+
+            item = items[selected]
+            price = item.price
+            preview_area = pygame.Rect(600, 150, 300, 300)
+            if shop_mode == "skin":
+                preview_segment_size = 40
+                spacing = 10
+                total_width = 3 * preview_segment_size + 2 * spacing
+                start_preview_x = preview_area.x + (preview_area.width - total_width) // 2
+                start_preview_y = preview_area.y + (preview_area.height - preview_segment_size) // 2
+                for i in range(3):
+                    seg_rect = pygame.Rect(start_preview_x + i*(preview_segment_size + spacing), start_preview_y, preview_segment_size, preview_segment_size)
+                    pygame.draw.rect(screen, item.color, seg_rect)
+                    pygame.draw.rect(screen, WHITE, seg_rect, 2)
             else:
-                label = label_font.render(f"{price} coins", True, WHITE)
-            label_rect = label.get_rect(center=(bx + box_size/2, by + box_size + 12))
-            screen.blit(label, label_rect)
-            if i == selected:
-                pygame.draw.rect(screen, WHITE, rect, 3)
-
-        preview_area = pygame.Rect(600, 150, 300, 300)
-        pygame.draw.rect(screen, GRAY, preview_area, 2)
-        preview_title = label_font.render("Preview", True, WHITE)
-        preview_title_rect = preview_title.get_rect(center=(preview_area.centerx, preview_area.y - 20))
-        screen.blit(preview_title, preview_title_rect)
-        if shop_mode == "skins":
-            preview_segment_size = 40
-            spacing = 10
-            total_width = 3 * preview_segment_size + 2 * spacing
-            start_preview_x = preview_area.x + (preview_area.width - total_width) // 2
-            start_preview_y = preview_area.y + (preview_area.height - preview_segment_size) // 2
-            for i in range(3):
-                seg_rect = pygame.Rect(start_preview_x + i*(preview_segment_size + spacing), start_preview_y, preview_segment_size, preview_segment_size)
-                pygame.draw.rect(screen, items[selected], seg_rect)
-                pygame.draw.rect(screen, WHITE, seg_rect, 2)
-        else:
-            hat_points = [
-                (preview_area.centerx - 50, preview_area.centery),
-                (preview_area.centerx + 50, preview_area.centery),
-                (preview_area.centerx, preview_area.centery - 50)
-            ]
-            pygame.draw.polygon(screen, items[selected], hat_points)
-            pygame.draw.polygon(screen, WHITE, hat_points, 2)
-        if not purchased[selected] and coin_count >= price:
-            purchase_button_rect = pygame.Rect(preview_area.x + (preview_area.width - 120)//2, preview_area.y + preview_area.height + 20, 120, 40)
-            pygame.draw.rect(screen, WHITE, purchase_button_rect, 2)
-            purchase_text = label_font.render("Purchase", True, WHITE)
-            purchase_text_rect = purchase_text.get_rect(center=purchase_button_rect.center)
-            screen.blit(purchase_text, purchase_text_rect)
-        elif not purchased[selected]:
-            insufficient_text = label_font.render("Not enough coins", True, RED)
-            insufficient_text_rect = insufficient_text.get_rect(center=(preview_area.centerx, preview_area.y + preview_area.height + 20))
-            screen.blit(insufficient_text, insufficient_text_rect)
-
-        back_text = font_button.render("Back to Menu", True, WHITE)
-        back_rect = back_text.get_rect(topleft=(50, 650))
-        pygame.draw.rect(screen, WHITE, back_rect.inflate(20,10), 2)
-        screen.blit(back_text, back_rect)
-
-        if confirm_purchase_item is not None:
-            CONFIRM_WIDTH = 400
-            CONFIRM_HEIGHT = 200
-            confirm_rect = pygame.Rect((WINDOW_WIDTH - CONFIRM_WIDTH) // 2, (WINDOW_HEIGHT - CONFIRM_HEIGHT) // 2, CONFIRM_WIDTH, CONFIRM_HEIGHT)
-            pygame.draw.rect(screen, GRAY, confirm_rect)
-            pygame.draw.rect(screen, WHITE, confirm_rect, 2)
-            confirm_font = pygame.font.SysFont(None, 36)
-            confirm_text = confirm_font.render(f"Purchase for {price} coins?", True, WHITE)
-            text_rect = confirm_text.get_rect(center=(confirm_rect.centerx, confirm_rect.y + 50))
-            screen.blit(confirm_text, text_rect)
-            yes_rect = pygame.Rect(confirm_rect.x + 50, confirm_rect.y + CONFIRM_HEIGHT - 60, 100, 40)
-            no_rect = pygame.Rect(confirm_rect.x + CONFIRM_WIDTH - 150, confirm_rect.y + CONFIRM_HEIGHT - 60, 100, 40)
-            pygame.draw.rect(screen, WHITE, yes_rect, 2)
-            pygame.draw.rect(screen, WHITE, no_rect, 2)
-            button_font = pygame.font.SysFont(None, 28)
-            yes_text = button_font.render("Yes", True, WHITE)
-            no_text = button_font.render("No", True, WHITE)
-            yes_text_rect = yes_text.get_rect(center=yes_rect.center)
-            no_text_rect = no_text.get_rect(center=no_rect.center)
-            screen.blit(yes_text, yes_text_rect)
-            screen.blit(no_text, no_text_rect)
-
-        pygame.display.update()
-        clock.tick(15)
+                hat_points = [
+                    (preview_area.centerx - 50, preview_area.centery),
+                    (preview_area.centerx + 50, preview_area.centery),
+                    (preview_area.centerx, preview_area.centery - 50)
+                ]
+                pygame.draw.polygon(screen, item.color, hat_points)
+                pygame.draw.polygon(screen, WHITE, hat_points, 2)
+            if not purchased[selected] and not item.unlocked(session.reputation_level):
+                locked_text = render_text(label_font, f"Requires background level {item.requires_reputation}", RED)
+                locked_text_rect = locked_text.get_rect(center=(preview_area.centerx, preview_area.y + preview_area.height + 20))
+                screen.blit(locked_text, locked_text_rect)
+            elif not purchased[selected] and session.coin_count >= price:
+                purchase_button_rect = pygame.Rect(preview_area.x + (preview_area.width - 120)//2, preview_area.y + preview_area.height + 20, 120, 40)
+                pygame.draw.rect(screen, WHITE, purchase_button_rect, 2)
+                purchase_text = render_text(label_font, "Purchase", WHITE)
+                purchase_text_rect = purchase_text.get_rect(center=purchase_button_rect.center)
+                screen.blit(purchase_text, purchase_text_rect)
+            elif not purchased[selected]:
+                insufficient_text = render_text(label_font, "Not enough coins", RED)
+                insufficient_text_rect = insufficient_text.get_rect(center=(preview_area.centerx, preview_area.y + preview_area.height + 20))
+                screen.blit(insufficient_text, insufficient_text_rect)
+
+            if confirm_purchase_item is not None:
+                CONFIRM_WIDTH = 400
+                CONFIRM_HEIGHT = 200
+                confirm_rect = pygame.Rect((WINDOW_WIDTH - CONFIRM_WIDTH) // 2, (WINDOW_HEIGHT - CONFIRM_HEIGHT) // 2, CONFIRM_WIDTH, CONFIRM_HEIGHT)
+                pygame.draw.rect(screen, GRAY, confirm_rect)
+                pygame.draw.rect(screen, WHITE, confirm_rect, 2)
+                confirm_font = get_font(36)
+                confirm_text = render_text(confirm_font, f"Purchase for {items[confirm_purchase_item].price} coins?", WHITE)
+                text_rect = confirm_text.get_rect(center=(confirm_rect.centerx, confirm_rect.y + 50))
+                screen.blit(confirm_text, text_rect)
+                yes_rect = pygame.Rect(confirm_rect.x + 50, confirm_rect.y + CONFIRM_HEIGHT - 60, 100, 40)
+                no_rect = pygame.Rect(confirm_rect.x + CONFIRM_WIDTH - 150, confirm_rect.y + CONFIRM_HEIGHT - 60, 100, 40)
+                pygame.draw.rect(screen, WHITE, yes_rect, 2)
+                pygame.draw.rect(screen, WHITE, no_rect, 2)
+                button_font = get_font(28)
+                yes_text = render_text(button_font, "Yes", WHITE)
+                no_text = render_text(button_font, "No", WHITE)
+                yes_text_rect = yes_text.get_rect(center=yes_rect.center)
+                no_text_rect = no_text.get_rect(center=no_rect.center)
+                screen.blit(yes_text, yes_text_rect)
+                screen.blit(no_text, no_text_rect)
+
+            pygame.display.update()
+        events = wait_events()
+        redraw = needs_redraw(events)
 
 # --------------------- 新增：静态背景生成函数 ---------------------
-def generate_static_backgrounds():
-    """一次性生成 30 个静态背景，每个背景为一个 pygame.Surface 对象"""
-    backgrounds = []
-    for level in range(30):
+BACKGROUND_LEVELS = 30  # 共 30 种背景
+
+def generate_static_background(level):
+    """生成第 level 个静态背景（pygame.Surface），同一等级每次生成的图都相同。"""
+    display = pygame.display.get_surface()
+    if display is not None:
+        surf = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), 0, display)
+    else:
         surf = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        # 基础颜色随声望等级变化
-        base_color = ((level * 8) % 256, (level * 5) % 256, (level * 3) % 256)
-        surf.fill(base_color)
-        # 固定随机种子保证每个背景静态不变
-        random.seed(level)
-        num_circles = 100 + level * 5  # 随着等级增加，背景上绘制的圆数量增多
-        for _ in range(num_circles):
-            x = random.randint(0, WINDOW_WIDTH)
-            y = random.randint(0, WINDOW_HEIGHT)
-            radius = random.randint(1, 10)
-            color = (random.randint(0,255), random.randint(0,255), random.randint(0,255))
-            pygame.draw.circle(surf, color, (x,y), radius)
-        backgrounds.append(surf)
-    return backgrounds
+    # 基础颜色随声望等级变化
+    base_color = ((level * 8) % 256, (level * 5) % 256, (level * 3) % 256)
+    surf.fill(base_color)
+    # 固定随机种子保证每个背景静态不变（用独立的 Random，不影响游戏中的随机数）
+    rng = random.Random(level)
+    num_circles = 100 + level * 5  # 随着等级增加，背景上绘制的圆数量增多
+    for _ in range(num_circles):
+        x = rng.randint(0, WINDOW_WIDTH)
+        y = rng.randint(0, WINDOW_HEIGHT)
+        radius = rng.randint(1, 10)
+        color = (rng.randint(0,255), rng.randint(0,255), rng.randint(0,255))
+        pygame.draw.circle(surf, color, (x,y), radius)
+    return surf
+
+class MenuBackgrounds:
+    """
+    按需生成的菜单背景：只保留当前声望等级的背景，并在后台线程里预先生成下一级
+    （升级后马上要用），其余等级的背景不占内存（每张 1000x800 约 3 MB）。
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        self.lock = threading.Lock()
+        self.prefetching = None  # (等级, 线程)
+
+    def get(self, level):
+        level = min(level, BACKGROUND_LEVELS - 1)
+        if self.prefetching is not None and self.prefetching[0] == level:
+            self.prefetching[1].join()
+        with self.lock:
+            surf = self.surfaces.get(level)
+        if surf is None:
+            surf = generate_static_background(level)
+        with self.lock:
+            # 只留下当前等级和下一级
+            self.surfaces = {k: v for k, v in self.surfaces.items() if k == level + 1}
+            self.surfaces[level] = surf
+        self.prefetch(level + 1)
+        return surf
+
+    def prefetch(self, level):
+        """在后台线程里生成 level 的背景。"""
+        if level >= BACKGROUND_LEVELS or level in self.surfaces:
+            return
+        if self.prefetching is not None and self.prefetching[1].is_alive():
+            return
+        thread = threading.Thread(target=self._generate, args=(level,), daemon=True)
+        self.prefetching = (level, thread)
+        thread.start()
+
+    def _generate(self, level):
+        surf = generate_static_background(level)
+        with self.lock:
+            self.surfaces[level] = surf
 
 # --------------------- 菜单 ---------------------
-def menu_loop(screen, clock, font_title, font_button, game_start_sound,
-              coin_count, purchased_skins, selected_skin, purchased_heads, selected_head):
-    global reputation_level, reputation_upgrade_cost, static_backgrounds
+def compose_menu_layer(font_title, font_button, reputation_level, reputation_upgrade_cost):
+    """
+    把背景、标题和按钮合成到一张图上（只随声望变化），返回 (图, {按钮名: 按钮 Rect})。
+    每次重画菜单只需 blit 这张图再画上金币数。
+    """
+    # 根据声望等级显示相应背景（达到最高后保持在第 30 个背景）
+    layer = menu_backgrounds.get(reputation_level).copy()
+    buttons = [
+        ("SNAKE", "Play as Snake", -100),
+        ("APPLE", "Play as Apple", -40),
+        ("2PLAYERS", "2 Players Mode", 20),
+        ("ARENA", "Arena Mode", 80),
+        ("SKINS", "Shop", 140),
+        ("QUIT", "Quit Game", 200),
+        ("UPGRADE", f"Upgrade Background ({reputation_upgrade_cost} coins)", 260),
+    ]
+    title_text = render_text(font_title, "Snake Game", WHITE)
+    layer.blit(title_text, title_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/3)))
+    rects = {}
+    for name, label, dy in buttons:
+        text = render_text(font_button, label, WHITE)
+        rect = rects[name] = text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 + dy))
+        pygame.draw.rect(layer, WHITE, rect.inflate(20, 10), 2)
+        layer.blit(text, rect)
+    return layer, rects
+
+def menu_loop(screen, clock, font_title, font_button, session):
+    """主菜单。没有输入时阻塞在 wait_events() 里，不重画，几乎不占 CPU。"""
+    layer_key = None
+    redraw = True
     while True:
-        # 使用预生成的静态背景，根据声望等级显示相应背景（达到最高后保持在第 30 个背景）
-        index = min(reputation_level, 29)
-        screen.blit(static_backgrounds[index], (0,0))
-        
-        snake_text = font_button.render("Play as Snake", True, WHITE)
-        apple_text = font_button.render("Play as Apple", True, WHITE)
-        two_players_text = font_button.render("2 Players Mode", True, WHITE)
-        shop_text  = font_button.render("Shop", True, WHITE)
-        quit_text  = font_button.render("Quit Game", True, WHITE)
-        coin_text  = font_button.render(f"Coins: {coin_count}", True, GOLD)
-        upgrade_text = font_button.render(f"Upgrade Background ({reputation_upgrade_cost} coins)", True, WHITE)
-
-        snake_rect = snake_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 - 100))
-        apple_rect = apple_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 - 40))
-        two_players_rect = two_players_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 + 20))
-        shop_rect  = shop_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 + 80))
-        quit_rect  = quit_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 + 140))
-        upgrade_rect = upgrade_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 + 200))
-        
-        title_text = font_title.render("Snake Game", True, WHITE)
-        title_rect = title_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/3))
-        coin_rect = coin_text.get_rect(topright=(WINDOW_WIDTH - 20, 20))
+        key = (session.reputation_level, session.reputation_upgrade_cost)
+        if key != layer_key:
+            layer, rects = compose_menu_layer(font_title, font_button, *key)
+            layer_key = key
+            redraw = True
+        if redraw:
+            screen.blit(layer, (0, 0))
+            coin_text = render_text(font_button, f"Coins: {session.coin_count}", GOLD)
+            screen.blit(coin_text, coin_text.get_rect(topright=(WINDOW_WIDTH - 20, 20)))
+            pygame.display.update()
 
-        for event in pygame.event.get():
+        events = wait_events()
+        for event in events:
             if event.type == pygame.QUIT:
-                exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                exit_game(session)
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
+                    exit_game(session)
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mx, my = pygame.mouse.get_pos()
-                if snake_rect.collidepoint(mx, my):
-                    game_start_sound.play()
-                    return "SNAKE", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-                elif apple_rect.collidepoint(mx, my):
-                    game_start_sound.play()
-                    return "APPLE", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-                elif two_players_rect.collidepoint(mx, my):
-                    game_start_sound.play()
-                    return "2PLAYERS", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-                elif shop_rect.collidepoint(mx, my):
-                    game_start_sound.play()
-                    return "SKINS", coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-                elif quit_rect.collidepoint(mx, my):
-                    exit_game(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head)
-                elif upgrade_rect.collidepoint(mx, my):
+                if rects["QUIT"].collidepoint(mx, my):
+                    exit_game(session)
+                elif rects["UPGRADE"].collidepoint(mx, my):
                     # 仅在背景未达到第 30 个时允许升级
-                    if reputation_level < 29 and coin_count >= reputation_upgrade_cost:
-                        coin_count -= reputation_upgrade_cost
-                        reputation_level += 1
-                        reputation_upgrade_cost += 50
-
-        screen.blit(title_text, title_rect)
-        for text, rect in [(snake_text, snake_rect),
-                           (apple_text, apple_rect),
-                           (two_players_text, two_players_rect),
-                           (shop_text,  shop_rect),
-                           (quit_text,  quit_rect),
-                           (upgrade_text, upgrade_rect)]:
-            pygame.draw.rect(screen, WHITE, rect.inflate(20, 10), 2)
-            screen.blit(text, rect)
-        screen.blit(coin_text, coin_rect)
-        pygame.display.update()
-        clock.tick(15)
+                    session.upgrade_reputation(BACKGROUND_LEVELS - 1)
+                else:
+                    for state in ("SNAKE", "APPLE", "2PLAYERS", "ARENA", "SKINS"):
+                        if rects[state].collidepoint(mx, my):
+                            audio.play("start")
+                            return state
+        save_game_record(session)
+        redraw = needs_redraw(events)
 
 # --------------------- 主函数 ---------------------
 def main():
-    global static_backgrounds
+    global menu_backgrounds, audio
     pygame.init()
-    pygame.mixer.init()
-
-    game_start_sound = pygame.mixer.Sound("game_start.wav")
-    apple_eat_sound  = pygame.mixer.Sound("eat_apple.wav")
-    collision_sound  = pygame.mixer.Sound("game_over.wav")
-    snake_eaten_sound = pygame.mixer.Sound("snake_eaten.wav")
 
-    game_start_sound.set_volume(0 if muted else 1)
-    apple_eat_sound.set_volume(0 if muted else 1)
-    collision_sound.set_volume(0 if muted else 1)
-    snake_eaten_sound.set_volume(0 if muted else 1)
+    # 音效在后台解码，不耽误窗口打开；没有音频设备时不出声
+    audio = open_audio()
+    audio.load(SOUND_FILES)
 
     clock = pygame.time.Clock()
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Ian's Snake Game")
 
-    font_title  = pygame.font.SysFont(None, 48)
-    font_button = pygame.font.SysFont(None, 36)
-
-    # 生成 30 种静态背景
-    static_backgrounds = generate_static_backgrounds()
-
-    # 尝试加载存档记录
-    record = load_game_record()
-    if record:
-        coin_count = record.get("coin_count", 1000)
-        purchased_skins = record.get("purchased_skins", [False] * len(SKIN_COLORS))
-        selected_skin = record.get("selected_skin", 1)
-        purchased_heads = record.get("purchased_heads", [False] * len(HEAD_ITEMS))
-        selected_head = record.get("selected_head", -1)
-        global reputation_level, reputation_upgrade_cost
-        reputation_level = record.get("reputation_level", 0)
-        reputation_upgrade_cost = record.get("reputation_upgrade_cost", 50)
-    else:
-        coin_count = 1000
-        purchased_skins = [False] * len(SKIN_COLORS)
-        purchased_skins[1] = True
-        selected_skin = 1
-        purchased_heads = [False] * len(HEAD_ITEMS)
-        selected_head = -1
+    font_title  = get_font(48)
+    font_button = get_font(36)
+
+    # 背景在菜单第一次显示时才生成
+    menu_backgrounds = MenuBackgrounds()
+
+    # 加载存档记录（旧格式的存档升级后重写，缺失或不合法的字段换成默认值）
+    session, outdated = load_game_record()
+    if outdated:
+        autosave.update(session.to_record())
 
     state = "MENU"
     while True:
         if state == "MENU":
-            state, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head = menu_loop(
-                screen, clock, font_title, font_button, game_start_sound,
-                coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-            )
+            state = menu_loop(screen, clock, font_title, font_button, session)
         elif state == "SKINS":
-            state, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head = skins_loop(
-                screen, clock, font_button, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-            )
+            state = skins_loop(screen, clock, font_button, session)
         elif state == "SNAKE":
-            state, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head = game_loop(
-                screen, clock, apple_eat_sound, collision_sound,
-                coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-            )
+            state = game_loop(screen, clock, session)
         elif state == "APPLE":
-            state, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head = game_loop_apple(
-                screen, clock, apple_eat_sound, collision_sound,
-                coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-            )
+            state = game_loop_apple(screen, clock, session)
         elif state == "2PLAYERS":
-            state, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head = game_loop_2players(
-                screen, clock, apple_eat_sound, collision_sound, snake_eaten_sound,
-                coin_count, purchased_skins, selected_skin, purchased_heads, selected_head
-            )
+            state = game_loop_2players(screen, clock, session)
+        elif state == "ARENA":
+            state = game_loop_arena(screen, clock, session)
+        # 切换界面时把这一段里的改动交给自动存档（没有改动时不写）
+        save_game_record(session)
 
 if __name__ == "__main__":
     main()
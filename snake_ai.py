@@ -0,0 +1,245 @@
+"""
+蛇的寻路 AI：在占用网格上用 BFS 找到通往苹果的最短路径并缓存，
+之后每帧只沿缓存路径走一步，只有苹果离开路径或路径被挡住时才重新搜索。
+吃完苹果后若够不着自己的尾巴（可能被困死），就不去吃；找不到安全的路时追着自己的尾巴走
+以求生存，再不行就走向可活动空间最大的一侧。
+
+PathfindingController 的调用方式与 get_snake_direction 相同，可直接作为 SnakeWorld 的 snake_ai；
+ArenaBot 让这样的 AI 在 Arena 模式中控制一条蛇。
+"""
+from collections import deque
+from types import SimpleNamespace
+from snake_world import UP, DOWN, LEFT, RIGHT, EMPTY, get_snake_direction, mask_indices, move
+
+# 苹果每帧最多移动一格：沿用旧路径再补一步最多补这么多次，之后重新搜索以免路径越绕越远
+MAX_EXTENSIONS = 8
+# 路径剩下不超过这么多格时，每次修补都重新做一次“吃完还能够到尾巴”的检查
+SAFETY_HORIZON = 4
+
+def bfs_path(grid, start, goal, max_expansions=None):
+    """
+    在 grid 上从格子编号 start 出发做 BFS，只经过空格（goal 本身可以被占用），
+    返回到 goal 的路径（格子编号列表，不含 start）；到不了或展开格子数超过
+    max_expansions 时返回 None。
+    """
+    w = grid.width
+    size = w * grid.height
+    cells = grid.cells
+    parent = {start: -1}
+    queue = deque([start])
+    expanded = 0
+    while queue:
+        cur = queue.popleft()
+        expanded += 1
+        if max_expansions is not None and expanded > max_expansions:
+            return None
+        x = cur % w
+        for nxt in (cur - w, cur + w, cur - 1 if x > 0 else -1, cur + 1 if x < w - 1 else -1):
+            if nxt < 0 or nxt >= size or nxt in parent:
+                continue
+            if nxt == goal:
+                path = [nxt]
+                while cur != start:
+                    path.append(cur)
+                    cur = parent[cur]
+                path.reverse()
+                return path
+            if cells[nxt] != EMPTY:
+                continue
+            parent[nxt] = cur
+            queue.append(nxt)
+    return None
+
+def flood_fill(grid, start, limit):
+    """从空格 start 出发能到达的空格集合（最多收集 limit 个）。"""
+    w = grid.width
+    size = w * grid.height
+    cells = grid.cells
+    seen = {start}
+    stack = [start]
+    while stack and len(seen) < limit:
+        cur = stack.pop()
+        x = cur % w
+        for nxt in (cur - w, cur + w, cur - 1 if x > 0 else -1, cur + 1 if x < w - 1 else -1):
+            if 0 <= nxt < size and nxt not in seen and cells[nxt] == EMPTY:
+                seen.add(nxt)
+                stack.append(nxt)
+    return seen
+
+def tail_reachable_after(snake_coords, path, grid, max_expansions=None):
+    """
+    假设蛇沿 path 走到终点并吃到苹果（身体长一节），此时蛇头是否还能走到蛇尾。
+    在占用网格的副本上模拟身体的变化，耗时 O(棋盘面积)。
+    """
+    w = grid.width
+    body = [y * w + x for x, y in reversed(snake_coords)] + list(path)  # 从蛇尾到蛇头
+    length = len(snake_coords) + 1
+    cells = bytearray(grid.cells)
+    for i in path:
+        cells[i] += 1
+    for i in body[:-length]:
+        cells[i] -= 1
+    virtual = SimpleNamespace(width=w, height=grid.height, cells=cells)
+    tail_path = bfs_path(virtual, body[-1], body[-length], max_expansions)
+    # 尾巴就在旁边时不能直接咬上去（移动前尾巴还在原地）
+    return tail_path is not None and len(tail_path) >= 2
+
+class PathfindingController:
+    """
+    带路径缓存的寻路控制器，每个控制器只控制一条蛇。
+    max_expansions 限制单次搜索展开的格子数，使大棋盘上每帧的最坏耗时也有上界；
+    None 表示不限制（50x40 棋盘上一次完整搜索约 2000 格）。
+    """
+
+    def __init__(self, max_expansions=None):
+        self.max_expansions = max_expansions
+        self.path = deque()  # 尚未走的格子编号，最后一个是苹果
+        self.head = None     # 缓存路径所对应的蛇头格子
+        self.target = None   # 缓存路径所对应的苹果格子
+        self.extensions = 0
+        self.searches = 0    # 累计搜索次数，便于统计缓存命中率
+
+    def __call__(self, snake_coords, apple, grid):
+        w = grid.width
+        head = snake_coords[0][1] * w + snake_coords[0][0]
+        goal = apple[1] * w + apple[0]
+        if not self._follow(snake_coords, head, goal, grid):
+            self._plan(snake_coords, head, goal, grid)
+        if len(self.path) == 1 and not tail_reachable_after(snake_coords, self.path, grid, self.max_expansions):
+            # 苹果被追进了死角：下一步就能吃到，但吃完会被困住
+            self.path.clear()
+        if self.path and grid.cells[self.path[0]] == EMPTY:
+            nxt = self.path.popleft()
+            self.head = nxt
+            return _direction(head, nxt, w)
+        self.path.clear()
+        return self._survive(snake_coords, head, grid)
+
+    def _follow(self, snake_coords, head, goal, grid):
+        """缓存路径是否还能用；苹果只移动了一格时就地修补路径。"""
+        path = self.path
+        if not path or head != self.head or grid.cells[path[0]] != EMPTY:
+            return False
+        if goal == self.target:
+            return True
+        w = grid.width
+        step = abs(goal - self.target)
+        if not (step == w or (step == 1 and goal // w == self.target // w)):
+            return False
+        if len(path) >= 2 and path[-2] == goal:
+            # 苹果迎着蛇走了一格
+            path.pop()
+        elif grid.cells[goal] == EMPTY and self.extensions < MAX_EXTENSIONS:
+            path.append(goal)
+            self.extensions += 1
+        else:
+            return False
+        self.target = goal
+        if len(path) <= SAFETY_HORIZON and not tail_reachable_after(snake_coords, path, grid, self.max_expansions):
+            return False
+        return True
+
+    def _plan(self, snake_coords, head, goal, grid):
+        self.searches += 1
+        self.path.clear()
+        self.extensions = 0
+        self.head = head
+        self.target = goal
+        if grid.cells[goal] != EMPTY:
+            return
+        path = bfs_path(grid, head, goal, self.max_expansions)
+        if path and tail_reachable_after(snake_coords, path, grid, self.max_expansions):
+            self.path.extend(path)
+
+    def _survive(self, snake_coords, head, grid):
+        """去不了苹果时：先追着尾巴走，否则走向可活动空间最大的相邻空格。"""
+        w = grid.width
+        if len(snake_coords) > 2:
+            tail_x, tail_y = snake_coords[-1]
+            path = bfs_path(grid, head, tail_y * w + tail_x, self.max_expansions)
+            # 尾巴就在旁边时不能直接咬上去（移动前尾巴还在原地）
+            if path and len(path) >= 2:
+                return _direction(head, path[0], w)
+        best = None
+        best_area = 0
+        # 只需分辨哪一侧装得下整条蛇，数到蛇长的两倍就够了
+        limit = 2 * len(snake_coords) + 8
+        if self.max_expansions is not None:
+            limit = min(limit, self.max_expansions)
+        region = set()  # 已经数过的连通区域，相邻格子同属一个区域时不必再数
+        x = head % w
+        for nxt in (head - w, head + w, head - 1 if x > 0 else -1, head + 1 if x < w - 1 else -1):
+            if 0 <= nxt < len(grid.cells) and grid.cells[nxt] == EMPTY and nxt not in region:
+                region = flood_fill(grid, nxt, limit)
+                if len(region) > best_area:
+                    best, best_area = nxt, len(region)
+        return None if best is None else _direction(head, best, w)
+
+def _direction(src, dst, width):
+    diff = dst - src
+    if diff == 1:
+        return RIGHT
+    if diff == -1:
+        return LEFT
+    return DOWN if diff == width else UP
+
+# --------------------- Arena 机器人 ---------------------
+PATIENCE = 20
+class ArenaBot:
+    """
+    Arena 模式中一条蛇的控制器，签名与 snake_headless 中的控制器相同：bot(world, index) -> 方向或 None。
+    盯住离蛇头最近的一个苹果，只在它被吃掉、上一帧蛇头没动（被迎头相撞挡住）、
+    或超过 2 倍距离加 PATIENCE 帧还没吃到（贪心的 ai 被障碍和自己的身体困住绕圈）时才重新挑选
+    （遍历一次 world.apples，平摊到每帧约为 O(1)），每帧交给 ai 决定方向；
+    ai 的调用方式与 get_snake_direction 相同，默认就是 get_snake_direction。
+    ai 选的格子下一帧可能被别的蛇头抢到时（与别的蛇头相邻），改走一个没有这种危险的空格。
+    大棋盘上用 PathfindingController 时应给出 max_expansions，限制每帧的最坏耗时。
+    """
+
+    def __init__(self, ai=None):
+        self.ai = ai or get_snake_direction
+        self.target = None
+        self.last_head = None
+        self.deadline = 0  # 到这一帧还没吃到 target 就换一个
+
+    def __call__(self, world, index):
+        snake = world.snakes[index]
+        if not snake:
+            return None  # 已被淘汰
+        head = snake[0]
+        stuck = head == self.last_head
+        self.last_head = head
+        late = world.tick >= self.deadline
+        if stuck or late or self.target not in world.apples:
+            # 被挡住或绕不过去时换一个苹果，不再朝同一个方向和对方顶牛、原地兜圈子
+            exclude = self.target if stuck or late else None
+            hx, hy = head
+            self.target = min((a for a in world.apples if a != exclude),
+                              key=lambda a: abs(a[0] - hx) + abs(a[1] - hy), default=None)
+            if self.target is None:
+                return None
+            self.deadline = world.tick + 2 * _distance(head, *self.target) + PATIENCE
+        direction = self.ai(snake, self.target, world.grid)
+        if direction is None or not _contested(world, index, move(head, direction)):
+            return direction
+        tx, ty = self.target
+        for d in sorted((UP, DOWN, LEFT, RIGHT), key=lambda d: _distance(move(head, d), tx, ty)):
+            cell = move(head, d)
+            if world.in_bounds(cell) and world.grid.is_free(cell[0], cell[1]) and not _contested(world, index, cell):
+                return d
+        return direction
+
+def _contested(world, index, cell):
+    """除第 index 条以外，是否有别的蛇头与 cell 相邻（下一帧可能也走进 cell，迎头相撞）。"""
+    owners = world.owners
+    for d in (UP, DOWN, LEFT, RIGHT):
+        x, y = move(cell, d)
+        if not world.in_bounds((x, y)):
+            continue
+        mask = owners.mask(x, y) & ~(1 << index)
+        if mask and any(world.snakes[j][0] == (x, y) for j in mask_indices(mask)):
+            return True
+    return False
+
+def _distance(cell, x, y):
+    return abs(cell[0] - x) + abs(cell[1] - y)
@@ -0,0 +1,130 @@
+"""
+音效：游戏里所有声音都经过一个 AudioManager 播放。
+
+    audio = open_audio()                  # 没有声卡或 pygame.mixer 初始化失败时得到 NullAudio
+    audio.load(SOUND_FILES)               # 在后台线程里解码，立即返回
+    audio.play("eat")
+    audio.toggle_mute()
+
+每种声音占用几个预留的声道（个数见 SOUND_FILES），同一种声音连续播放时轮流使用，
+连吃两个苹果时第二声不会把第一声截断，其他声音也抢不走这些声道。
+静音和音量作用在所有预留声道上（总线），不必逐个 Sound 调用 set_volume。
+无界面运行和模拟用 NullAudio：接口相同，所有方法什么也不做。
+"""
+import threading
+
+# 声音名 -> (文件, 预留的声道数)
+SOUND_FILES = {
+    "start": ("game_start.wav", 1),
+    "eat": ("eat_apple.wav", 3),
+    "over": ("game_over.wav", 1),
+    "eaten": ("snake_eaten.wav", 2),
+}
+
+class NullAudio:
+    """不出声的音效后端，接口与 AudioManager 相同。"""
+    muted = False
+    volume = 1.0
+
+    def load(self, sounds, wait=False):
+        pass
+
+    def play(self, name):
+        pass
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def set_muted(self, muted):
+        self.muted = muted
+
+    def toggle_mute(self):
+        self.set_muted(not self.muted)
+
+class AudioManager:
+    """用 pygame.mixer 播放音效；调用前 pygame.mixer 必须已初始化。"""
+
+    def __init__(self, muted=False, volume=1.0):
+        import pygame
+        self.pygame = pygame
+        self.sounds = {}     # 已解码的声音
+        self.channels = {}   # 声音名 -> 预留给它的声道列表
+        self.next_channel = {}
+        self.loader = None
+        self.muted = muted
+        self.volume = volume
+
+    def load(self, sounds, wait=False):
+        """
+        sounds 为 {名字: (文件, 声道数)}。先分配声道，再在后台线程里解码文件；
+        解码完成之前 play() 这个声音会被跳过。wait=True 时等解码完再返回。
+        """
+        mixer = self.pygame.mixer
+        reserved = sum(count for _, count in sounds.values())
+        if mixer.get_num_channels() < reserved:
+            mixer.set_num_channels(reserved)
+        mixer.set_reserved(reserved)
+        first = 0
+        for name, (_, count) in sounds.items():
+            self.channels[name] = [mixer.Channel(first + i) for i in range(count)]
+            self.next_channel[name] = 0
+            first += count
+        self._apply_volume()
+        self.loader = threading.Thread(target=self._decode, args=(sounds,), name="audio-loader", daemon=True)
+        self.loader.start()
+        if wait:
+            self.loader.join()
+
+    def _decode(self, sounds):
+        for name, (path, _) in sounds.items():
+            try:
+                self.sounds[name] = self.pygame.mixer.Sound(path)
+            except (self.pygame.error, FileNotFoundError) as e:
+                print(f"could not load sound {path}: {e}")
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None or self.muted:
+            return
+        channels = self.channels[name]
+        # 优先用空闲的声道；都在响时轮流换掉其中一个
+        for channel in channels:
+            if not channel.get_busy():
+                break
+        else:
+            i = self.next_channel[name]
+            channel = channels[i]
+            self.next_channel[name] = (i + 1) % len(channels)
+        channel.play(sound)
+        channel.set_volume(self.volume)
+
+    def set_volume(self, volume):
+        self.volume = volume
+        self._apply_volume()
+
+    def set_muted(self, muted):
+        self.muted = muted
+        self._apply_volume()
+
+    def toggle_mute(self):
+        self.set_muted(not self.muted)
+
+    def _apply_volume(self):
+        volume = 0.0 if self.muted else self.volume
+        for channels in self.channels.values():
+            for channel in channels:
+                channel.set_volume(volume)
+
+def open_audio(muted=False, volume=1.0):
+    """初始化 pygame.mixer 并返回 AudioManager；没有可用的音频设备时返回 NullAudio。"""
+    try:
+        import pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+    except (ImportError, RuntimeError) as e:  # pygame.error 继承自 RuntimeError
+        print(f"audio disabled: {e}")
+        audio = NullAudio()
+        audio.set_muted(muted)
+        audio.set_volume(volume)
+        return audio
+    return AudioManager(muted, volume)
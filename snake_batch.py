@@ -0,0 +1,265 @@
+"""
+NumPy 批量模拟：把 B 局互相独立的 Snake / Apple 模式游戏放在同一组数组里，
+一次向量化的 step() 推进所有棋盘，用于大规模评估机器人。
+
+规则与 SnakeWorld 相同：障碍只阻挡不致死，撞墙或撞到自己则结束，每个苹果 +10 金币，
+Snake 模式下苹果每帧有 50% 几率随机移动一格；Apple 模式下蛇由向量化的
+get_snake_direction 控制。
+
+本模块需要 numpy，游戏本身不依赖它。
+"""
+import numpy as np
+from snake_world import (
+    CELL_WIDTH, CELL_HEIGHT, MODE_SNAKE, MODE_APPLE, UP, DOWN, LEFT, RIGHT,
+    DEATH_WALL, DEATH_BODY, BOARD_FULL,
+)
+
+# 动作编号即 DIRECTIONS 的下标，-1 表示保持原方向
+DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
+DX = np.array([0, 0, -1, 1])
+DY = np.array([-1, 1, 0, 0])
+ACTION_UP, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT = range(4)
+
+# 网格取值
+FREE = 0
+BODY = 1
+BLOCK = 2
+
+# 结束原因编号，END_CAUSES[编号] 为 SnakeWorld 中对应的原因
+ALIVE = 0
+END_WALL = 1
+END_BODY = 2
+END_BOARD_FULL = 3
+END_CAUSES = [None, DEATH_WALL, DEATH_BODY, BOARD_FULL]
+
+class BatchSnakeWorld:
+    """
+    B 块棋盘的批量模拟。每块棋盘的状态都是数组中的一行：
+      - grid：(B, W*H) 占用网格，取值 FREE / BODY / BLOCK
+      - body、head_slot、length：蛇身的环形缓冲区（格子编号 y*W+x，蛇头在 head_slot）
+      - direction：Snake 模式下为蛇的方向，Apple 模式下为苹果的方向
+      - apple、coins、ticks、end_cause
+    所有随机数来自同一个 numpy Generator，因此相同的 seed 和动作序列得到相同结果。
+    """
+
+    def __init__(self, batch_size, mode=MODE_SNAKE, width=CELL_WIDTH, height=CELL_HEIGHT, seed=None):
+        if mode not in (MODE_SNAKE, MODE_APPLE):
+            raise ValueError(f"batched mode must be {MODE_SNAKE} or {MODE_APPLE}, not {mode!r}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        size = width * height
+        self.grid = np.zeros((batch_size, size), np.uint8)
+        self.body = np.zeros((batch_size, size), np.int32)
+        self.head_slot = np.zeros(batch_size, np.int64)
+        self.length = np.zeros(batch_size, np.int64)
+        self.direction = np.zeros(batch_size, np.int8)
+        self.apple = np.zeros(batch_size, np.int64)
+        self.coins = np.zeros(batch_size, np.int64)
+        self.ticks = np.zeros(batch_size, np.int64)
+        self.end_cause = np.zeros(batch_size, np.int8)
+        self.reset()
+
+    @property
+    def alive(self):
+        return self.end_cause == ALIVE
+
+    def snake_cells(self, b):
+        """第 b 块棋盘上的蛇，返回 (x, y) 列表（蛇头在前），便于绘制和调试。"""
+        size = self.width * self.height
+        slots = (self.head_slot[b] - np.arange(self.length[b])) % size
+        return [(int(c) % self.width, int(c) // self.width) for c in self.body[b, slots]]
+
+    # --------------------- 开局 ---------------------
+    def reset(self, mask=None):
+        """重新开始 mask 选中的棋盘（默认全部），例如 reset(~world.alive) 只重开已结束的局。"""
+        idx = np.arange(self.batch_size) if mask is None else np.flatnonzero(mask)
+        if not idx.size:
+            return
+        w = self.width
+        self.grid[idx] = FREE
+        self._create_obstacles(idx)
+        start = np.array([5 * w + 1, 5 * w + 2, 5 * w + 3])  # (1,5) (2,5) (3,5)，从蛇尾到蛇头
+        self.body[idx, :3] = start
+        self.grid[idx[:, None], start] = BODY
+        self.head_slot[idx] = 2
+        self.length[idx] = 3
+        self.direction[idx] = ACTION_RIGHT
+        self.coins[idx] = 0
+        self.ticks[idx] = 0
+        self.end_cause[idx] = ALIVE
+        self._spawn_apples(idx)
+
+    def _create_obstacles(self, idx):
+        """与 create_obstacles 相同的分布：30 段长度 1~2 的障碍，起点不在左上角 10x10 安全区。"""
+        w, h = self.width, self.height
+        shape = (idx.size, 30)
+        xs = self.rng.integers(0, w, shape)
+        ys = self.rng.integers(0, h, shape)
+        bad = (xs < 10) & (ys < 10)
+        while bad.any():
+            xs[bad] = self.rng.integers(0, w, bad.sum())
+            ys[bad] = self.rng.integers(0, h, bad.sum())
+            bad = (xs < 10) & (ys < 10)
+        horizontal = self.rng.random(shape) < 0.5
+        seg_len = self.rng.integers(1, 3, shape)
+        rows = np.broadcast_to(idx[:, None], shape)
+        self.grid[rows, ys * w + xs] = BLOCK
+        x2 = xs + horizontal
+        y2 = ys + ~horizontal
+        second = (seg_len == 2) & (x2 < w) & (y2 < h)
+        self.grid[rows[second], (y2 * w + x2)[second]] = BLOCK
+
+    def _spawn_apples(self, idx):
+        """在 idx 棋盘的空格上均匀放置新苹果；没有空格的棋盘以 END_BOARD_FULL 结束。"""
+        size = self.width * self.height
+        pending = idx
+        # 先做几轮向量化的拒绝采样，剩下的（棋盘几乎占满）逐块精确抽取
+        for _ in range(16):
+            if not pending.size:
+                return
+            cand = self.rng.integers(0, size, pending.size)
+            ok = self.grid[pending, cand] == FREE
+            self.apple[pending[ok]] = cand[ok]
+            pending = pending[~ok]
+        for b in pending:
+            free = np.flatnonzero(self.grid[b] == FREE)
+            if free.size:
+                self.apple[b] = free[self.rng.integers(free.size)]
+            else:
+                self.apple[b] = -1
+                self.end_cause[b] = END_BOARD_FULL
+
+    # --------------------- 推进 ---------------------
+    def step(self, actions=None):
+        """
+        所有未结束的棋盘推进一帧。actions 为长度 B 的动作编号数组（-1 表示保持原方向）。
+        返回 (eaten, ended) 两个布尔数组：本帧吃到苹果的棋盘、本帧结束的棋盘。
+        """
+        was_alive = self.alive
+        idx = np.flatnonzero(was_alive)
+        if actions is not None:
+            actions = np.asarray(actions)
+            change = was_alive & (actions >= 0)
+            self.direction[change] = actions[change]
+        self.ticks[idx] += 1
+        eaten = np.zeros(self.batch_size, bool)
+        if self.mode == MODE_SNAKE:
+            eaten[self._step_snake(idx)] = True
+        else:
+            eaten[self._step_apple(idx)] = True
+        return eaten, was_alive & ~self.alive
+
+    def _in_bounds(self, x, y):
+        return (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+
+    def _advance(self, idx, new):
+        """idx 棋盘的蛇头移到空格 new：吃到苹果则变长并 +10 金币，否则弹出蛇尾。返回吃到苹果的棋盘。"""
+        size = self.width * self.height
+        slot = (self.head_slot[idx] + 1) % size
+        self.body[idx, slot] = new
+        self.head_slot[idx] = slot
+        self.grid[idx, new] = BODY
+        eat = new == self.apple[idx]
+        grow = idx[eat]
+        self.length[grow] += 1
+        self.coins[grow] += 10
+        keep = idx[~eat]
+        tail_slot = (self.head_slot[keep] - self.length[keep]) % size
+        self.grid[keep, self.body[keep, tail_slot]] = FREE
+        self._spawn_apples(grow)
+        return grow
+
+    def _step_snake(self, idx):
+        w = self.width
+        head = self.body[idx, self.head_slot[idx]]
+        d = self.direction[idx]
+        nx = head % w + DX[d]
+        ny = head // w + DY[d]
+        out = ~self._in_bounds(nx, ny)
+        self.end_cause[idx[out]] = END_WALL
+        idx, nx, ny = idx[~out], nx[~out], ny[~out]
+
+        new = ny * w + nx
+        cell = self.grid[idx, new]
+        hit = cell == BODY
+        self.end_cause[idx[hit]] = END_BODY
+        # 碰到障碍的棋盘停在原地
+        moving = cell == FREE
+        grow = self._advance(idx[moving], new[moving])
+        survivors = idx[~hit]
+        self._wander_apples(survivors[self.end_cause[survivors] == ALIVE])
+        return grow
+
+    def _wander_apples(self, idx):
+        """与 update_apple_position 相同：50% 几率按随机顺序尝试四个方向，移到第一个空格。"""
+        w = self.width
+        go = idx[self.rng.random(idx.size) < 0.5]
+        if not go.size:
+            return
+        order = self.rng.permuted(np.tile(np.arange(4), (go.size, 1)), axis=1)
+        ax = self.apple[go] % w
+        ay = self.apple[go] // w
+        moved = np.zeros(go.size, bool)
+        for k in range(4):
+            nx = ax + DX[order[:, k]]
+            ny = ay + DY[order[:, k]]
+            ok = ~moved & self._in_bounds(nx, ny)
+            cells = np.where(ok, ny * w + nx, 0)
+            ok &= self.grid[go, cells] == FREE
+            self.apple[go[ok]] = cells[ok]
+            moved |= ok
+
+    def _step_apple(self, idx):
+        w = self.width
+        # 玩家控制的苹果：不能出界或穿过障碍
+        d = self.direction[idx]
+        nx = self.apple[idx] % w + DX[d]
+        ny = self.apple[idx] // w + DY[d]
+        ok = self._in_bounds(nx, ny)
+        cells = np.where(ok, ny * w + nx, 0)
+        ok &= self.grid[idx, cells] != BLOCK
+        self.apple[idx[ok]] = cells[ok]
+
+        choice, has_move = self._greedy_directions(idx)
+        idx, choice = idx[has_move], choice[has_move]
+        head = self.body[idx, self.head_slot[idx]]
+        new = (head // w + DY[choice]) * w + head % w + DX[choice]
+        return self._advance(idx, new)
+
+    def _greedy_directions(self, idx):
+        """
+        向量化的 get_snake_direction：优先沿距离较大的轴靠近苹果，其次另一轴，
+        再按 UP、DOWN、LEFT、RIGHT 的顺序，取第一个可进入的方向。
+        返回 (方向编号, 是否有可走方向)。
+        """
+        w = self.width
+        n = idx.size
+        rows = np.arange(n)
+        head = self.body[idx, self.head_slot[idx]]
+        hx, hy = head % w, head // w
+        dx = self.apple[idx] % w - hx
+        dy = self.apple[idx] // w - hy
+        x_dir = np.where(dx > 0, ACTION_RIGHT, np.where(dx < 0, ACTION_LEFT, -1))
+        y_dir = np.where(dy > 0, ACTION_DOWN, np.where(dy < 0, ACTION_UP, -1))
+        x_first = np.abs(dx) >= np.abs(dy)
+        primary = np.where(x_first, x_dir, y_dir)
+        secondary = np.where(x_first, y_dir, x_dir)
+
+        rank = np.tile(np.arange(2, 6), (n, 1))
+        has = secondary >= 0
+        rank[rows[has], secondary[has]] = 1
+        has = primary >= 0
+        rank[rows[has], primary[has]] = 0
+
+        valid = np.zeros((n, 4), bool)
+        for k in range(4):
+            nx = hx + DX[k]
+            ny = hy + DY[k]
+            ok = self._in_bounds(nx, ny)
+            cells = np.where(ok, ny * w + nx, 0)
+            valid[:, k] = ok & (self.grid[idx, cells] == FREE)
+        choice = np.argmin(np.where(valid, rank, 99), axis=1)
+        return choice, valid.any(axis=1)
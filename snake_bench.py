@@ -0,0 +1,404 @@
+"""
+模拟核心与绘制的性能基准（不需要显示器，绘制基准使用 SDL 的 dummy 视频驱动）。
+
+    python snake_bench.py tick      # 不同蛇长下 SnakeWorld.step() 的单帧耗时
+    python snake_bench.py batch     # BatchSnakeWorld 与逐局 SnakeWorld 的吞吐量对比（需要 numpy）
+    python snake_bench.py ai        # Apple 模式下贪心 AI 与寻路 AI 的成绩和每帧耗时
+    python snake_bench.py render    # 不同蛇长下整屏重画与增量绘制的单帧耗时（需要 pygame）
+    python snake_bench.py background  # 每帧重画棋盘和障碍与 blit 缓存背景的耗时（需要 pygame）
+    python snake_bench.py menu      # 主菜单无人操作时的 CPU 占用，与原来每秒重画 15 帧的循环对比（需要 pygame）
+    python snake_bench.py arena     # 不同棋盘大小下 Arena 模式每帧的模拟、机器人和镜头绘制耗时（需要 pygame）
+    python snake_bench.py arena-end # 检查全由机器人参加的 Arena 对局都能在限定帧数内分出胜负，否则以状态 1 退出
+"""
+import argparse, os, random, time
+from collections import deque
+from snake_world import (
+    SnakeWorld, MODE_SNAKE, MODE_APPLE, MODE_ARENA, UP, DOWN, LEFT, RIGHT, CELL_WIDTH, CELL_HEIGHT,
+    EVENT_APPLE_EATEN, get_random_location, get_snake_direction,
+)
+from snake_ai import PathfindingController, ArenaBot
+
+# --------------------- 哈密顿回路 ---------------------
+def hamiltonian_cycle(width, height):
+    """
+    返回覆盖整个棋盘的一条回路（坐标列表），要求 height 为偶数：
+    在第 1~width-1 列之间蛇形往返，再沿第 0 列回到起点。
+    蛇沿着回路走永远不会撞到自己，适合测量很长的蛇。
+    """
+    cycle = []
+    for y in range(height):
+        xs = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((0, y) for y in range(height - 1, -1, -1))
+    return cycle
+
+def _direction(a, b):
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    if dx == 1:
+        return RIGHT
+    if dx == -1:
+        return LEFT
+    return DOWN if dy == 1 else UP
+
+def make_cycle_world(length, width=CELL_WIDTH, height=CELL_HEIGHT):
+    """构造一个没有障碍、蛇长为 length 且正沿回路前进的 Snake 模式世界，并返回 (world, 回路方向表)。"""
+    cycle = hamiltonian_cycle(width, height)
+    next_dir = {}
+    for i, cell in enumerate(cycle):
+        next_dir[cell] = _direction(cell, cycle[(i + 1) % len(cycle)])
+    world = SnakeWorld(MODE_SNAKE, width, height)
+    world.obstacles = []
+    # 蛇头在回路第 length-1 格，身体沿回路向后排列
+    world.snakes[0] = deque(cycle[i] for i in range(length - 1, -1, -1))
+    world.rebuild_grid()
+    world.apple = get_random_location(world.grid, world.rng)
+    return world, next_dir
+
+# --------------------- 基准 ---------------------
+def bench_tick(lengths, ticks):
+    """对每个蛇长推进 ticks 帧，返回 [(蛇长, 每帧微秒数), ...]。"""
+    results = []
+    for length in lengths:
+        random.seed(length)
+        elapsed = 0.0
+        done = 0
+        while done < ticks:
+            # 蛇吃苹果会变长，长出 50 节后换一个新世界，保证测量的始终是这个长度附近
+            world, next_dir = make_cycle_world(length)
+            start = time.perf_counter()
+            while done < ticks and len(world.snake) < length + 50:
+                world.step([next_dir[world.snake[0]]])
+                done += 1
+                if world.game_over:
+                    raise RuntimeError(f"snake of length {length} died during the benchmark")
+            elapsed += time.perf_counter() - start
+        results.append((length, elapsed / ticks * 1e6))
+    return results
+
+def bench_batch(mode, boards, ticks):
+    """
+    同样的总帧数（boards * ticks），分别用逐局 SnakeWorld 循环和 BatchSnakeWorld 推进，
+    动作随机、结束的局立即重开。返回 (逐局每秒帧数, 批量每秒帧数)。
+    """
+    from snake_batch import BatchSnakeWorld, DIRECTIONS
+    import numpy as np
+
+    total = boards * ticks
+    random.seed(0)
+    world = SnakeWorld(mode)
+    start = time.perf_counter()
+    for _ in range(total):
+        if world.game_over:
+            world.reset()
+        world.step([random.choice(DIRECTIONS) if random.random() < 0.2 else None])
+    scalar = total / (time.perf_counter() - start)
+
+    batch = BatchSnakeWorld(boards, mode, seed=0)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        actions = np.where(rng.random(boards) < 0.2, rng.integers(0, 4, boards), -1)
+        _, ended = batch.step(actions)
+        if ended.any():
+            batch.reset(ended)
+    batched = total / (time.perf_counter() - start)
+    return scalar, batched
+
+def bench_ai(ticks, seed):
+    """
+    Apple 模式中苹果随机游走，分别用贪心 AI 和寻路 AI 控制蛇推进 ticks 帧。
+    返回 {名称: (吃到的苹果数, 局数, 平均每帧 AI 微秒数, 最坏每帧 AI 微秒数)}。
+    """
+    results = {}
+    for name, make_ai in (("greedy", lambda: get_snake_direction), ("path", PathfindingController)):
+        random.seed(seed)
+        timings = []
+        ai = make_ai()
+
+        def timed_ai(snake_coords, apple, grid):
+            start = time.perf_counter()
+            direction = ai(snake_coords, apple, grid)
+            timings.append(time.perf_counter() - start)
+            return direction
+
+        world = SnakeWorld(MODE_APPLE, snake_ai=timed_ai)
+        apples = 0
+        games = 1
+        for _ in range(ticks):
+            if world.game_over:
+                world.reset()
+                games += 1
+            action = random.choice([UP, DOWN, LEFT, RIGHT]) if random.random() < 0.1 else None
+            for kind, _ in world.step([action]):
+                if kind == EVENT_APPLE_EATEN:
+                    apples += 1
+        mean = sum(timings) / len(timings) * 1e6
+        results[name] = (apples, games, mean, max(timings) * 1e6)
+    return results
+
+def bench_render(lengths, frames):
+    """
+    对每个蛇长分别整屏重画和用 BoardRenderer 增量绘制 frames 帧（都包括 display.update），
+    返回 [(蛇长, 整屏每帧微秒数, 增量每帧微秒数), ...]。
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from snake_render import BoardRenderer, CELL_SIZE, get_font
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((CELL_WIDTH * CELL_SIZE, CELL_HEIGHT * CELL_SIZE))
+    renderer = BoardRenderer(screen, get_font(24))
+    skins = [((0, 255, 0), (255, 165, 0))]
+    results = []
+    for length in lengths:
+        timings = {}
+        for incremental in (False, True):
+            random.seed(length)
+            elapsed = 0.0
+            done = 0
+            while done < frames:
+                world, next_dir = make_cycle_world(length)
+                renderer.invalidate()
+                while done < frames and len(world.snake) < length + 50:
+                    world.step([next_dir[world.snake[0]]])
+                    start = time.perf_counter()
+                    if not incremental:
+                        renderer.invalidate()
+                    pygame.display.update(renderer.draw(world, skins))
+                    elapsed += time.perf_counter() - start
+                    done += 1
+            timings[incremental] = elapsed / frames * 1e6
+        results.append((length, timings[False], timings[True]))
+    pygame.quit()
+    return results
+
+def bench_background(frames, seed):
+    """
+    默认棋盘上，每帧填黑再画全部障碍与 blit 一次缓存背景的耗时对比。
+    返回 (障碍格数, 重画每帧微秒数, 缓存每帧微秒数)。
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from snake_render import CELL_SIZE, BLACK, draw_obstacles
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((CELL_WIDTH * CELL_SIZE, CELL_HEIGHT * CELL_SIZE))
+    random.seed(seed)
+    world = SnakeWorld(MODE_SNAKE)
+    background = pygame.Surface(screen.get_size()).convert(screen)
+    background.fill(BLACK)
+    draw_obstacles(background, world.obstacles)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.fill(BLACK)
+        draw_obstacles(screen, world.obstacles)
+    drawn = (time.perf_counter() - start) / frames * 1e6
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.blit(background, (0, 0))
+    cached = (time.perf_counter() - start) / frames * 1e6
+    pygame.quit()
+    return len(world.obstacles), drawn, cached
+
+MENU_POLL_FPS = 15  # 改成事件驱动之前，主菜单每秒整屏重画的帧数
+
+def polling_menu_loop(screen, clock, font_title, font_button, session):
+    """
+    改成事件驱动之前的主菜单循环，只用作对比的基准：不管有没有输入，每帧都重新合成整个菜单、
+    整屏 update，再 clock.tick(MENU_POLL_FPS)。收到 QUIT 时与 menu_loop 一样抛出 SystemExit。
+    """
+    import pygame
+    import game1_snake as game
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                raise SystemExit
+        layer, _ = game.compose_menu_layer(font_title, font_button, session.reputation_level,
+                                           session.reputation_upgrade_cost)
+        screen.blit(layer, (0, 0))
+        coin_text = game.render_text(font_button, f"Coins: {session.coin_count}", game.GOLD)
+        screen.blit(coin_text, coin_text.get_rect(topright=(game.WINDOW_WIDTH - 20, 20)))
+        pygame.display.update()
+        clock.tick(MENU_POLL_FPS)
+
+def bench_menu(seconds, polling=False):
+    """
+    主菜单无人操作 seconds 秒，返回 (进程 CPU 时间占墙钟时间的比例, 这段时间画了多少帧)。
+    polling 为真时跑 polling_menu_loop（原来的做法）而不是 game1_snake.menu_loop。
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    import game1_snake as game
+    from snake_session import GameSession
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    game.menu_backgrounds = game.MenuBackgrounds()
+    session = GameSession.from_record(None, len(game.SKIN_COLORS), len(game.HEAD_ITEMS))
+    frames = 0
+    update = pygame.display.update
+
+    def counting_update(*args):
+        nonlocal frames
+        frames += 1
+        update(*args)
+
+    pygame.display.update = counting_update
+    # 到时间后发一个 QUIT 事件，菜单按退出游戏处理（抛出 SystemExit）
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        loop = polling_menu_loop if polling else game.menu_loop
+        loop(screen, pygame.time.Clock(), game.get_font(48), game.get_font(36), session)
+    except SystemExit:
+        pass
+    cpu = time.process_time() - start_cpu
+    elapsed = time.perf_counter() - start
+    pygame.display.update = update
+    return cpu / elapsed, frames
+
+def bench_arena(sizes, players, ticks, seed):
+    """
+    在 size x size 的棋盘上让 players 个 ArenaBot 对战 ticks 帧（一局结束就换新的一局），
+    用 1000x800 的窗口跟着编号最小的活着的蛇画每一帧。
+    返回 [(棋盘边长, step 每帧微秒数, 机器人每帧微秒数, 绘制每帧微秒数), ...]。
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from snake_render import ArenaRenderer, Camera, get_font
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((1000, 800))
+    skins = [((0, 255, 0), (255, 165, 0))] + [((255, 0, 0), None)] * (players - 1)
+    results = []
+    for size in sizes:
+        random.seed(seed)
+        stepping = thinking = drawing = 0.0
+        world = None
+        for _ in range(ticks):
+            if world is None or world.game_over:
+                world = SnakeWorld(MODE_ARENA, size, size, players=players)
+                bots = [ArenaBot() for _ in range(players)]
+                camera = Camera(1000, 800, size, size)
+                renderer = ArenaRenderer(screen, get_font(24), camera)
+            start = time.perf_counter()
+            actions = [bot(world, i) for i, bot in enumerate(bots)]
+            thought = time.perf_counter()
+            world.step(actions)
+            stepped = time.perf_counter()
+            followed = next((snake for snake in world.snakes if snake), None)
+            if followed:
+                camera.follow(followed[0])
+            pygame.display.update(renderer.draw(world, skins, hud="arena"))
+            drawn = time.perf_counter()
+            thinking += thought - start
+            stepping += stepped - thought
+            drawing += drawn - stepped
+        results.append((size, stepping / ticks * 1e6, thinking / ticks * 1e6, drawing / ticks * 1e6))
+    pygame.quit()
+    return results
+
+ARENA_END_TICKS = 20000
+
+def check_arena_ends(sizes, players, seeds, max_ticks=ARENA_END_TICKS):
+    """
+    每种棋盘大小、每个种子各让 players 个 ArenaBot 打一局，最多 max_ticks 帧。
+    机器人互相挡住一动不动、或在障碍边上原地兜圈子时对局永远结束不了，这里用来防止这类问题再次出现。
+    返回 [(棋盘边长, 种子, 帧数, 结束原因), ...]，到 max_ticks 还没结束的结束原因为 None。
+    """
+    results = []
+    for size in sizes:
+        for seed in seeds:
+            random.seed(seed)
+            world = SnakeWorld(MODE_ARENA, size, size, seed=seed, players=players)
+            bots = [ArenaBot() for _ in range(players)]
+            while not world.game_over and world.tick < max_ticks:
+                world.step([bot(world, i) for i, bot in enumerate(bots)])
+            results.append((size, seed, world.tick, world.death_cause))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the snake simulation core.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    tick = sub.add_parser("tick", help="per-tick cost of SnakeWorld.step() by snake length")
+    tick.add_argument("--ticks", type=int, default=20000)
+    tick.add_argument("--lengths", type=int, nargs="+", default=[3, 100, 500, 1000, 1900])
+    batch = sub.add_parser("batch", help="BatchSnakeWorld throughput against the scalar loop")
+    batch.add_argument("--mode", choices=[MODE_SNAKE, MODE_APPLE], default=MODE_SNAKE)
+    batch.add_argument("--boards", type=int, default=4096)
+    batch.add_argument("--ticks", type=int, default=100)
+    ai = sub.add_parser("ai", help="greedy vs pathfinding snake AI in Apple mode")
+    ai.add_argument("--ticks", type=int, default=50000)
+    ai.add_argument("--seed", type=int, default=1)
+    render = sub.add_parser("render", help="full-screen redraw vs dirty-rect rendering by snake length")
+    render.add_argument("--frames", type=int, default=500)
+    render.add_argument("--lengths", type=int, nargs="+", default=[3, 100, 500, 1000, 1900])
+    background = sub.add_parser("background", help="redrawing obstacles every frame vs a cached background")
+    background.add_argument("--frames", type=int, default=2000)
+    background.add_argument("--seed", type=int, default=1)
+    menu = sub.add_parser("menu", help="CPU usage of the idle main menu")
+    menu.add_argument("--seconds", type=float, default=5.0)
+    arena = sub.add_parser("arena", help="Arena mode cost per tick and per frame by board size")
+    arena.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500, 1000])
+    arena.add_argument("--players", type=int, default=16)
+    arena.add_argument("--ticks", type=int, default=2000)
+    arena.add_argument("--seed", type=int, default=1)
+    arena_end = sub.add_parser("arena-end", help="check that all-bot Arena games always finish")
+    arena_end.add_argument("--sizes", type=int, nargs="+", default=[30, 60, 200])
+    arena_end.add_argument("--players", type=int, default=16)
+    arena_end.add_argument("--seeds", type=int, default=20)
+    arena_end.add_argument("--max-ticks", type=int, default=ARENA_END_TICKS)
+    args = parser.parse_args(argv)
+
+    if args.bench == "tick":
+        print(f"{'length':>8} {'us/tick':>10}")
+        for length, us in bench_tick(args.lengths, args.ticks):
+            print(f"{length:>8} {us:>10.2f}")
+    elif args.bench == "batch":
+        scalar, batched = bench_batch(args.mode, args.boards, args.ticks)
+        print(f"{args.mode}, {args.boards} boards x {args.ticks} ticks")
+        print(f"  scalar SnakeWorld: {scalar:>12.0f} board-ticks/s")
+        print(f"  BatchSnakeWorld:   {batched:>12.0f} board-ticks/s ({batched / scalar:.1f}x)")
+    elif args.bench == "ai":
+        print(f"{'ai':>8} {'apples':>8} {'games':>6} {'mean us':>9} {'worst us':>9}")
+        for name, (apples, games, mean, worst) in bench_ai(args.ticks, args.seed).items():
+            print(f"{name:>8} {apples:>8} {games:>6} {mean:>9.1f} {worst:>9.1f}")
+    elif args.bench == "render":
+        print(f"{'length':>8} {'full us':>10} {'dirty us':>10}")
+        for length, full, dirty in bench_render(args.lengths, args.frames):
+            print(f"{length:>8} {full:>10.1f} {dirty:>10.1f} ({full / dirty:.1f}x)")
+    elif args.bench == "background":
+        cells, drawn, cached = bench_background(args.frames, args.seed)
+        print(f"{cells} obstacle cells")
+        print(f"  fill + draw_obstacles: {drawn:>8.1f} us/frame")
+        print(f"  cached background:     {cached:>8.1f} us/frame ({drawn / cached:.1f}x)")
+    elif args.bench == "menu":
+        print(f"idle menu for {args.seconds:g}s")
+        for name, polling in ((f"redraw at {MENU_POLL_FPS} FPS", True), ("event-driven", False)):
+            usage, frames = bench_menu(args.seconds, polling)
+            print(f"  {name:<16} {usage * 100:>5.1f}% CPU, {frames:>5} frames drawn")
+    elif args.bench == "arena":
+        print(f"{args.players} snakes")
+        print(f"{'board':>10} {'step us':>9} {'bots us':>9} {'draw us':>9}")
+        for size, step, think, draw in bench_arena(args.sizes, args.players, args.ticks, args.seed):
+            print(f"{f'{size}x{size}':>10} {step:>9.1f} {think:>9.1f} {draw:>9.1f}")
+    elif args.bench == "arena-end":
+        results = check_arena_ends(args.sizes, args.players, range(args.seeds), args.max_ticks)
+        unfinished = [(size, seed) for size, seed, _, cause in results if cause is None]
+        print(f"{'board':>10} {'games':>6} {'mean ticks':>11} {'max ticks':>10}")
+        for size in args.sizes:
+            ticks = [t for s, _, t, _ in results if s == size]
+            print(f"{f'{size}x{size}':>10} {len(ticks):>6} {sum(ticks) / len(ticks):>11.0f} {max(ticks):>10}")
+        if unfinished:
+            print(f"{len(unfinished)} game(s) still running after {args.max_ticks} ticks (board, seed): {unfinished}")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+商店商品目录：皮肤和头饰从数据文件 catalog.json 读取，不再写死在代码里。
+
+    {"version": 1, "items": [
+        {"id": "skin_00", "kind": "skin", "color": [255, 0, 0], "price": 100},
+        {"id": "head_07", "kind": "head", "color": [255, 165, 0], "price": 200, "requires": {"reputation": 3}},
+        ...
+    ]}
+
+同一类商品按文件里出现的顺序编号（存档里的已购买位掩码按这个编号记录），新商品只能加在末尾。
+requires.reputation 为购买所需的声望等级，省略时为 0。
+
+GridLayout 是商店格子的排布：按坐标直接算出点中的是第几个商品（O(1)，与商品数量无关），
+并负责分页。本模块不涉及 pygame。
+"""
+import json, os
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+KINDS = ("skin", "head")
+
+class CatalogItem:
+    __slots__ = ("id", "kind", "index", "color", "price", "requires_reputation")
+
+    def __init__(self, id, kind, index, color, price, requires_reputation=0):
+        self.id = id
+        self.kind = kind
+        self.index = index  # 在同类商品中的编号
+        self.color = color
+        self.price = price
+        self.requires_reputation = requires_reputation
+
+    def unlocked(self, reputation_level):
+        return reputation_level >= self.requires_reputation
+
+class Catalog:
+    def __init__(self, items):
+        self.by_kind = {kind: [] for kind in KINDS}
+        self.by_id = {}
+        for item in items:
+            self.by_kind[item.kind].append(item)
+            self.by_id[item.id] = item
+
+    @property
+    def skins(self):
+        return self.by_kind["skin"]
+
+    @property
+    def heads(self):
+        return self.by_kind["head"]
+
+def load_catalog(path=CATALOG_PATH):
+    """读取并检查商品目录，格式不对时抛出 ValueError（指出是第几个商品）。"""
+    with open(path, "r") as f:
+        data = json.load(f)
+    items = []
+    counts = {kind: 0 for kind in KINDS}
+    seen = set()
+    for n, entry in enumerate(data.get("items", [])):
+        try:
+            kind = entry["kind"]
+            if kind not in KINDS:
+                raise ValueError(f"unknown kind {kind!r}")
+            item_id = str(entry["id"])
+            if item_id in seen:
+                raise ValueError(f"duplicate id {item_id!r}")
+            color = tuple(int(c) for c in entry["color"])
+            if len(color) != 3 or not all(0 <= c <= 255 for c in color):
+                raise ValueError(f"bad color {entry['color']!r}")
+            price = int(entry["price"])
+            requires = int(entry.get("requires", {}).get("reputation", 0))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path}: item {n}: {e}") from None
+        seen.add(item_id)
+        items.append(CatalogItem(item_id, kind, counts[kind], color, price, requires))
+        counts[kind] += 1
+    return Catalog(items)
+
+class GridLayout:
+    """
+    从 (x, y) 开始、cols 列 rows 行的格子，每格 box 像素见方，格子之间隔 padding 像素。
+    一页放 cols * rows 个商品，第 page 页的第 slot 个格子对应商品 page * per_page + slot。
+    """
+
+    def __init__(self, x, y, cols, rows, box, padding):
+        self.x = x
+        self.y = y
+        self.cols = cols
+        self.rows = rows
+        self.box = box
+        self.pitch = box + padding
+        self.per_page = cols * rows
+
+    def page_count(self, count):
+        return max(1, -(-count // self.per_page))
+
+    def page_of(self, index):
+        return index // self.per_page
+
+    def box_at(self, slot):
+        """第 slot 个格子的 (x, y, 宽, 高)。"""
+        row, col = divmod(slot, self.cols)
+        return (self.x + col * self.pitch, self.y + row * self.pitch, self.box, self.box)
+
+    def index_at(self, x, y, page, count):
+        """(x, y) 落在第 page 页的哪个商品上；落在格子之间的空隙或没有商品的格子上时返回 None。"""
+        dx = x - self.x
+        dy = y - self.y
+        if dx < 0 or dy < 0:
+            return None
+        col, ox = divmod(dx, self.pitch)
+        row, oy = divmod(dy, self.pitch)
+        if col >= self.cols or row >= self.rows or ox >= self.box or oy >= self.box:
+            return None
+        index = page * self.per_page + row * self.cols + col
+        return index if index < count else None
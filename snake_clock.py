@@ -0,0 +1,88 @@
+"""
+固定步长的游戏节奏：模拟按固定的 tick 频率推进，与绘制帧率无关。
+
+FixedTimestep 累积真实流逝的时间，每次调用 advance() 告诉调用方现在该推进几帧模拟，
+绘制时用 alpha（上一帧模拟到下一帧模拟之间走过的比例）插值，画面可以按显示器的帧率刷新。
+InputQueue 把两帧模拟之间按下的方向键排队，每帧模拟取一个。
+不涉及 pygame，无界面运行器也用它（tick_rate=None 表示不限速、尽快推进）。
+"""
+import time
+from collections import deque
+
+TICK_RATE = 16      # 游戏默认每秒推进的帧数（原来的 clock.tick(16)）
+DISPLAY_FPS = 60    # 游戏画面的刷新帧率
+MAX_CATCH_UP = 5    # 一次最多补推进的帧数，卡顿太久时宁可让游戏变慢，也不一口气跳过很多帧
+
+class FixedTimestep:
+    """
+    固定步长调度器。典型用法：
+
+        timestep = FixedTimestep(TICK_RATE)
+        while running:
+            处理输入
+            for _ in range(timestep.advance()):
+                world.step(...)
+            绘制（用 timestep.alpha 插值）
+            clock.tick(DISPLAY_FPS)
+
+    tick_rate 为 None 时不限速：advance() 每次都返回 max_catch_up，alpha 恒为 1。
+    """
+
+    def __init__(self, tick_rate=TICK_RATE, max_catch_up=MAX_CATCH_UP, now=time.perf_counter):
+        self.tick_rate = tick_rate
+        self.interval = 1.0 / tick_rate if tick_rate else 0.0
+        self.max_catch_up = max_catch_up
+        self.now = now
+        self.reset()
+
+    def reset(self):
+        """从现在开始计时（开局、重启或从暂停中恢复时调用）。"""
+        self.last = self.now()
+        self.accumulator = 0.0
+
+    def advance(self):
+        """返回现在应推进的模拟帧数。"""
+        if not self.tick_rate:
+            return self.max_catch_up
+        now = self.now()
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = int(self.accumulator / self.interval)
+        if ticks > self.max_catch_up:
+            ticks = self.max_catch_up
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.interval
+        return ticks
+
+    @property
+    def alpha(self):
+        """距上一帧模拟已经过去的时间占一帧的比例，取值 [0, 1]。"""
+        if not self.tick_rate:
+            return 1.0
+        return min(self.accumulator / self.interval, 1.0)
+
+class InputQueue:
+    """
+    一名玩家的方向键队列。两帧模拟之间快速按下 UP 再按 LEFT 时，
+    两次按键分别用在接下来的两帧上，而不是后一次覆盖前一次。
+    连续重复的方向只记一次；队列满了以后的按键丢弃。
+    """
+
+    def __init__(self, maxlen=3):
+        self.maxlen = maxlen
+        self.pending = deque()
+
+    def push(self, direction):
+        if len(self.pending) >= self.maxlen:
+            return
+        if self.pending and self.pending[-1] == direction:
+            return
+        self.pending.append(direction)
+
+    def pop(self):
+        """取出下一帧模拟要用的方向；没有按键时返回 None（保持原方向）。"""
+        return self.pending.popleft() if self.pending else None
+
+    def clear(self):
+        self.pending.clear()
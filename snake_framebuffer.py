@@ -0,0 +1,101 @@
+"""
+NumPy 帧缓冲绘制后端：不经过 pygame，把棋盘按格子直接画进一个 (高, 宽, 3) 的 uint8 数组，
+一个格子一个像素，需要时再整数倍放大。用于批量生成录像截图、缩略图。
+
+与 snake_render.BoardRenderer、snake_headless.NullRenderer 的接口相同：
+draw(world, skins, ...) 画出一整帧，draw_obstacles / draw_snake / draw_apple / draw_overlay_menu
+画单个元素（苹果用格子坐标）。格子太小，笑脸、头饰、覆盖菜单和提示文字都不画。
+
+    fb = FramebufferRenderer(world.width, world.height)
+    fb.draw(world, [((0, 255, 0), None)])
+    save_png("thumb.png", fb.image(scale=4))
+
+本模块需要 numpy，游戏本身不依赖它。
+"""
+import struct, zlib
+import numpy as np
+from snake_world import MODE_ARENA
+
+BLACK = (0, 0, 0)
+RED   = (255, 0, 0)
+GRAY  = (128, 128, 128)
+
+class FramebufferRenderer:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        self.background = None
+        self.background_obstacles = None  # 画进 background 的障碍列表
+
+    def invalidate(self):
+        pass  # 每次 draw() 都整帧重画，没有需要丢掉的状态
+
+    def clear(self):
+        self.pixels[:] = BLACK
+
+    def draw(self, world, skins, show_apple=True, muted=False, hud=None, alpha=1.0):
+        """画出 world 当前的一整帧，返回 pixels 数组（之后的 draw 会覆盖它）。"""
+        np.copyto(self.pixels, self._background(world))
+        for snake, (color, head_item) in zip(world.snakes, skins):
+            self.draw_snake(snake, color, head_item)
+        if show_apple and world.mode == MODE_ARENA:
+            if world.apples:
+                xs, ys = _coords(list(world.apples))
+                self.pixels[ys, xs] = RED
+        elif show_apple and world.apple is not None:
+            self.draw_apple(world.apple)
+        return self.pixels
+
+    def _background(self, world):
+        """黑底加障碍，整局不变，障碍列表换了才重画。"""
+        if self.background_obstacles is not world.obstacles:
+            self.background = np.zeros_like(self.pixels)
+            xs, ys = _coords([(obs['x'], obs['y']) for obs in world.obstacles])
+            self.background[ys, xs] = GRAY
+            self.background_obstacles = world.obstacles
+        return self.background
+
+    def draw_obstacles(self, obstacles):
+        xs, ys = _coords([(obs['x'], obs['y']) for obs in obstacles])
+        self.pixels[ys, xs] = GRAY
+
+    def draw_snake(self, snake_coords, snake_color, head_item=None):
+        xs, ys = _coords(snake_coords)
+        self.pixels[ys, xs] = snake_color
+
+    def draw_apple(self, apple):
+        """apple 为格子坐标 (x, y)。"""
+        self.pixels[apple[1], apple[0]] = RED
+
+    def draw_overlay_menu(self, font_overlay, muted):
+        pass
+
+    def image(self, scale=1):
+        """当前画面的副本，每个格子放大成 scale x scale 个像素。"""
+        if scale == 1:
+            return self.pixels.copy()
+        return self.pixels.repeat(scale, axis=0).repeat(scale, axis=1)
+
+def _coords(cells):
+    """(x, y) 序列 -> (xs, ys) 两个下标数组。"""
+    if not cells:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    arr = np.array(cells, dtype=np.intp)
+    return arr[:, 0], arr[:, 1]
+
+def save_png(path, pixels):
+    """把 (高, 宽, 3) 的 uint8 数组存成 PNG（只用 zlib，不需要 pygame 或 PIL）。"""
+    height, width, _ = pixels.shape
+    # 每行前面加一个过滤类型字节 0（不过滤）
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
@@ -0,0 +1,188 @@
+"""
+无界面运行器：不打开窗口、不初始化混音器，默认不限速，尽可能快地推进 SnakeWorld。
+用于压力测试、回放校验和训练机器人，适合没有显示器的 Linux 服务器。
+
+    python snake_headless.py --mode SNAKE --ticks 1000000 --seed 1
+    python snake_headless.py --mode 2PLAYERS --ticks 160 --tick-rate 16   # 按游戏中的实际速度推进
+    python snake_headless.py --mode ARENA --width 500 --height 500 --players 16
+"""
+import argparse, random, time
+from snake_world import (
+    SnakeWorld, UP, DOWN, LEFT, RIGHT, DIRECTION_DELTAS, MODE_SNAKE, MODE_APPLE, MODE_2PLAYERS, MODE_ARENA, ARENA_PLAYERS,
+    CELL_WIDTH, CELL_HEIGHT, EVENT_APPLE_EATEN, get_snake_direction,
+)
+from snake_ai import PathfindingController, ArenaBot
+from snake_clock import FixedTimestep
+from snake_replay import start_recording
+
+# --------------------- 绘制后端 ---------------------
+class NullRenderer:
+    """什么也不画的绘制后端，接口与 snake_render.BoardRenderer 相同，无界面运行时的默认后端。"""
+
+    def draw(self, world, skins, show_apple=True, muted=False, hud=None, alpha=1.0):
+        return []
+
+    def invalidate(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def draw_obstacles(self, obstacles):
+        pass
+
+    def draw_snake(self, snake_coords, snake_color, head_item=None):
+        pass
+
+    def draw_apple(self, apple):
+        pass
+
+    def draw_overlay_menu(self, font_overlay, muted):
+        pass
+
+HEADLESS_SKINS = [((0, 255, 0), None), ((255, 0, 0), None)]
+
+# --------------------- 内置控制器 ---------------------
+# 控制器签名：controller(world, index) -> 方向或 None（保持原方向）
+PHASE2_WANDER = 0.1  # 2 Players 第 2 阶段每帧随机拐一个弯的几率
+
+def chase_tail_direction(world, index, rng=random):
+    """
+    2 Players 第 2 阶段（苹果已经没用了）第 index 条蛇去咬对方的尾巴：尾巴就在蛇头旁边时咬上去，
+    否则用 get_snake_direction 朝它走（尾巴所在的格子有蛇身，get_snake_direction 不会走进去）。
+    两条蛇速度相同，首尾相接绕成一个圈时谁也咬不死谁，所以每帧有 PHASE2_WANDER 的几率随机拐个弯打破僵局。
+    """
+    snake = world.snakes[index]
+    tail = world.snakes[1 - index][-1]
+    hx, hy = snake[0]
+    if rng.random() < PHASE2_WANDER:
+        options = [d for d, (dx, dy) in DIRECTION_DELTAS.items()
+                   if world.grid.in_bounds(hx + dx, hy + dy) and world.grid.is_free(hx + dx, hy + dy)]
+        if options:
+            return rng.choice(options)
+    for direction, (dx, dy) in DIRECTION_DELTAS.items():
+        if (hx + dx, hy + dy) == tail:
+            return direction
+    return get_snake_direction(snake, tail, world.grid)
+
+def greedy_snake_controller(world, index):
+    """用 get_snake_direction 控制第 index 条蛇追苹果；2 Players 第 2 阶段见 chase_tail_direction。"""
+    if world.mode == MODE_2PLAYERS and world.phase == 2:
+        return chase_tail_direction(world, index)
+    return get_snake_direction(world.snakes[index], world.apple, world.grid)
+
+def path_snake_controller():
+    """
+    创建一个用 PathfindingController 控制蛇追苹果的控制器（每条蛇各用一个，路径缓存互不干扰）。
+    2 Players 第 2 阶段见 chase_tail_direction：对方的尾巴占着格子而且每帧都在动，寻路找不到路。
+    """
+    ai = PathfindingController()
+
+    def controller(world, index):
+        if world.mode == MODE_2PLAYERS and world.phase == 2:
+            return chase_tail_direction(world, index)
+        return ai(world.snakes[index], world.apple, world.grid)
+    return controller
+
+def random_apple_controller(world, index, rng=random):
+    """Apple 模式中的苹果：每帧有 10% 的几率随机换一个方向。rng 为随机数来源，需要可重现时传入 random.Random。"""
+    if rng.random() < 0.1:
+        return rng.choice([UP, DOWN, LEFT, RIGHT])
+    return None
+
+def default_controllers(mode, ai="path", players=ARENA_PLAYERS):
+    """
+    各模式的默认控制器；ai 为 "path"（寻路）或 "greedy"（get_snake_direction）。
+    Arena 模式总是用 get_snake_direction：大棋盘上苹果往往很远，寻路每帧都要做一次大范围搜索。
+    """
+    snake = path_snake_controller if ai == "path" else (lambda: greedy_snake_controller)
+    if mode == MODE_SNAKE:
+        return [snake()]
+    if mode == MODE_APPLE:
+        return [random_apple_controller]
+    if mode == MODE_ARENA:
+        return [ArenaBot() for _ in range(players)]
+    return [snake(), snake()]
+
+def make_world(mode, width=CELL_WIDTH, height=CELL_HEIGHT, ai="path", players=ARENA_PLAYERS):
+    """创建世界；Apple 模式中由 ai 指定的 AI 控制蛇，Arena 模式中共有 players 条蛇。"""
+    snake_ai = PathfindingController() if ai == "path" else get_snake_direction
+    return SnakeWorld(mode, width, height, snake_ai=snake_ai, players=players)
+
+# --------------------- 运行 ---------------------
+def run_headless(mode, ticks, controllers=None, seed=None, width=CELL_WIDTH, height=CELL_HEIGHT, world=None, ai="path",
+                 tick_rate=None, record_dir=None, renderer=None, players=ARENA_PLAYERS):
+    """
+    连续推进 ticks 帧，一局结束后立即开始下一局。tick_rate 为每秒帧数，None 表示不限速；
+    给出 record_dir 时每一局都录像保存到该目录。renderer 为绘制后端，每帧模拟后画一次
+    （如 snake_framebuffer.FramebufferRenderer，用于导出训练用的画面），默认 NullRenderer。
+    返回统计信息字典：ticks、games、apples、elapsed（秒）、ticks_per_second。
+    """
+    if seed is not None:
+        random.seed(seed)
+    if world is None:
+        world = make_world(mode, width, height, ai, players)
+    if controllers is None:
+        controllers = default_controllers(mode, ai, world.players)
+    if renderer is None:
+        renderer = NullRenderer()
+    skins = [HEADLESS_SKINS[i % len(HEADLESS_SKINS)] for i in range(world.players)]
+    games = 1
+    apples = 0
+    timestep = FixedTimestep(tick_rate)
+    recorder = start_recording(world, ai, record_dir) if record_dir else None
+    done = 0
+    start = time.perf_counter()
+    while done < ticks:
+        due = timestep.advance()
+        if not due:
+            # 离下一帧还有一段时间，睡过去
+            time.sleep(timestep.interval * (1 - timestep.alpha))
+            continue
+        for _ in range(min(due, ticks - done)):
+            if world.game_over:
+                if recorder:
+                    recorder.close(world)
+                world.reset()
+                games += 1
+                if recorder:
+                    recorder = start_recording(world, ai, record_dir)
+            actions = [controller(world, i) for i, controller in enumerate(controllers)]
+            if recorder:
+                recorder.tick(actions, world.directions)
+            for kind, _ in world.step(actions):
+                if kind == EVENT_APPLE_EATEN:
+                    apples += 1
+            renderer.draw(world, skins, show_apple=world.phase == 1)
+        done += min(due, ticks - done)
+    if recorder:
+        recorder.close(world)
+    elapsed = time.perf_counter() - start
+    return {
+        "ticks": ticks,
+        "games": games,
+        "apples": apples,
+        "elapsed": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run snake games without a display.")
+    parser.add_argument("--mode", choices=[MODE_SNAKE, MODE_APPLE, MODE_2PLAYERS, MODE_ARENA], default=MODE_SNAKE)
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--width", type=int, default=CELL_WIDTH)
+    parser.add_argument("--height", type=int, default=CELL_HEIGHT)
+    parser.add_argument("--players", type=int, default=ARENA_PLAYERS, help="number of snakes in ARENA mode")
+    parser.add_argument("--ai", choices=["path", "greedy"], default="path", help="snake AI for bots and Apple mode")
+    parser.add_argument("--tick-rate", type=float, default=None, help="ticks per second (default: as fast as possible)")
+    parser.add_argument("--record", metavar="DIR", default=None, help="save a replay of every game into DIR")
+    args = parser.parse_args(argv)
+
+    stats = run_headless(args.mode, args.ticks, seed=args.seed, width=args.width, height=args.height, ai=args.ai,
+                         tick_rate=args.tick_rate, record_dir=args.record, players=args.players)
+    print(f"{args.mode}: {stats['ticks']} ticks, {stats['games']} games, {stats['apples']} apples "
+          f"in {stats['elapsed']:.2f}s ({stats['ticks_per_second']:.0f} ticks/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""
+联网双人对战：服务器用 asyncio 按固定帧率运行 2 Players 模式的规则（以服务器为准），
+客户端只发送换方向的按键，服务器每帧向两个客户端广播本帧的变化（新蛇头、弹出的蛇尾、苹果的新位置），
+客户端据此更新自己的 SnakeWorld 副本并绘制，从不自己推进模拟。
+
+    python snake_net.py server --port 8765
+    python snake_net.py client --host 192.168.1.5 --port 8765
+    python snake_net.py client --bot      # 不开窗口，由 AI 操作，便于在本机测试
+
+协议（TCP；整数都是 snake_replay 中的 varint）：
+  客户端 -> 服务器  每次按方向键发 1 字节方向编号（UP/DOWN/LEFT/RIGHT = 0~3），没有别的消息
+  服务器 -> 客户端  每条消息为 varint(长度) + 内容，内容的第一个字节是消息类型：
+    MSG_START  开局时发一次完整状态：玩家编号、宽、高、种子、帧号、阶段、已吃苹果数、
+               苹果（x + 1、y；没有苹果时为 0）、每条蛇的长度和全部格子
+    MSG_TICK   帧号；新蛇头的蛇编号掩码和各个新蛇头的 x、y；弹出蛇尾的蛇编号掩码和各自弹出的节数；
+               标志字节，带 TICK_APPLE / TICK_PHASE / TICK_OVER 时依次跟着苹果位置、新阶段、结束原因
+每帧消息的长度只取决于这一帧有什么变化：两条蛇各走一格时约 12 字节，与蛇长无关。
+"""
+import argparse, asyncio
+from snake_world import (
+    SnakeWorld, MODE_2PLAYERS, CELL_WIDTH, CELL_HEIGHT,
+    UP, DOWN, LEFT, RIGHT, DIRECTION_DELTAS,
+    EVENT_APPLE_EATEN, EVENT_SNAKE_EATEN, EVENT_PHASE_CHANGED, EVENT_GAME_OVER, get_snake_direction,
+)
+from snake_clock import FixedTimestep, InputQueue, TICK_RATE
+from snake_replay import CAUSES, DIRECTIONS, DIRECTION_CODES, encode_varint, read_varint, start_recording
+
+PORT = 8765
+PLAYERS = 2
+
+MSG_START = 1
+MSG_TICK = 2
+
+# MSG_TICK 的标志位
+TICK_APPLE = 1          # 苹果换了位置
+TICK_PHASE = 2          # 进入新阶段
+TICK_OVER = 4           # 对局结束
+TICK_APPLE_EATEN = 8    # 本帧有蛇吃到苹果
+TICK_SNAKE_EATEN = 16   # 本帧有蛇被咬掉尾巴
+
+DISCONNECTED = "disconnected"  # 有玩家断线，对局中止
+NET_CAUSES = CAUSES + [DISCONNECTED]
+
+DELTA_DIRECTIONS = {delta: d for d, delta in DIRECTION_DELTAS.items()}
+
+class ProtocolError(ValueError):
+    """收到的消息不符合协议。"""
+
+# --------------------- 编码 ---------------------
+def _encode_cell(cell):
+    """苹果位置：x + 1、y，None 编为单个 0。"""
+    if cell is None:
+        return encode_varint(0)
+    return encode_varint(cell[0] + 1) + encode_varint(cell[1])
+
+def _read_cell(data, pos):
+    x, pos = read_varint(data, pos)
+    if x == 0:
+        return None, pos
+    y, pos = read_varint(data, pos)
+    return (x - 1, y), pos
+
+def encode_start(world, player):
+    out = bytearray([MSG_START])
+    for value in (player, world.width, world.height, world.seed, world.tick, world.phase, world.apple_count):
+        out += encode_varint(value)
+    out += _encode_cell(world.apple)
+    for snake in world.snakes:
+        out += encode_varint(len(snake))
+        for x, y in snake:
+            out += encode_varint(x) + encode_varint(y)
+    return bytes(out)
+
+def decode_start(data):
+    """解出 MSG_START，返回 (玩家编号, 与服务器状态相同的 SnakeWorld 副本)。"""
+    if not data or data[0] != MSG_START:
+        raise ProtocolError("expected a start message")
+    try:
+        (player, width, height, seed, tick, phase, apple_count), pos = _read_varints(data, 1, 7)
+        world = SnakeWorld(MODE_2PLAYERS, width, height, seed=seed)
+        world.tick = tick
+        world.phase = phase
+        world.apple_count = apple_count
+        world.apple, pos = _read_cell(data, pos)
+        for snake in world.snakes:
+            length, pos = read_varint(data, pos)
+            cells, pos = _read_varints(data, pos, 2 * length)
+            snake.clear()
+            snake.extend(zip(cells[0::2], cells[1::2]))
+    except IndexError:
+        raise ProtocolError("truncated start message") from None
+    world.rebuild_grid()
+    return player, world
+
+class TickEncoder:
+    """服务器端：记下每帧模拟之前的状态，模拟之后与之比较，编出这一帧的 MSG_TICK。"""
+
+    def __init__(self, world):
+        self.world = world
+        self.before()
+
+    def before(self):
+        world = self.world
+        self.heads = [snake[0] for snake in world.snakes]
+        self.lengths = [len(snake) for snake in world.snakes]
+        self.apple = world.apple
+        self.phase = world.phase
+
+    def encode(self, events):
+        world = self.world
+        head_mask = pop_mask = 0
+        heads = bytearray()
+        pops = bytearray()
+        for i, snake in enumerate(world.snakes):
+            # 每帧每条蛇最多长出一个新蛇头；弹出的节数由长度的变化算出
+            pushed = snake[0] != self.heads[i]
+            if pushed:
+                head_mask |= 1 << i
+                heads += encode_varint(snake[0][0]) + encode_varint(snake[0][1])
+            popped = self.lengths[i] + pushed - len(snake)
+            if popped:
+                pop_mask |= 1 << i
+                pops += encode_varint(popped)
+        flags = 0
+        tail = bytearray()
+        if world.apple != self.apple:
+            flags |= TICK_APPLE
+            tail += _encode_cell(world.apple)
+        if world.phase != self.phase:
+            flags |= TICK_PHASE
+            tail += encode_varint(world.phase)
+        for kind, _ in events:
+            if kind == EVENT_APPLE_EATEN:
+                flags |= TICK_APPLE_EATEN
+            elif kind == EVENT_SNAKE_EATEN:
+                flags |= TICK_SNAKE_EATEN
+        if world.game_over:
+            flags |= TICK_OVER
+            tail.append(NET_CAUSES.index(world.death_cause))
+        self.before()
+        return (bytes([MSG_TICK]) + encode_varint(world.tick) + encode_varint(head_mask) + heads
+                + encode_varint(pop_mask) + pops + bytes([flags]) + tail)
+
+def encode_abort(world):
+    """有玩家断线时发给另一方的最后一帧：没有变化，只带结束原因。"""
+    return bytes([MSG_TICK]) + encode_varint(world.tick) + bytes([0, 0, TICK_OVER, NET_CAUSES.index(DISCONNECTED)])
+
+def apply_tick(world, data):
+    """客户端：把 MSG_TICK 应用到 SnakeWorld 副本上，返回与 world.step() 同样形式的事件列表。"""
+    if not data or data[0] != MSG_TICK:
+        raise ProtocolError("expected a tick message")
+    events = []
+    try:
+        world.tick, pos = read_varint(data, 1)
+        head_mask, pos = read_varint(data, pos)
+        for i in _bits(head_mask):
+            (x, y), pos = _read_varints(data, pos, 2)
+            old_x, old_y = world.snakes[i][0]
+            # 副本中的方向由蛇头的移动推出，供 AI 客户端判断按键是否已经生效
+            world.directions[i] = DELTA_DIRECTIONS.get((x - old_x, y - old_y), world.directions[i])
+            world._push_head(i, (x, y))
+        pop_mask, pos = read_varint(data, pos)
+        for i in _bits(pop_mask):
+            popped, pos = read_varint(data, pos)
+            for _ in range(popped):
+                world._pop_tail(i)
+        flags = data[pos]
+        pos += 1
+        if flags & TICK_APPLE_EATEN:
+            world.apple_count += 1
+            events.append((EVENT_APPLE_EATEN, None))
+        if flags & TICK_SNAKE_EATEN:
+            events.append((EVENT_SNAKE_EATEN, None))
+        if flags & TICK_APPLE:
+            world.apple, pos = _read_cell(data, pos)
+        if flags & TICK_PHASE:
+            world.phase, pos = read_varint(data, pos)
+            events.append((EVENT_PHASE_CHANGED, world.phase))
+        if flags & TICK_OVER:
+            world.game_over = True
+            world.death_cause = NET_CAUSES[data[pos]]
+            events.append((EVENT_GAME_OVER, world.death_cause))
+    except IndexError:
+        raise ProtocolError("truncated tick message") from None
+    return events
+
+def _bits(mask):
+    i = 0
+    while mask:
+        if mask & 1:
+            yield i
+        mask >>= 1
+        i += 1
+
+def _read_varints(data, pos, count):
+    values = []
+    for _ in range(count):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values, pos
+
+def frame(payload):
+    return encode_varint(len(payload)) + payload
+
+async def read_frame(reader):
+    """读一条 varint(长度) + 内容的消息；连接关闭时返回 None。"""
+    length = 0
+    shift = 0
+    try:
+        while True:
+            b = (await reader.readexactly(1))[0]
+            length |= (b & 0x7F) << shift
+            if b < 0x80:
+                break
+            shift += 7
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+
+# --------------------- 服务器 ---------------------
+class SnakeServer:
+    """
+    等两名玩家连上后开一局，按 tick_rate 推进，结束后断开两人，再等下一对玩家。
+    玩家的按键先进各自的 InputQueue，与本地 2 Players 模式相同：一帧内按了几次键会在之后几帧依次生效。
+    """
+
+    def __init__(self, host="127.0.0.1", port=PORT, tick_rate=TICK_RATE, width=CELL_WIDTH, height=CELL_HEIGHT,
+                 record_dir=None):
+        self.host = host
+        self.port = port
+        if not (tick_rate and tick_rate > 0):
+            # FixedTimestep 在不限速时每次都有帧要推进，主循环不再 await，读写连接的协程永远轮不到
+            raise ValueError(f"tick_rate must be positive, got {tick_rate!r}")
+        self.tick_rate = tick_rate
+        self.width = width
+        self.height = height
+        self.record_dir = record_dir
+        self.waiting = []  # 已连上、还没开局的 (reader, writer)
+        self.joined = None
+        self.server = None
+
+    async def start(self):
+        """开始监听，返回实际监听的端口（port 为 0 时由系统分配）。"""
+        self.joined = asyncio.Event()
+        self.server = await asyncio.start_server(self._accept, self.host, self.port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _accept(self, reader, writer):
+        self.waiting.append((reader, writer))
+        if len(self.waiting) >= PLAYERS:
+            self.joined.set()
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        while True:
+            await self.play_match()
+
+    async def play_match(self, seed=None):
+        """等够两名玩家，打完一局，返回结束时的 SnakeWorld。"""
+        await self.joined.wait()
+        players, self.waiting = self.waiting[:PLAYERS], self.waiting[PLAYERS:]
+        if len(self.waiting) < PLAYERS:
+            self.joined.clear()
+        world = SnakeWorld(MODE_2PLAYERS, self.width, self.height, seed=seed)
+        for i, (_, writer) in enumerate(players):
+            writer.write(frame(encode_start(world, i)))
+        inputs = [InputQueue() for _ in players]
+        gone = asyncio.Event()
+        readers = [asyncio.create_task(self._read_inputs(reader, queue, gone))
+                   for (reader, _), queue in zip(players, inputs)]
+        recorder = start_recording(world, None, self.record_dir) if self.record_dir else None
+        encoder = TickEncoder(world)
+        timestep = FixedTimestep(self.tick_rate)
+        try:
+            while not world.game_over:
+                if gone.is_set():
+                    self._broadcast(players, frame(encode_abort(world)))
+                    break
+                due = timestep.advance()
+                if not due:
+                    await asyncio.sleep(timestep.interval * (1 - timestep.alpha))
+                    continue
+                for _ in range(due):
+                    actions = [queue.pop() for queue in inputs]
+                    if recorder:
+                        recorder.tick(actions, world.directions)
+                    events = world.step(actions)
+                    self._broadcast(players, frame(encoder.encode(events)))
+                    if world.game_over:
+                        break
+                # 帧率很高、一直有帧要补时也让出事件循环，读写连接的协程才能运行
+                await asyncio.sleep(0)
+        finally:
+            if recorder:
+                recorder.close(world)
+            for task in readers:
+                task.cancel()
+            for _, writer in players:
+                writer.close()
+        return world
+
+    @staticmethod
+    async def _read_inputs(reader, queue, gone):
+        while True:
+            data = await reader.read(64)
+            if not data:
+                gone.set()
+                return
+            for code in data:
+                if code < len(DIRECTIONS):
+                    queue.push(DIRECTIONS[code])
+
+    @staticmethod
+    def _broadcast(players, message):
+        # 不等 drain：一个客户端卡住时不拖慢服务器的帧率，数据先留在它的发送缓冲区里
+        for _, writer in players:
+            if not writer.is_closing():
+                writer.write(message)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+# --------------------- 客户端 ---------------------
+class NetClient:
+    """连上服务器后 world 是服务器状态的副本，player 是自己控制的蛇的编号。"""
+
+    def __init__(self, reader, writer, player, world):
+        self.reader = reader
+        self.writer = writer
+        self.player = player
+        self.world = world
+        self.received = 0  # 收到的字节数（不含开局消息）
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=PORT):
+        """连接服务器并等到开局（另一名玩家连上）。"""
+        reader, writer = await asyncio.open_connection(host, port)
+        data = await read_frame(reader)
+        if data is None:
+            raise ConnectionError("server closed the connection before the game started")
+        player, world = decode_start(data)
+        return cls(reader, writer, player, world)
+
+    def send(self, direction):
+        self.writer.write(bytes([DIRECTION_CODES[direction]]))
+
+    async def receive(self):
+        """等下一帧，应用到 world 上并返回事件列表；连接断开时返回 None。"""
+        data = await read_frame(self.reader)
+        if data is None:
+            return None
+        self.received += len(data) + 1
+        return apply_tick(self.world, data)
+
+    def close(self):
+        self.writer.close()
+
+async def run_bot_client(host="127.0.0.1", port=PORT):
+    """不开窗口、由 get_snake_direction 操作的客户端：第 1 阶段追苹果，第 2 阶段追对方的尾巴。返回对局结束时的 NetClient。"""
+    client = await NetClient.connect(host, port)
+    world = client.world
+    me = client.player
+    while not world.game_over:
+        snake = world.snakes[me]
+        target = world.apple if world.phase == 1 else world.snakes[1 - me][-1]
+        if target is not None:
+            direction = get_snake_direction(snake, target, world.grid)
+            if direction is not None and direction != world.directions[me]:
+                client.send(direction)
+        if await client.receive() is None:
+            break
+    client.close()
+    return client
+
+async def run_window_client(host="127.0.0.1", port=PORT):
+    """打开窗口的客户端：方向键操作自己的蛇，经 BoardRenderer 绘制服务器发来的状态。"""
+    import pygame
+    from snake_clock import DISPLAY_FPS
+    from snake_render import CELL_SIZE, BoardRenderer, get_font, OVERLAY_QUIT_RECT, OVERLAY_VOLUME_RECT
+    from snake_audio import SOUND_FILES, open_audio
+
+    print(f"connecting to {host}:{port}, waiting for the other player...")
+    client = await NetClient.connect(host, port)
+    world = client.world
+    pygame.init()
+    audio = open_audio()
+    audio.load(SOUND_FILES)
+    screen = pygame.display.set_mode((world.width * CELL_SIZE, world.height * CELL_SIZE))
+    pygame.display.set_caption(f"Snake online: player {client.player + 1}")
+    renderer = BoardRenderer(screen, get_font(24))
+    skins = [((0, 255, 0), None), ((255, 0, 0), None)]
+    keys = {pygame.K_UP: UP, pygame.K_DOWN: DOWN, pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT}
+
+    async def receive():
+        while True:
+            events = await client.receive()
+            if events is None:
+                return
+            for kind, _ in events:
+                if kind == EVENT_APPLE_EATEN:
+                    audio.play("eat")
+                elif kind == EVENT_SNAKE_EATEN:
+                    audio.play("eaten")
+                elif kind == EVENT_GAME_OVER:
+                    audio.play("over")
+                    return
+
+    receiving = asyncio.create_task(receive())
+    quit_requested = False
+    while not receiving.done() and not quit_requested:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                quit_requested = True
+            elif event.type == pygame.VIDEOEXPOSE:
+                renderer.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key in keys:
+                client.send(keys[event.key])
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if OVERLAY_QUIT_RECT.collidepoint(event.pos):
+                    quit_requested = True
+                elif OVERLAY_VOLUME_RECT.collidepoint(event.pos):
+                    audio.toggle_mute()
+        color = "green" if client.player == 0 else "red"
+        info = f"You are {color}. " + (f"Phase 1: {world.apple_count} apple(s) eaten" if world.phase == 1
+                                       else "Phase 2: Mutual Eating")
+        pygame.display.update(renderer.draw(world, skins, show_apple=world.phase == 1, muted=audio.muted, hud=info))
+        await asyncio.sleep(1 / DISPLAY_FPS)
+    receiving.cancel()
+    client.close()
+    if world.game_over:
+        print(f"game over: {world.death_cause}, lengths {[len(s) for s in world.snakes]}")
+        await asyncio.sleep(2)
+    pygame.quit()
+
+def positive_float(text):
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {text}")
+    return value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Two-player snake over the network.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    server = sub.add_parser("server", help="run the authoritative game server")
+    server.add_argument("--host", default="0.0.0.0")
+    server.add_argument("--port", type=int, default=PORT)
+    server.add_argument("--tick-rate", type=positive_float, default=TICK_RATE)
+    server.add_argument("--record", metavar="DIR", default=None, help="save a replay of every game into DIR")
+    client = sub.add_parser("client", help="join a server")
+    client.add_argument("--host", default="127.0.0.1")
+    client.add_argument("--port", type=int, default=PORT)
+    client.add_argument("--bot", action="store_true", help="let the AI play, without a window")
+    args = parser.parse_args(argv)
+
+    if args.command == "server":
+        game_server = SnakeServer(args.host, args.port, args.tick_rate, record_dir=args.record)
+        print(f"serving on {args.host}:{args.port}")
+        try:
+            asyncio.run(game_server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+    elif args.bot:
+        result = asyncio.run(run_bot_client(args.host, args.port))
+        world = result.world
+        print(f"player {result.player + 1}: {world.death_cause} after {world.tick} ticks, "
+              f"lengths {[len(s) for s in world.snakes]}, {result.received} bytes received")
+    else:
+        asyncio.run(run_window_client(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
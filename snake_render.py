@@ -0,0 +1,569 @@
+"""
+游戏画面的绘制：棋盘上各元素的绘制函数，以及按帧增量重画的 BoardRenderer。
+
+BoardRenderer 记住上一帧画过的内容，每帧只重画发生变化的格子（新蛇头、旧蛇头、空出的蛇尾、
+苹果的新旧位置），覆盖菜单和提示文字只在状态变化或底下的格子被重画时才重画，
+最后把这些格子的矩形列表交给 pygame.display.update(rects)，而不是每帧整屏填充、整屏刷新。
+
+Arena 模式的棋盘可以比窗口大得多，由 ArenaRenderer 透过 Camera 只画窗口里看得见的那一块。
+
+绘制后端的接口（BoardRenderer 是 pygame 后端；snake_headless.NullRenderer 什么也不画，
+snake_framebuffer.FramebufferRenderer 画进 NumPy 数组，用于批量截图）：
+    draw(world, skins, show_apple, muted, hud, alpha)   画出一整帧
+    invalidate()                                        下一次 draw() 整帧重画
+    clear() / draw_obstacles(obstacles) / draw_snake(coords, color, head_item)
+    draw_apple((x, y)) / draw_overlay_menu(font, muted) 画单个元素，坐标都是格子坐标
+"""
+import math, re
+from collections import deque, OrderedDict
+import pygame
+from snake_world import OBSTACLE
+
+CELL_SIZE = 20
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED   = (255, 0, 0)
+GRAY  = (128, 128, 128)
+
+# --------------------- 覆盖菜单 ---------------------
+OVERLAY_RESTART_RECT = pygame.Rect(10, 10, 100, 30)
+OVERLAY_QUIT_RECT = pygame.Rect(10, 50, 100, 30)
+OVERLAY_VOLUME_RECT = pygame.Rect(10, 90, 100, 30)
+OVERLAY_BOUNDS = OVERLAY_RESTART_RECT.unionall([OVERLAY_QUIT_RECT, OVERLAY_VOLUME_RECT])
+
+# 文字缓存最多保留的渲染结果数
+TEXT_CACHE_SIZE = 256
+
+# 两次绘制之间一条蛇最多前进的格数，超过时不再逐格比对，直接整屏重画
+MAX_STEPS_PER_FRAME = 8
+
+# --------------------- 图块缓存 ---------------------
+class SpriteCache:
+    """
+    预先画好的蛇头图块（方块、笑脸和帽子），以 (皮肤颜色, 头饰, 格子大小) 为键，
+    第一次用到时用绘图函数画一次，之后每帧只需一次 blit。
+    蛇身、苹果和障碍都是纯色方块，每格一次 fill 即可：在 SDL 的软件渲染下这比 blit 同样大小的图块还快。
+    玩家在商店里换了皮肤或头饰时调用 invalidate() 丢掉旧图块。
+    """
+
+    def __init__(self):
+        self.tiles = {}
+
+    def invalidate(self):
+        self.tiles.clear()
+
+    def head(self, color, head_item, cell_size=CELL_SIZE):
+        """
+        蛇头图块，返回 (图块, 偏移)。帽子伸出格子上方半格、右边缘多出一列像素，
+        所以图块比格子大，blit 到格子左上角加上偏移的位置。
+        """
+        key = (color, head_item, cell_size)
+        entry = self.tiles.get(key)
+        if entry is None:
+            top = cell_size // 2 + 1 if head_item is not None else 0
+            tile = pygame.Surface((cell_size + 1, cell_size + top), pygame.SRCALPHA)
+            paint_head(tile, 0, top, color, head_item, cell_size)
+            entry = self.tiles[key] = (_for_display(tile), (0, -top))
+        return entry
+
+def _for_display(tile):
+    """已经打开窗口时转换成显示格式，blit 更快。"""
+    if pygame.display.get_surface() is None:
+        return tile
+    return tile.convert_alpha()
+
+sprites = SpriteCache()
+
+# --------------------- 字体与文字缓存 ---------------------
+_fonts = {}
+_texts = OrderedDict()
+
+def get_font(size, name=None):
+    """进程内共享的字体：同样的 (字体名, 字号) 只创建一次 SysFont。"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size)
+    return font
+
+def render_text(font, text, color):
+    """
+    font.render(text, True, color) 的 LRU 缓存，按 (字体, 文字, 颜色) 查找，
+    没变的标签只渲染一次。返回的 Surface 是共享的，调用方不要在上面绘制。
+    """
+    key = (font, text, color)
+    surf = _texts.get(key)
+    if surf is None:
+        surf = _texts[key] = font.render(text, True, color)
+        if len(_texts) > TEXT_CACHE_SIZE:
+            _texts.popitem(last=False)
+    else:
+        _texts.move_to_end(key)
+    return surf
+
+# --------------------- 绘制函数 ---------------------
+def paint_head(surface, x, y, snake_color, head_item=None, cell_size=CELL_SIZE):
+    """用绘图函数在像素坐标 (x, y) 画蛇头：方块加笑脸，有头饰时在格子上方画三角形帽子。"""
+    rect = pygame.Rect(x, y, cell_size, cell_size)
+    pygame.draw.rect(surface, snake_color, rect)
+    center_x = x + cell_size // 2
+    center_y = y + cell_size // 2
+    eye_radius = 2
+    eye_offset_x = 4
+    eye_offset_y = 4
+    pygame.draw.circle(surface, BLACK, (center_x - eye_offset_x, center_y - eye_offset_y), eye_radius)
+    pygame.draw.circle(surface, BLACK, (center_x + eye_offset_x, center_y - eye_offset_y), eye_radius)
+    mouth_rect = pygame.Rect(x + 3, y + cell_size // 2, cell_size - 6, cell_size // 2)
+    pygame.draw.arc(surface, BLACK, mouth_rect, math.pi, 2*math.pi, 3)
+    if head_item is not None:
+        hat_points = [
+            (x, y),
+            (x + cell_size, y),
+            (x + cell_size/2, y - cell_size/2)
+        ]
+        pygame.draw.polygon(surface, head_item, hat_points)
+
+def draw_segment(surface, x, y, snake_color, is_head=False, head_item=None):
+    """在像素坐标 (x, y) 画一节蛇身；蛇头从图块缓存 blit。"""
+    if is_head:
+        tile, (dx, dy) = sprites.head(snake_color, head_item)
+        surface.blit(tile, (x + dx, y + dy))
+    else:
+        surface.fill(snake_color, (x, y, CELL_SIZE, CELL_SIZE))
+
+def draw_snake(surface, snake_coords, snake_color, head_item=None):
+    """绘制蛇（使用选定的皮肤颜色），在蛇头上加上笑脸标识。
+       snake_coords 为 (x, y) 格子序列（蛇头在前），如 SnakeWorld 中的 deque。
+       如果 head_item 不为 None，则在蛇头上绘制头饰（简单用三角形表示）。"""
+    fill = surface.fill
+    for i, (cell_x, cell_y) in enumerate(snake_coords):
+        if i == 0:
+            draw_segment(surface, cell_x * CELL_SIZE, cell_y * CELL_SIZE, snake_color, True, head_item)
+        else:
+            fill(snake_color, (cell_x * CELL_SIZE, cell_y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+
+def draw_apple(surface, apple):
+    """绘制苹果（基于像素坐标）。"""
+    surface.fill(RED, (int(apple['x']), int(apple['y']), CELL_SIZE, CELL_SIZE))
+
+def draw_obstacles(surface, obstacles):
+    """绘制地图上的所有障碍物。"""
+    fill = surface.fill
+    for obs in obstacles:
+        fill(GRAY, (obs['x'] * CELL_SIZE, obs['y'] * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+
+def draw_overlay_menu(screen, font_overlay, muted):
+    """在屏幕左上角绘制始终可见的覆盖菜单。"""
+    pygame.draw.rect(screen, WHITE, OVERLAY_RESTART_RECT, 2)
+    pygame.draw.rect(screen, WHITE, OVERLAY_QUIT_RECT, 2)
+    pygame.draw.rect(screen, WHITE, OVERLAY_VOLUME_RECT, 2)
+    restart_text = render_text(font_overlay, "Restart", WHITE)
+    quit_text = render_text(font_overlay, "Quit", WHITE)
+    volume_text = render_text(font_overlay, "Volume: " + ("Off" if muted else "On"), WHITE)
+    screen.blit(restart_text, (OVERLAY_RESTART_RECT.x + 5, OVERLAY_RESTART_RECT.y + 5))
+    screen.blit(quit_text, (OVERLAY_QUIT_RECT.x + 5, OVERLAY_QUIT_RECT.y + 5))
+    screen.blit(volume_text, (OVERLAY_VOLUME_RECT.x + 5, OVERLAY_VOLUME_RECT.y + 5))
+
+def cells_in_rect(rect):
+    """与像素矩形 rect 相交的所有格子。"""
+    x0, y0 = rect.left // CELL_SIZE, rect.top // CELL_SIZE
+    x1, y1 = (rect.right - 1) // CELL_SIZE, (rect.bottom - 1) // CELL_SIZE
+    return {(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)}
+
+def hat_cells(head):
+    """蛇头之外被蛇头帽子盖到的格子：帽子伸进上方一格，右边缘还压着右侧一列像素。"""
+    x, y = head
+    return ((x, y - 1), (x + 1, y - 1), (x + 1, y))
+
+# --------------------- 增量绘制 ---------------------
+class BoardRenderer:
+    """
+    增量绘制一局游戏。每局（包括重启）创建一个，或在画面被外部覆盖后调用 invalidate()。
+
+    图层从下到上依次是：黑色棋盘和障碍、蛇头（帽子会伸进上方一格）、蛇身、苹果、覆盖菜单、提示文字，
+    与整屏绘制的叠放顺序一致。重画一个格子时先铺回背景，再按这个顺序把格子里的东西画回来。
+    两条蛇重叠在同一格等难以逐格还原的情况直接整屏重画，这在 2 Players 模式中也很少出现。
+
+    画面帧率高于模拟帧率时，draw() 的 alpha 给出两帧模拟之间的进度：上一帧模拟中前进了一格的蛇头
+    画在旧格子和新格子之间（叠在蛇身上面），其余内容仍按格子绘制。
+    """
+
+    def __init__(self, surface, overlay_font):
+        self.surface = surface
+        self.overlay_font = overlay_font
+        self.overlay_cells = cells_in_rect(OVERLAY_BOUNDS)
+        self.background = None
+        self.background_obstacles = None  # 画进 background 的障碍列表
+        self.invalidate()
+
+    def invalidate(self):
+        """下一次 draw() 整屏重画。"""
+        self.world = None
+        self.shadows = []  # 上一帧画出的每条蛇（格子 deque，蛇头在前）
+        self.owner = {}    # 格子 -> 画在上面的蛇编号
+        self.skins = None
+        self.apple = None
+        self.muted = None
+        self.hud = None
+        self.hud_text = None
+        self.hud_cells = set()
+        self.tick = None
+        self.moves = {}          # 蛇编号 -> (旧蛇头, 新蛇头)：上一帧模拟中前进了一格的蛇
+        self.motion_cells = set()  # 上一次绘制时插值蛇头盖到的格子
+
+    # ---- 单个元素 ----
+    # 直接在 surface 上画，画完后下一次 draw() 整屏重画
+    def clear(self):
+        self.surface.fill(BLACK)
+        self.world = None
+
+    def draw_obstacles(self, obstacles):
+        draw_obstacles(self.surface, obstacles)
+        self.world = None
+
+    def draw_snake(self, snake_coords, snake_color, head_item=None):
+        draw_snake(self.surface, snake_coords, snake_color, head_item)
+        self.world = None
+
+    def draw_apple(self, apple):
+        """apple 为格子坐标 (x, y)。"""
+        draw_apple(self.surface, {'x': apple[0] * CELL_SIZE, 'y': apple[1] * CELL_SIZE})
+        self.world = None
+
+    def draw_overlay_menu(self, font_overlay, muted):
+        draw_overlay_menu(self.surface, font_overlay, muted)
+        self.world = None
+
+    def draw(self, world, skins, show_apple=True, muted=False, hud=None, alpha=1.0):
+        """
+        把 world 的当前状态画到 surface 上，返回需要刷新的矩形列表，交给 pygame.display.update。
+        skins 为每条蛇的 (颜色, 头饰或 None)；show_apple 为 False 时不画苹果（2P 第二阶段）；
+        hud 为屏幕上方居中显示的提示文字；alpha 为两帧模拟之间的插值进度（1 表示不插值）。
+        """
+        apple = world.apple if show_apple else None
+        if world is self.world and skins == self.skins:
+            dirty = self._diff(world, apple, muted, hud, alpha)
+            if dirty is not None:
+                return self._repaint(world, dirty, skins, apple, muted, alpha)
+        return self._draw_full(world, skins, apple, muted, hud)
+
+    # ---- 整屏 ----
+    def _draw_full(self, world, skins, apple, muted, hud):
+        surface = self.surface
+        surface.blit(self._background(world), (0, 0))
+        for snake, (color, head_item) in zip(world.snakes, skins):
+            draw_snake(surface, snake, color, head_item)
+        if apple is not None:
+            draw_apple(surface, {'x': apple[0] * CELL_SIZE, 'y': apple[1] * CELL_SIZE})
+        draw_overlay_menu(surface, self.overlay_font, muted)
+        self._set_hud(hud)
+        if self.hud_text is not None:
+            surface.blit(self.hud_text, self._hud_pos())
+
+        self.world = world
+        self.skins = list(skins)
+        self.shadows = [deque(snake) for snake in world.snakes]
+        # 后画的蛇盖在上面
+        self.owner = {cell: i for i, snake in enumerate(world.snakes) for cell in snake}
+        self.apple = apple
+        self.muted = muted
+        self.tick = world.tick
+        self.moves = {}
+        self.motion_cells = set()
+        return [surface.get_rect()]
+
+    def _background(self, world):
+        """黑色棋盘加上本局的障碍。障碍整局不变，每局（障碍列表换了）只画一次。"""
+        if self.background_obstacles is not world.obstacles:
+            background = pygame.Surface(self.surface.get_size())
+            if pygame.display.get_surface() is not None:
+                background = background.convert(self.surface)
+            background.fill(BLACK)
+            draw_obstacles(background, world.obstacles)
+            self.background = background
+            self.background_obstacles = world.obstacles
+        return self.background
+
+    # ---- 增量 ----
+    def _diff(self, world, apple, muted, hud, alpha):
+        """比对上一帧，返回需要重画的格子集合；无法逐格还原时返回 None。"""
+        dirty = set()
+        moves = {}
+        for i, snake in enumerate(world.snakes):
+            shadow = self.shadows[i]
+            old_head = shadow[0]
+            # 本帧新长出的蛇头是 snake[:steps]
+            for steps in range(min(len(snake), MAX_STEPS_PER_FRAME + 1)):
+                if snake[steps] == old_head:
+                    break
+            else:
+                return None
+            for j in range(steps - 1, -1, -1):
+                cell = snake[j]
+                shadow.appendleft(cell)
+                self.owner[cell] = i
+                dirty.add(cell)
+            if steps:
+                dirty.add(old_head)
+                dirty.update(hat_cells(old_head))
+                if steps == 1:
+                    moves[i] = (old_head, snake[0])
+            while len(shadow) > len(snake):
+                cell = shadow.pop()
+                if self.owner.get(cell) == i:
+                    del self.owner[cell]
+                dirty.add(cell)
+            if shadow[-1] != snake[-1]:
+                return None
+
+        if world.tick != self.tick:
+            # 只有恰好推进了一帧模拟时才知道蛇头是从哪一格走过来的
+            self.moves = moves if world.tick == self.tick + 1 else {}
+            self.tick = world.tick
+        motion = set()
+        if alpha < 1:
+            for src, dst in self.moves.values():
+                motion.update((src, dst), hat_cells(src), hat_cells(dst))
+        dirty |= motion | self.motion_cells
+        self.motion_cells = motion
+
+        if apple != self.apple:
+            for cell in (self.apple, apple):
+                if cell is not None:
+                    dirty.add(cell)
+
+        if hud != self.hud:
+            old_cells = self.hud_cells
+            self._set_hud(hud)
+            dirty |= old_cells | self.hud_cells
+        overlay_changed = muted != self.muted
+
+        # 重画某格会盖住叠在它上面的东西，所以一直扩张到不再变化
+        while True:
+            size = len(dirty)
+            for snake in world.snakes:
+                head = snake[0]
+                hat = hat_cells(head)
+                if head in dirty or not dirty.isdisjoint(hat):
+                    dirty.add(head)
+                    dirty.update(hat)
+            if overlay_changed or not dirty.isdisjoint(self.overlay_cells):
+                dirty |= self.overlay_cells
+            if not dirty.isdisjoint(self.hud_cells):
+                dirty |= self.hud_cells
+            if len(dirty) == size:
+                break
+
+        grid = world.grid
+        dirty = {cell for cell in dirty if grid.in_bounds(*cell)}
+        for x, y in dirty:
+            count = grid.cells[y * grid.width + x]
+            if grid.has_body(x, y) and (count > 1 or (x, y) not in self.owner):
+                return None
+        return dirty
+
+    def _repaint(self, world, dirty, skins, apple, muted, alpha):
+        surface = self.surface
+        background = self._background(world)
+        rects = []
+        for x, y in dirty:
+            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+            surface.blit(background, rect, rect)
+            rects.append(rect)
+
+        moving = self.moves if alpha < 1 else {}
+        heads = set()
+        for i, (snake, (color, head_item)) in enumerate(zip(world.snakes, skins)):
+            head = snake[0]
+            heads.add(head)
+            if head in dirty and i not in moving:
+                draw_segment(surface, head[0] * CELL_SIZE, head[1] * CELL_SIZE, color, True, head_item)
+        for cell in dirty:
+            if cell not in heads and cell in self.owner:
+                draw_segment(surface, cell[0] * CELL_SIZE, cell[1] * CELL_SIZE, skins[self.owner[cell]][0])
+        for i, (src, dst) in moving.items():
+            # 蛇头从 src 滑向 dst，身后用蛇身颜色补上
+            color, head_item = skins[i]
+            x = round((src[0] + (dst[0] - src[0]) * alpha) * CELL_SIZE)
+            y = round((src[1] + (dst[1] - src[1]) * alpha) * CELL_SIZE)
+            trail = pygame.Rect(src[0] * CELL_SIZE, src[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+            surface.fill(color, trail.union(pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)))
+            draw_segment(surface, x, y, color, True, head_item)
+        if apple is not None and apple in dirty:
+            draw_apple(surface, {'x': apple[0] * CELL_SIZE, 'y': apple[1] * CELL_SIZE})
+        if not dirty.isdisjoint(self.overlay_cells):
+            draw_overlay_menu(surface, self.overlay_font, muted)
+        if self.hud_text is not None and not dirty.isdisjoint(self.hud_cells):
+            surface.blit(self.hud_text, self._hud_pos())
+
+        self.apple = apple
+        self.muted = muted
+        return rects
+
+    # ---- 提示文字 ----
+    def _hud_pos(self):
+        return (self.surface.get_width() // 2 - 100, 20)
+
+    def _set_hud(self, hud):
+        self.hud = hud
+        if hud is None:
+            self.hud_text = None
+            self.hud_cells = set()
+        else:
+            self.hud_text = render_text(self.overlay_font, hud, WHITE)
+            self.hud_cells = cells_in_rect(self.hud_text.get_rect(topleft=self._hud_pos()))
+
+# --------------------- Arena：镜头 ---------------------
+ZOOM_LEVELS = (8, 12, 20, 30)  # 各级缩放下每格的像素数
+
+class Camera:
+    """
+    大棋盘上的镜头：窗口显示以 (center_x, center_y)（格子坐标，可以是小数）为中心的一块。
+    follow() 每画一帧让镜头向目标靠近一段，画面平滑滚动；镜头不会移出棋盘，
+    棋盘比窗口小时居中显示。
+    """
+
+    def __init__(self, view_width, view_height, board_width, board_height, zoom=2):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.board_width = board_width
+        self.board_height = board_height
+        self.zoom = zoom
+        self.center_x = board_width / 2
+        self.center_y = board_height / 2
+
+    @property
+    def cell_size(self):
+        return ZOOM_LEVELS[self.zoom]
+
+    def zoom_by(self, step):
+        self.zoom = max(0, min(len(ZOOM_LEVELS) - 1, self.zoom + step))
+        self._clamp()
+
+    def follow(self, cell, smoothing=0.2):
+        """向格子 cell 的中心移动剩余距离的 smoothing 倍（1 表示直接跳过去）。"""
+        self.center_x += (cell[0] + 0.5 - self.center_x) * smoothing
+        self.center_y += (cell[1] + 0.5 - self.center_y) * smoothing
+        self._clamp()
+
+    def _clamp(self):
+        half_w = self.view_width / self.cell_size / 2
+        half_h = self.view_height / self.cell_size / 2
+        self.center_x = _clamp_center(self.center_x, half_w, self.board_width)
+        self.center_y = _clamp_center(self.center_y, half_h, self.board_height)
+
+    def origin(self):
+        """窗口左上角的像素坐标，对应到棋盘上的像素位置（格子 (x, y) 画在 x * cell_size - 返回值）。"""
+        size = self.cell_size
+        return (round(self.center_x * size - self.view_width / 2),
+                round(self.center_y * size - self.view_height / 2))
+
+    def visible(self):
+        """窗口里看得见的格子范围 (x0, y0, x1, y1)，不含 x1、y1，已裁到棋盘以内。"""
+        size = self.cell_size
+        left, top = self.origin()
+        return (max(0, left // size), max(0, top // size),
+                min(self.board_width, -(-(left + self.view_width) // size)),
+                min(self.board_height, -(-(top + self.view_height) // size)))
+
+    def to_cell(self, px, py):
+        """窗口中的像素坐标落在哪个格子上。"""
+        left, top = self.origin()
+        return ((px + left) // self.cell_size, (py + top) // self.cell_size)
+
+def _clamp_center(center, half_view, board):
+    if board <= 2 * half_view:
+        return board / 2
+    return max(half_view, min(board - half_view, center))
+
+# --------------------- Arena：绘制 ---------------------
+_OCCUPIED = re.compile(rb"[^\x00]")  # 一行格子里不为空的字节
+
+class ArenaRenderer:
+    """
+    Arena 模式的绘制后端，接口与 BoardRenderer 相同。镜头每帧都在动，所以每帧都整窗重画，
+    但只画 camera 看得见的格子：每一行先在 C 层面跳过空格（占用网格的一段字节切片），
+    只对有东西的格子调用 fill；蛇头和苹果按蛇和苹果逐个判断是否在窗口内。
+    因此每帧的开销只与窗口里的格子数、其中被占用的格子数和蛇的条数有关，与整个棋盘的大小无关。
+    蛇身的颜色取 world.owners 中压在这一格上编号最小的蛇。
+    """
+
+    def __init__(self, surface, overlay_font, camera):
+        self.surface = surface
+        self.overlay_font = overlay_font
+        self.camera = camera
+
+    def invalidate(self):
+        pass  # 每帧都整窗重画
+
+    def draw(self, world, skins, show_apple=True, muted=False, hud=None, alpha=1.0):
+        """画出镜头里的一帧，返回需要刷新的矩形列表。alpha 不使用，画面靠镜头的平滑滚动显得连贯。"""
+        surface = self.surface
+        camera = self.camera
+        size = camera.cell_size
+        left, top = camera.origin()
+        x0, y0, x1, y1 = camera.visible()
+        surface.fill(BLACK)
+
+        cells = world.grid.cells
+        masks = world.owners.masks
+        width = world.width
+        fill = surface.fill
+        for y in range(y0, y1):
+            start = y * width + x0
+            row = cells[start:start + x1 - x0]
+            py = y * size - top
+            for match in _OCCUPIED.finditer(row):
+                dx = match.start()
+                if row[dx] == OBSTACLE:
+                    color = GRAY
+                else:
+                    mask = masks[start + dx]
+                    color = skins[(mask & -mask).bit_length() - 1][0]
+                fill(color, ((x0 + dx) * size - left, py, size, size))
+
+        for snake, (color, head_item) in zip(world.snakes, skins):
+            if snake:
+                hx, hy = snake[0]
+                if x0 <= hx < x1 and y0 <= hy < y1:
+                    tile, (dx, dy) = sprites.head(color, head_item, size)
+                    surface.blit(tile, (hx * size - left + dx, hy * size - top + dy))
+        if show_apple:
+            for ax, ay in world.apples:
+                if x0 <= ax < x1 and y0 <= ay < y1:
+                    fill(RED, (ax * size - left, ay * size - top, size, size))
+
+        draw_overlay_menu(surface, self.overlay_font, muted)
+        if hud is not None:
+            text = render_text(self.overlay_font, hud, WHITE)
+            surface.blit(text, (surface.get_width() // 2 - 100, 20))
+        return [surface.get_rect()]
+
+    # ---- 单个元素（格子坐标，换算到镜头里） ----
+    def clear(self):
+        self.surface.fill(BLACK)
+
+    def draw_obstacles(self, obstacles):
+        size = self.camera.cell_size
+        left, top = self.camera.origin()
+        for obs in obstacles:
+            self.surface.fill(GRAY, (obs['x'] * size - left, obs['y'] * size - top, size, size))
+
+    def draw_snake(self, snake_coords, snake_color, head_item=None):
+        size = self.camera.cell_size
+        left, top = self.camera.origin()
+        for i, (x, y) in enumerate(snake_coords):
+            if i == 0:
+                tile, (dx, dy) = sprites.head(snake_color, head_item, size)
+                self.surface.blit(tile, (x * size - left + dx, y * size - top + dy))
+            else:
+                self.surface.fill(snake_color, (x * size - left, y * size - top, size, size))
+
+    def draw_apple(self, apple):
+        size = self.camera.cell_size
+        left, top = self.camera.origin()
+        self.surface.fill(RED, (apple[0] * size - left, apple[1] * size - top, size, size))
+
+    def draw_overlay_menu(self, font_overlay, muted):
+        draw_overlay_menu(self.surface, font_overlay, muted)
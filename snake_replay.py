@@ -0,0 +1,386 @@
+"""
+对局录像：只记录本局的随机种子和每帧的输入，回放时重新模拟，得到逐帧相同的对局。
+
+文件格式（整数都用无符号 LEB128 变长编码，下称 varint）：
+    头部  b"SNKR"、版本、模式、AI（各 1 字节；AI 为 greedy / path / 无 = 0~2），然后是 varint 的宽、高、种子（Arena 模式再加一个蛇数）
+    输入  varint(距上一条记录的帧数 << 1)，后跟动作字节：每名玩家 3 位，
+          1 位“有输入”加 2 位方向（UP/DOWN/LEFT/RIGHT = 0~3），从低位依次排列
+    结尾  varint(距上一条记录的帧数 << 1 | 1)、结束原因（1 字节）、每条蛇的长度（varint）
+没有输入、或输入与当前方向相同的帧不占空间。程序被强行关闭时文件没有结尾，回放到最后一条记录为止。
+
+    python snake_replay.py verify replays/xxx.snkr   # 无界面全速回放，校验结局是否与录制时一致
+    python snake_replay.py play replays/xxx.snkr     # 打开窗口回放：空格暂停，左右键后退/前进 5 秒，上下键调速
+    python snake_replay.py thumbs replays/*.snkr --out thumbs   # 每个录像的最后一帧存成 PNG（需要 numpy）
+"""
+import argparse, copy, io, os, time, weakref
+from bisect import bisect_right
+from snake_world import (
+    SnakeWorld, UP, DOWN, LEFT, RIGHT, MODE_SNAKE, MODE_APPLE, MODE_2PLAYERS, MODE_ARENA,
+    DEATH_WALL, DEATH_BODY, DEATH_EATEN, BOARD_FULL, LAST_STANDING, get_snake_direction,
+)
+from snake_ai import PathfindingController
+
+MAGIC = b"SNKR"
+VERSION = 3
+# 版本 1 录制时 2 Players 第 2 阶段还没有迎头相撞和咬到自己的规则，出现过这两种情况的对局回放结果会不同；
+# 版本 2 录制时 Arena 模式迎头相撞的蛇只是停在原地，出现过迎头相撞的 Arena 对局回放结果会不同
+READABLE_VERSIONS = (1, 2, 3)
+REPLAY_DIR = "replays"
+REPLAY_SUFFIX = ".snkr"
+
+MODES = [MODE_SNAKE, MODE_APPLE, MODE_2PLAYERS, MODE_ARENA]
+AIS = ["greedy", "path", None]  # None：蛇都由玩家或外部控制器操作，世界中没有 AI
+DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
+DIRECTION_CODES = {d: i for i, d in enumerate(DIRECTIONS)}
+CAUSES = [None, DEATH_WALL, DEATH_BODY, DEATH_EATEN, BOARD_FULL, LAST_STANDING]
+
+SNAPSHOT_INTERVAL = 256  # 回放时每隔这么多帧保存一次世界快照，用于快退
+
+class ReplayError(ValueError):
+    """录像文件损坏或格式不对。"""
+
+# --------------------- varint ---------------------
+def encode_varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+def read_varint(data, pos):
+    """从 data[pos:] 读一个 varint，返回 (数值, 新位置)；数据不完整时抛出 IndexError。"""
+    n = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+def make_replay_world(mode, width, height, ai, players):
+    """按录像头部的信息创建世界；Apple 模式中由 ai 指定的 AI 控制蛇。"""
+    if ai is None:
+        return SnakeWorld(mode, width, height, players=players)
+    snake_ai = PathfindingController() if ai == "path" else get_snake_direction
+    return SnakeWorld(mode, width, height, snake_ai=snake_ai, players=players)
+
+# --------------------- 录制 ---------------------
+class ReplayWriter:
+    """
+    边玩边写的录像。每帧模拟之前调用 tick(actions, world.directions)，对局结束（或放弃）时调用 close(world)。
+    写入经过缓冲，没有输入的帧只加一个计数，录制几乎不增加每帧的开销。
+    """
+
+    def __init__(self, file, world, ai="path"):
+        if isinstance(file, (str, os.PathLike)):
+            file = open(file, "wb", buffering=io.DEFAULT_BUFFER_SIZE * 8)
+            # 程序直接退出（例如关窗口时 sys.exit）也把缓冲区写进文件
+            self._finalizer = weakref.finalize(self, file.close)
+        else:
+            self._finalizer = None
+        self.file = file
+        self.players = world.players
+        self.action_bytes = (3 * self.players + 7) // 8
+        self.ticks = 0
+        self.last = 0
+        self.closed = False
+        file.write(MAGIC + bytes([VERSION, MODES.index(world.mode), AIS.index(ai)]))
+        file.write(encode_varint(world.width) + encode_varint(world.height) + encode_varint(world.seed))
+        if world.mode == MODE_ARENA:
+            file.write(encode_varint(world.players))
+
+    def tick(self, actions, current=None):
+        """记录下一帧的输入。current 为执行前各玩家的方向，与之相同的输入不会改变什么，不记录。"""
+        self.ticks += 1
+        code = 0
+        for i, action in enumerate(actions):
+            if action is not None and (current is None or action != current[i]):
+                code |= (4 | DIRECTION_CODES[action]) << (3 * i)
+        if code:
+            self.file.write(encode_varint((self.ticks - self.last) << 1) + code.to_bytes(self.action_bytes, "little"))
+            self.last = self.ticks
+
+    def close(self, world=None):
+        """写入结尾（对局结束的帧、结束原因和各蛇长度）并关闭文件。"""
+        if self.closed:
+            return
+        self.closed = True
+        footer = bytearray(encode_varint((self.ticks - self.last) << 1 | 1))
+        if world is not None:
+            footer.append(CAUSES.index(world.death_cause))
+            for snake in world.snakes:
+                footer += encode_varint(len(snake))
+        self.file.write(footer)
+        if self._finalizer is not None:
+            self._finalizer()
+        else:
+            self.file.flush()
+
+def start_recording(world, ai="path", directory=REPLAY_DIR):
+    """为 world 的这一局在 directory 下新建录像文件，返回 ReplayWriter。"""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{world.mode.lower()}_{time.strftime('%Y%m%d_%H%M%S')}_{world.seed}{REPLAY_SUFFIX}"
+    return ReplayWriter(os.path.join(directory, name), world, ai)
+
+# --------------------- 读取 ---------------------
+class Replay:
+    """
+    解码后的录像：mode、ai、width、height、seed、players（蛇数），
+    inputs 为 {帧号: 各玩家动作列表}（帧号从 1 开始，与 world.tick 相同），
+    end_tick 为最后一帧（没有结尾时为最后一条输入所在帧），
+    end_cause、lengths 为录制时的结局（没有结尾或对局被放弃时 end_cause 为 None）。
+    """
+
+    def __init__(self, mode, ai, width, height, seed, players):
+        self.mode = mode
+        self.players = players
+        self.ai = ai
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.inputs = {}
+        self.end_tick = 0
+        self.complete = False
+        self.end_cause = None
+        self.lengths = None
+
+def read_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode_replay(data)
+
+def decode_replay(data):
+    if len(data) < 7 or data[:4] != MAGIC:
+        raise ReplayError("not a snake replay file")
+    if data[4] not in READABLE_VERSIONS:
+        raise ReplayError(f"unsupported replay version {data[4]}")
+    try:
+        (width, height, seed), pos = _read_varints(data, 7, 3)
+        mode = MODES[data[5]]
+        if mode == MODE_ARENA:
+            players, pos = read_varint(data, pos)
+        else:
+            players = 2 if mode == MODE_2PLAYERS else 1
+        replay = Replay(mode, AIS[data[6]], width, height, seed, players)
+    except IndexError:
+        raise ReplayError("truncated replay header") from None
+    action_bytes = (3 * players + 7) // 8
+    tick = 0
+    try:
+        while pos < len(data):
+            value, pos = read_varint(data, pos)
+            tick += value >> 1
+            if value & 1:
+                replay.end_tick = tick
+                replay.complete = True
+                if pos < len(data):
+                    replay.end_cause = CAUSES[data[pos]]
+                    replay.lengths, pos = _read_varints(data, pos + 1, players)
+                break
+            if pos + action_bytes > len(data):
+                break
+            code = int.from_bytes(data[pos:pos + action_bytes], "little")
+            pos += action_bytes
+            replay.inputs[tick] = [
+                DIRECTIONS[(code >> (3 * i)) & 3] if (code >> (3 * i)) & 4 else None
+                for i in range(players)
+            ]
+            replay.end_tick = tick
+    except IndexError:
+        pass  # 最后一条记录写了一半：回放到前一条为止
+    return replay
+
+def _read_varints(data, pos, count):
+    values = []
+    for _ in range(count):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values, pos
+
+# --------------------- 回放 ---------------------
+class ReplayPlayer:
+    """
+    按录像重新模拟。step() 推进一帧；seek(tick) 跳到任意一帧：
+    向前直接快进，向后从不晚于目标帧的最近一个快照恢复后再快进。
+    """
+
+    def __init__(self, replay, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.replay = replay
+        self.snapshot_interval = snapshot_interval
+        self.no_input = [None] * replay.players
+        self.world = make_replay_world(replay.mode, replay.width, replay.height, replay.ai, replay.players)
+        self.world.reset(replay.seed)
+        self.snapshot_ticks = [0]
+        self.snapshots = {0: copy.deepcopy(self.world)}
+
+    @property
+    def tick(self):
+        return self.world.tick
+
+    @property
+    def done(self):
+        return self.world.game_over or self.world.tick >= self.replay.end_tick
+
+    def step(self):
+        """推进一帧并返回本帧的事件；回放结束后返回空列表。"""
+        if self.done:
+            return []
+        world = self.world
+        events = world.step(self.replay.inputs.get(world.tick + 1, self.no_input))
+        if world.tick % self.snapshot_interval == 0 and world.tick not in self.snapshots:
+            self.snapshot_ticks.append(world.tick)
+            self.snapshots[world.tick] = copy.deepcopy(world)
+        return events
+
+    def seek(self, tick):
+        tick = max(0, min(tick, self.replay.end_tick))
+        if tick < self.world.tick:
+            base = self.snapshot_ticks[bisect_right(self.snapshot_ticks, tick) - 1]
+            self.world = copy.deepcopy(self.snapshots[base])
+        while self.world.tick < tick and not self.done:
+            self.step()
+
+    def run_to_end(self):
+        while not self.done:
+            self.step()
+
+def verify(path):
+    """无界面全速回放，返回 (是否与录制时的结局一致, 帧数, 每秒帧数)。"""
+    replay = read_replay(path)
+    player = ReplayPlayer(replay)
+    start = time.perf_counter()
+    player.run_to_end()
+    elapsed = time.perf_counter() - start
+    world = player.world
+    ok = world.tick == replay.end_tick
+    if replay.complete and replay.lengths is not None:
+        ok = ok and world.death_cause == replay.end_cause and [len(s) for s in world.snakes] == replay.lengths
+    return ok, world.tick, world.tick / elapsed if elapsed > 0 else float("inf")
+
+REPLAY_SKINS = [((0, 255, 0), None), ((255, 0, 0), None), ((0, 128, 255), None), ((255, 255, 0), None),
+                ((255, 0, 255), None), ((0, 255, 255), None), ((255, 128, 0), None), ((160, 96, 255), None)]
+
+def draw_replay_frame(renderer, world):
+    """用任一绘制后端画出回放中的一帧（2P 第二阶段不画苹果）。"""
+    renderer.clear()
+    renderer.draw_obstacles(world.obstacles)
+    for i, snake in enumerate(world.snakes):
+        if snake:
+            color, head_item = REPLAY_SKINS[i % len(REPLAY_SKINS)]
+            renderer.draw_snake(snake, color, head_item)
+    if world.mode == MODE_ARENA:
+        for apple in world.apples:
+            renderer.draw_apple(apple)
+    elif world.apple is not None and world.phase == 1:
+        renderer.draw_apple(world.apple)
+
+def thumbnail(path, tick=None, scale=4):
+    """回放到第 tick 帧（None 表示最后一帧），返回这一帧的 (高, 宽, 3) uint8 图像。"""
+    from snake_framebuffer import FramebufferRenderer
+    replay = read_replay(path)
+    player = ReplayPlayer(replay)
+    if tick is None:
+        player.run_to_end()
+    else:
+        player.seek(tick)
+    framebuffer = FramebufferRenderer(replay.width, replay.height)
+    draw_replay_frame(framebuffer, player.world)
+    return framebuffer.image(scale)
+
+PLAY_WINDOW = (1000, 800)  # Arena 录像回放窗口的最大尺寸
+
+def play(path, speed=1.0):
+    """
+    打开窗口回放录像，经 BoardRenderer 绘制。Arena 模式的棋盘可能比屏幕大，
+    窗口不超过 PLAY_WINDOW，经 ArenaRenderer 的镜头跟着编号最小的活着的蛇。
+    """
+    import pygame
+    from snake_clock import FixedTimestep, TICK_RATE, DISPLAY_FPS
+    from snake_render import CELL_SIZE, WHITE, BoardRenderer, ArenaRenderer, Camera, get_font, render_text
+
+    replay = read_replay(path)
+    player = ReplayPlayer(replay)
+    pygame.init()
+    size = (replay.width * CELL_SIZE, replay.height * CELL_SIZE)
+    camera = None
+    if replay.mode == MODE_ARENA:
+        size = (min(size[0], PLAY_WINDOW[0]), min(size[1], PLAY_WINDOW[1]))
+        camera = Camera(size[0], size[1], replay.width, replay.height)
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(f"Replay: {os.path.basename(path)}")
+    clock = pygame.time.Clock()
+    font = get_font(24)
+    renderer = BoardRenderer(screen, font) if camera is None else ArenaRenderer(screen, font, camera)
+    jump = 5 * TICK_RATE
+    paused = False
+    timestep = FixedTimestep(TICK_RATE * speed, max_catch_up=1000)
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.tick + jump)
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.tick - jump)
+                elif event.key in (pygame.K_UP, pygame.K_DOWN):
+                    speed = speed * 2 if event.key == pygame.K_UP else max(speed / 2, 0.25)
+                    timestep = FixedTimestep(TICK_RATE * speed, max_catch_up=1000)
+        due = timestep.advance()
+        if not paused:
+            for _ in range(due):
+                player.step()
+
+        world = player.world
+        if camera is not None:
+            followed = next((snake for snake in world.snakes if snake), None)
+            if followed:
+                camera.follow(followed[0])
+        draw_replay_frame(renderer, world)
+        status = f"tick {world.tick}/{replay.end_tick}  x{speed:g}" + ("  paused" if paused else "")
+        screen.blit(render_text(font, status, WHITE), (10, 10))
+        pygame.display.update()
+        clock.tick(DISPLAY_FPS)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or play back snake replays.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("verify", help="replay without a display and check the recorded outcome")
+    check.add_argument("files", nargs="+")
+    show = sub.add_parser("play", help="play a replay in a window")
+    show.add_argument("file")
+    show.add_argument("--speed", type=float, default=1.0)
+    thumbs = sub.add_parser("thumbs", help="save a PNG thumbnail of each replay (needs numpy)")
+    thumbs.add_argument("files", nargs="+")
+    thumbs.add_argument("--out", default="thumbs", help="output directory")
+    thumbs.add_argument("--tick", type=int, default=None, help="frame to capture (default: the last one)")
+    thumbs.add_argument("--scale", type=int, default=4, help="pixels per cell")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        failed = 0
+        for path in args.files:
+            ok, ticks, rate = verify(path)
+            failed += not ok
+            print(f"{'OK  ' if ok else 'FAIL'} {path}: {ticks} ticks ({rate:.0f} ticks/s)")
+        raise SystemExit(1 if failed else 0)
+    if args.command == "thumbs":
+        from snake_framebuffer import save_png
+        os.makedirs(args.out, exist_ok=True)
+        start = time.perf_counter()
+        for path in args.files:
+            name = os.path.splitext(os.path.basename(path))[0] + ".png"
+            save_png(os.path.join(args.out, name), thumbnail(path, args.tick, args.scale))
+        elapsed = time.perf_counter() - start
+        print(f"{len(args.files)} thumbnails in {elapsed:.2f}s")
+        return
+    play(args.file, args.speed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+存档：游戏线程只把最新的存档内容交给 AutoSaver，写盘全部在后台线程里完成，不会卡住游戏循环。
+
+    autosave = AutoSaver("savegame.json")
+    autosave.update(record)   # 金币、购买、升级等每次变化后调用，只复制一份字典
+    autosave.close()          # 退出前调用：立即写入存档并等后台线程结束
+    record = load_record("savegame.json")
+
+后台线程收到新内容后马上追加一行到日志文件（savegame.json.journal），进程被强行杀掉也不丢；
+内容停止变化 SAVE_DELAY 秒后（一直在变化时最多 SAVE_MAX_DELAY 秒）才原子地重写存档本身：
+先写临时文件并 fsync，再 rename 覆盖，写到一半崩溃也不会损坏旧存档。存档写好后清空日志。
+每份内容带一个递增的序号 seq，读取时取存档和日志里序号最大的一份。
+
+存档内容带版本号 version（见 SAVE_VERSION）。已购买的皮肤、头饰存成位掩码（十六进制字符串），
+商品再多存档也只长几个字符。encode_record / decode_record 在游戏用的字段和存档格式之间转换，
+读取时先用 migrate 把旧版本升级到当前版本，再检查各字段，不合法的值换成默认值。
+游戏用 open_record 读取：存档比程序新或读不出时先备份（savegame.json.bak），不会被新进度覆盖掉。
+"""
+import atexit, json, os, shutil, tempfile, threading, time
+
+SAVE_PATH = "savegame.json"
+JOURNAL_SUFFIX = ".journal"
+BACKUP_SUFFIX = ".bak"
+SAVE_DELAY = 1.0       # 内容停止变化这么多秒后写存档，把连续吃苹果之类的频繁变化合并成一次写入
+SAVE_MAX_DELAY = 10.0  # 内容一直在变化时，最多隔这么多秒也写一次存档
+
+SAVE_VERSION = 2
+DEFAULT_COINS = 1000
+DEFAULT_SKIN = 1          # 新存档自带并选中的皮肤
+DEFAULT_REPUTATION_COST = 50
+
+# --------------------- 文件读写 ---------------------
+def write_atomic(path, data):
+    """把 bytes 原子地写到 path：要么是完整的新内容，要么还是旧文件。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    # rename 本身也要落盘（Windows 上不能打开目录，跳过）
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def _read_json(path):
+    try:
+        with open(path, "r") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return record if isinstance(record, dict) else None
+
+def _read_journal(path):
+    """日志里完整的最后一份内容；最后一行写了一半时忽略它。"""
+    latest = None
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    latest = record
+    except OSError:
+        return None
+    return latest
+
+def load_record(path=SAVE_PATH):
+    """读取存档，日志里有更新的内容时用日志的。没有存档（或存档损坏且没有日志）时返回 None。"""
+    candidates = [r for r in (_read_json(path), _read_journal(path + JOURNAL_SUFFIX)) if r is not None]
+    if not candidates:
+        return None
+    record = max(candidates, key=lambda r: r.get("seq", 0))
+    return {k: v for k, v in record.items() if k != "seq"}
+
+def backup_save(path=SAVE_PATH):
+    """把存档和日志原样复制成 path.bak（已有时为 path.bak.1、path.bak.2 ……），返回备份的路径。"""
+    backup = path + BACKUP_SUFFIX
+    n = 0
+    while os.path.exists(backup) or os.path.exists(backup + JOURNAL_SUFFIX):
+        n += 1
+        backup = f"{path}{BACKUP_SUFFIX}.{n}"
+    for src, dst in ((path, backup), (path + JOURNAL_SUFFIX, backup + JOURNAL_SUFFIX)):
+        if os.path.exists(src):
+            shutil.copy2(src, dst)
+    return backup
+
+def open_record(path=SAVE_PATH):
+    """
+    读取存档供游戏使用，返回 (存档内容, 是否应按当前版本重写)：只有旧版本的存档成功升级后才需要重写。
+    存档版本比程序新、升级失败或文件损坏读不出时，先用 backup_save 备份再返回 (None, False)，
+    游戏以新存档的默认进度开始，之后的自动存档不会毁掉原来的进度。
+    """
+    record = load_record(path)
+    if record is None:
+        if os.path.exists(path) or os.path.exists(path + JOURNAL_SUFFIX):
+            backup_save(path)
+        return None, False
+    try:
+        migrated = migrate(record)
+    except ValueError:
+        backup_save(path)
+        return None, False
+    return record, migrated is not record
+
+# --------------------- 存档格式 ---------------------
+def pack_flags(flags):
+    """布尔列表 -> 十六进制位掩码字符串，第 i 位对应 flags[i]。"""
+    mask = 0
+    for i, flag in enumerate(flags):
+        if flag:
+            mask |= 1 << i
+    return format(mask, "x")
+
+def unpack_flags(mask, count):
+    """
+    十六进制位掩码字符串 -> 布尔列表，至少 count 项；不是十六进制整数或为负数时抛出 ValueError。
+    超出 count 的位原样保留在列表末尾（商品目录删掉或挪动了商品时），pack_flags 写回存档时不会丢。
+    """
+    value = int(mask, 16)
+    if value < 0:
+        raise ValueError(f"negative flag mask {mask!r}")
+    return [bool(value >> i & 1) for i in range(max(count, value.bit_length()))]
+
+def _migrate_v1(record):
+    """版本 1（没有 version 字段）：已购买的皮肤、头饰是布尔列表。"""
+    record = dict(record, version=2)
+    for key, new_key in (("purchased_skins", "skins_owned"), ("purchased_heads", "heads_owned")):
+        flags = record.pop(key, None)
+        if isinstance(flags, list):
+            record[new_key] = pack_flags(flags)
+    return record
+
+# 版本 n 的存档经 MIGRATIONS[n] 升级为版本 n + 1
+MIGRATIONS = {1: _migrate_v1}
+
+def migrate(record):
+    """把任意旧版本的存档内容升级到 SAVE_VERSION，已是当前版本时原样返回；比当前程序还新或不合法的版本抛出 ValueError。"""
+    version = record.get("version", 1)
+    if type(version) is not int or not 1 <= version <= SAVE_VERSION:
+        raise ValueError(f"unsupported save version {version!r}")
+    while version < SAVE_VERSION:
+        record = MIGRATIONS[version](record)
+        version = record["version"]
+    return record
+
+def encode_record(coin_count, purchased_skins, selected_skin, purchased_heads, selected_head,
+                  reputation_level, reputation_upgrade_cost):
+    """游戏里的进度 -> 当前版本的存档内容。"""
+    return {
+        "version": SAVE_VERSION,
+        "coin_count": coin_count,
+        "skins_owned": pack_flags(purchased_skins),
+        "selected_skin": selected_skin,
+        "heads_owned": pack_flags(purchased_heads),
+        "selected_head": selected_head,
+        "reputation_level": reputation_level,
+        "reputation_upgrade_cost": reputation_upgrade_cost,
+    }
+
+def _int_field(record, key, default, low=0, high=None):
+    value = record.get(key)
+    if type(value) is not int or value < low or (high is not None and value > high):
+        return default
+    return value
+
+def _flags_field(record, key, count):
+    mask = record.get(key)
+    try:
+        return unpack_flags(mask, count)
+    except (TypeError, ValueError):
+        return None
+
+def decode_record(record, skin_count, head_count):
+    """
+    存档内容（任意版本，None 表示没有存档）-> 游戏里的进度字典，
+    键与 encode_record 的参数相同。缺失或不合法的字段用新存档的默认值。
+    """
+    try:
+        record = migrate(record) if isinstance(record, dict) else {}
+    except ValueError:
+        record = {}
+    purchased_skins = _flags_field(record, "skins_owned", skin_count)
+    if purchased_skins is None:
+        purchased_skins = [i == DEFAULT_SKIN for i in range(skin_count)]
+    purchased_heads = _flags_field(record, "heads_owned", head_count) or [False] * head_count
+    return {
+        "coin_count": _int_field(record, "coin_count", DEFAULT_COINS),
+        "purchased_skins": purchased_skins,
+        "selected_skin": _int_field(record, "selected_skin", DEFAULT_SKIN, 0, skin_count - 1),
+        "purchased_heads": purchased_heads,
+        "selected_head": _int_field(record, "selected_head", -1, -1, head_count - 1),
+        "reputation_level": _int_field(record, "reputation_level", 0),
+        "reputation_upgrade_cost": _int_field(record, "reputation_upgrade_cost", DEFAULT_REPUTATION_COST),
+    }
+
+# --------------------- 自动存档 ---------------------
+class AutoSaver:
+    """
+    在后台线程里保存存档。update() 可以在任何线程、任意频繁地调用：
+    相同的内容不重复写，来不及写的旧内容直接被新内容替换。
+    后台线程在第一次 update() 时才启动。
+    """
+
+    def __init__(self, path=SAVE_PATH, delay=SAVE_DELAY, max_delay=SAVE_MAX_DELAY):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.delay = delay
+        self.max_delay = max_delay
+        self.cond = threading.Condition()
+        self.seq = 0          # 最近写进日志的序号，只在后台线程里使用
+        self.pending = None   # 还没写进日志的最新内容
+        self.dirty_since = None  # 日志里有、存档里还没有的内容最早出现的时间
+        self.last_change = 0.0
+        self.last = None      # 最近一次交给 update() 的内容，用于跳过没有变化的更新
+        self.flush_requested = False
+        self.closed = False
+        self.thread = None
+        self.error = None     # 后台写盘失败时的异常，下次写成功后清空
+        atexit.register(self.close)
+
+    def update(self, record):
+        """交给后台保存的新内容（普通字典，值为数字、字符串或列表）。"""
+        record = {k: list(v) if isinstance(v, list) else v for k, v in record.items()}
+        with self.cond:
+            if self.closed or record == self.last:
+                return
+            self.last = record
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+                self.thread.start()
+            self.pending = record
+            self.last_change = time.monotonic()
+            self.cond.notify()
+
+    def flush(self, timeout=None):
+        """立即把最新的内容写进存档，等写完再返回。"""
+        with self.cond:
+            if self.thread is None:
+                return
+            self.flush_requested = True
+            self.cond.notify()
+            self.cond.wait_for(lambda: not self.flush_requested, timeout)
+
+    def close(self, timeout=5.0):
+        """写完最新的内容后停止后台线程；之后的 update() 被忽略。"""
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify()
+            thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _initial_seq(self):
+        # 接着磁盘上已有内容的序号往下编，保证新写的内容序号更大（在后台线程里读，不占游戏线程的时间）
+        seqs = [r.get("seq", 0) for r in (_read_json(self.path), _read_journal(self.journal_path)) if r]
+        return max(seqs, default=0)
+
+    def _run(self):
+        journal = None
+        latest = None
+        self.seq = self._initial_seq()
+        try:
+            while True:
+                with self.cond:
+                    while True:
+                        if self.pending is not None or self.closed or self.flush_requested:
+                            break
+                        if self.dirty_since is None:
+                            self.cond.wait()
+                            continue
+                        now = time.monotonic()
+                        due = min(self.last_change + self.delay, self.dirty_since + self.max_delay)
+                        if now >= due:
+                            break
+                        self.cond.wait(due - now)
+                    record, self.pending = self.pending, None
+                    closing = self.closed
+                    flushing = self.flush_requested
+                    if record is not None and self.dirty_since is None:
+                        self.dirty_since = time.monotonic()
+                    dirty_since = self.dirty_since
+                    last_change = self.last_change
+
+                if record is not None:
+                    self.seq += 1
+                    latest = dict(record, seq=self.seq)
+                    line = json.dumps(latest, separators=(",", ":")) + "\n"
+                    try:
+                        if journal is None:
+                            journal = open(self.journal_path, "a")
+                        # 只写到操作系统的缓存，不 fsync：进程被杀掉也会落盘，而且写得快
+                        journal.write(line)
+                        journal.flush()
+                    except OSError as e:
+                        self.error = e
+
+                now = time.monotonic()
+                due = dirty_since is not None and now >= min(last_change + self.delay, dirty_since + self.max_delay)
+                if latest is not None and dirty_since is not None and (due or closing or flushing):
+                    try:
+                        write_atomic(self.path, json.dumps(latest).encode())
+                        if journal is not None:
+                            journal.close()
+                            journal = None
+                        # 存档已经是最新的，清空日志
+                        open(self.journal_path, "w").close()
+                        self.error = None
+                        with self.cond:
+                            # 写的时候又来了新内容：从现在重新计时
+                            self.dirty_since = None if self.pending is None else time.monotonic()
+                    except OSError as e:
+                        self.error = e
+                        with self.cond:
+                            # 写失败了：过一个 delay 再试
+                            self.dirty_since = self.last_change = time.monotonic()
+                if flushing:
+                    with self.cond:
+                        self.flush_requested = False
+                        self.cond.notify_all()
+                if closing:
+                    return
+        finally:
+            if journal is not None:
+                journal.close()
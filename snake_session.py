@@ -0,0 +1,92 @@
+"""
+玩家进度：金币、已购买/选中的皮肤和头饰、声望等级。
+
+各个界面都拿同一个 GameSession 读写进度，不再把这些值一个个传进传出。
+修改进度一律通过 GameSession 的方法，改过的字段记在 dirty 里，
+save() 只在确实有变化时才交给自动存档，然后清空 dirty。不涉及 pygame。
+"""
+from snake_save import encode_record, decode_record
+
+REPUTATION_STEP = 50  # 每升一级，下一级的价格增加这么多金币
+
+class GameSession:
+    def __init__(self, coin_count, purchased_skins, selected_skin, purchased_heads, selected_head,
+                 reputation_level, reputation_upgrade_cost):
+        self.coin_count = coin_count
+        self.purchased_skins = purchased_skins
+        self.selected_skin = selected_skin
+        self.purchased_heads = purchased_heads
+        self.selected_head = selected_head
+        self.reputation_level = reputation_level
+        self.reputation_upgrade_cost = reputation_upgrade_cost
+        self.dirty = set()  # 上次保存以后改过的字段名
+
+    @classmethod
+    def from_record(cls, record, skin_count, head_count):
+        """从存档内容（任意版本，None 表示没有存档）创建，字段经过 decode_record 校验。"""
+        return cls(**decode_record(record, skin_count, head_count))
+
+    def to_record(self):
+        return encode_record(self.coin_count, self.purchased_skins, self.selected_skin, self.purchased_heads,
+                             self.selected_head, self.reputation_level, self.reputation_upgrade_cost)
+
+    def save(self, autosave):
+        """有改动时把进度交给 autosave（snake_save.AutoSaver），返回是否交了。"""
+        if not self.dirty:
+            return False
+        autosave.update(self.to_record())
+        self.dirty.clear()
+        return True
+
+    # --------------------- 修改进度 ---------------------
+    def add_coins(self, amount):
+        self.coin_count += amount
+        self.dirty.add("coin_count")
+
+    def spend(self, amount):
+        """金币够时扣除并返回 True，否则不变并返回 False。"""
+        if self.coin_count < amount:
+            return False
+        self.add_coins(-amount)
+        return True
+
+    def select_skin(self, index):
+        """选中皮肤（商店里也可以先选中没买的皮肤来预览），返回是否有变化。"""
+        if index == self.selected_skin:
+            return False
+        self.selected_skin = index
+        self.dirty.add("selected_skin")
+        return True
+
+    def select_head(self, index):
+        if index == self.selected_head:
+            return False
+        self.selected_head = index
+        self.dirty.add("selected_head")
+        return True
+
+    def buy_skin(self, index, price):
+        """花 price 金币买下并选中皮肤 index；金币不够时返回 False。"""
+        if not self.spend(price):
+            return False
+        self.purchased_skins[index] = True
+        self.dirty.add("purchased_skins")
+        self.select_skin(index)
+        return True
+
+    def buy_head(self, index, price):
+        if not self.spend(price):
+            return False
+        self.purchased_heads[index] = True
+        self.dirty.add("purchased_heads")
+        self.select_head(index)
+        return True
+
+    def upgrade_reputation(self, max_level):
+        """声望升一级（不超过 max_level）；金币不够或已到最高级时返回 False。"""
+        if self.reputation_level >= max_level or not self.spend(self.reputation_upgrade_cost):
+            return False
+        self.reputation_level += 1
+        self.reputation_upgrade_cost += REPUTATION_STEP
+        self.dirty.update(("reputation_level", "reputation_upgrade_cost"))
+        return True
@@ -0,0 +1,217 @@
+"""
+AI 锦标赛：让 Apple 模式中控制蛇的各个 AI 在同一批种子上各打一局，统计成绩。
+对局分成小批交给 ProcessPoolExecutor 的多个进程并行跑，每局一结束就写进结果文件（JSON Lines）并显示进度；
+中途被打断后用同样的命令再运行一次，已经写进结果文件的对局会跳过，只跑剩下的。
+
+    python snake_tournament.py --ai greedy path --seeds 1000 --out results.jsonl
+    python snake_tournament.py --out results.jsonl --summary   # 只统计已有的结果
+
+每局的苹果由 random_apple_controller 控制，随机数来自种子，同一个种子下各 AI 面对的是同一个棋盘。
+超过 max_ticks 帧（TIMEOUT）或连续 stall_ticks 帧没有吃到苹果（STALLED，AI 在原地兜圈子）时结束这一局。
+"""
+import argparse, json, os, random, statistics, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from snake_world import SnakeWorld, MODE_APPLE, CELL_WIDTH, CELL_HEIGHT, EVENT_APPLE_EATEN, get_snake_direction
+from snake_ai import PathfindingController
+from snake_headless import random_apple_controller
+
+# 各 AI 的构造函数：每局新建一个，路径缓存等状态不会带到下一局
+AIS = {
+    "greedy": lambda: get_snake_direction,
+    "path": PathfindingController,
+}
+
+TIMEOUT = "timeout"
+STALLED = "stalled"
+ERROR = "error"
+
+MAX_TICKS = 20000
+STALL_TICKS = 2000
+CHUNK_SIZE = 16  # 每个任务连续跑的对局数，减少进程间通信的次数
+
+# --------------------- 对局 ---------------------
+def run_match(ai, seed, max_ticks=MAX_TICKS, stall_ticks=STALL_TICKS, width=CELL_WIDTH, height=CELL_HEIGHT):
+    """
+    用种子 seed 跑一局，返回结果字典：ai、seed、apples（蛇吃到的苹果数）、ticks（撑过的帧数）、
+    cause（SnakeWorld 的结束原因，或 TIMEOUT / STALLED）。
+    """
+    world = SnakeWorld(MODE_APPLE, width, height, snake_ai=AIS[ai](), seed=seed)
+    apple = partial(random_apple_controller, rng=random.Random(seed))
+    apples = 0
+    last_apple = 0
+    cause = TIMEOUT
+    while world.tick < max_ticks:
+        for kind, _ in world.step([apple(world, 0)]):
+            if kind == EVENT_APPLE_EATEN:
+                apples += 1
+                last_apple = world.tick
+        if world.game_over:
+            cause = world.death_cause
+            break
+        if world.tick - last_apple >= stall_ticks:
+            cause = STALLED
+            break
+    return {"ai": ai, "seed": seed, "apples": apples, "ticks": world.tick, "cause": cause}
+
+def run_chunk(ai, seeds, max_ticks, stall_ticks):
+    """在工作进程中连续跑一批对局；某一局出错时记为 ERROR，不影响同一批的其他对局。"""
+    results = []
+    for seed in seeds:
+        try:
+            results.append(run_match(ai, seed, max_ticks, stall_ticks))
+        except Exception as e:
+            results.append({"ai": ai, "seed": seed, "apples": 0, "ticks": 0, "cause": ERROR, "error": repr(e)})
+    return results
+
+# --------------------- 结果文件 ---------------------
+# 第一行是锦标赛设置 {"settings": {...}}，之后每行一局的结果。每行写完才换行，
+# 进程被强行结束时最多留下一行没有换行符的残行，读取时忽略，续跑前截掉。
+def load_results(path, settings=None):
+    """
+    读取结果文件中完整的各行，返回结果列表；文件不存在时返回空列表。
+    给出 settings 时与文件中的设置比较，不同则抛出 ValueError，以免把不同设置下的成绩混在一起。
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+    lines = data[:data.rfind(b"\n") + 1].splitlines()
+    if not lines:
+        return []
+    header = json.loads(lines[0])
+    if settings is not None and header.get("settings") != settings:
+        raise ValueError(f"{path} was written with different settings: {header.get('settings')}")
+    results = []
+    for line in lines[1:]:
+        try:
+            results.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return results
+
+def open_results(path, settings):
+    """打开结果文件以便逐行追加：截掉末尾的残行，空文件先写设置行。"""
+    f = open(path, "ab+")
+    f.seek(0)
+    data = f.read()
+    f.truncate(data.rfind(b"\n") + 1)
+    f.close()
+    f = open(path, "a")
+    if f.tell() == 0:
+        f.write(json.dumps({"settings": settings}) + "\n")
+        f.flush()
+    return f
+
+# --------------------- 锦标赛 ---------------------
+def run_tournament(ais, seeds, out, workers=None, max_ticks=MAX_TICKS, stall_ticks=STALL_TICKS,
+                   chunk_size=CHUNK_SIZE, progress=True):
+    """
+    让 ais 中的每个 AI 在 seeds 上各跑一局，结果逐局追加到 out，返回全部结果（包括以前跑完的）。
+    workers 为进程数（None 为 CPU 核数）。被 Ctrl+C 打断时已完成的对局都已写入 out，然后重新抛出 KeyboardInterrupt。
+    """
+    settings = {"max_ticks": max_ticks, "stall_ticks": stall_ticks}
+    results = load_results(out, settings)
+    done = {(r["ai"], r["seed"]) for r in results}
+    tasks = []
+    for ai in ais:
+        pending = [seed for seed in seeds if (ai, seed) not in done]
+        for i in range(0, len(pending), chunk_size):
+            tasks.append((ai, pending[i:i + chunk_size]))
+    total = sum(len(chunk) for _, chunk in tasks)
+    if progress and done:
+        print(f"resuming: {len(done)} matches already in {out}, {total} to go")
+
+    f = open_results(out, settings)
+    start = time.perf_counter()
+    finished = 0
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(run_chunk, ai, chunk, max_ticks, stall_ticks) for ai, chunk in tasks]
+        for future in as_completed(futures):
+            chunk = future.result()
+            for result in chunk:
+                f.write(json.dumps(result) + "\n")
+            f.flush()
+            results.extend(chunk)
+            finished += len(chunk)
+            if progress:
+                rate = finished / (time.perf_counter() - start)
+                print(f"\r{finished}/{total} matches ({rate:.1f}/s)", end="", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    else:
+        executor.shutdown()
+    finally:
+        f.close()
+        if progress and total:
+            print(file=sys.stderr)
+    return results
+
+def summarize(results):
+    """按 AI 汇总：{ai: {matches, apples_mean, apples_median, apples_p10, apples_p90, ticks_mean, causes}}。"""
+    by_ai = {}
+    for result in results:
+        by_ai.setdefault(result["ai"], []).append(result)
+    summary = {}
+    for ai, rows in by_ai.items():
+        apples = sorted(r["apples"] for r in rows)
+        # inclusive：分位数落在观测到的最小值和最大值之间，样本少时也不会外推出负的苹果数
+        deciles = statistics.quantiles(apples, n=10, method="inclusive") if len(apples) > 1 else [apples[0]] * 9
+        causes = {}
+        for r in rows:
+            causes[r["cause"]] = causes.get(r["cause"], 0) + 1
+        summary[ai] = {
+            "matches": len(rows),
+            "apples_mean": statistics.fmean(apples),
+            "apples_median": statistics.median(apples),
+            "apples_p10": deciles[0],
+            "apples_p90": deciles[-1],
+            "ticks_mean": statistics.fmean(r["ticks"] for r in rows),
+            "causes": causes,
+        }
+    return summary
+
+def print_summary(summary):
+    print(f"{'ai':>8} {'matches':>8} {'mean':>7} {'median':>7} {'p10':>6} {'p90':>6} {'ticks':>8}  causes")
+    for ai, s in sorted(summary.items(), key=lambda item: -item[1]["apples_mean"]):
+        causes = ", ".join(f"{cause or 'none'} {n}" for cause, n in sorted(s["causes"].items(), key=lambda c: -c[1]))
+        print(f"{ai:>8} {s['matches']:>8} {s['apples_mean']:>7.1f} {s['apples_median']:>7.1f} "
+              f"{s['apples_p10']:>6.1f} {s['apples_p90']:>6.1f} {s['ticks_mean']:>8.0f}  {causes}")
+
+def parse_seeds(text):
+    """N 表示种子 0 ~ N-1，FIRST:LAST 表示 FIRST ~ LAST-1。"""
+    if ":" in text:
+        first, last = text.split(":", 1)
+        return range(int(first), int(last))
+    return range(int(text))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded Apple-mode matches between snake AIs in parallel.")
+    parser.add_argument("--ai", nargs="+", choices=sorted(AIS), default=sorted(AIS))
+    parser.add_argument("--seeds", type=parse_seeds, default=parse_seeds("1000"), help="N or FIRST:LAST (default: 1000)")
+    parser.add_argument("--out", default="tournament.jsonl", help="results file; rerun to resume (default: tournament.jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--stall-ticks", type=int, default=STALL_TICKS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--summary", action="store_true", help="only summarize the results file")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.summary:
+            results = load_results(args.out)
+        else:
+            start = time.perf_counter()
+            results = run_tournament(args.ai, args.seeds, args.out, args.workers, args.max_ticks, args.stall_ticks,
+                                     args.chunk_size)
+            print(f"finished in {time.perf_counter() - start:.1f}s")
+    except ValueError as e:
+        raise SystemExit(str(e))
+    except KeyboardInterrupt:
+        raise SystemExit(f"\ninterrupted; run the same command again to resume from {args.out}")
+    print_summary(summarize(results))
+
+if __name__ == "__main__":
+    main()
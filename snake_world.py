@@ -0,0 +1,747 @@
+"""
+贪吃蛇的模拟核心：不依赖 pygame，可以在没有显示器、没有声卡的机器上逐帧推进游戏。
+game1_snake.py 中的三种模式都通过 SnakeWorld 推进，界面部分只负责输入、绘制和音效。
+"""
+import random
+from array import array
+from collections import deque
+
+# --------------------- 基础设置 ---------------------
+CELL_WIDTH = 50   # 默认棋盘宽度（格）
+CELL_HEIGHT = 40  # 默认棋盘高度（格）
+
+UP = 'up'
+DOWN = 'down'
+LEFT = 'left'
+RIGHT = 'right'
+
+DIRECTION_DELTAS = {
+    UP: (0, -1),
+    DOWN: (0, 1),
+    LEFT: (-1, 0),
+    RIGHT: (1, 0),
+}
+
+# 各模式，与 main() 中的状态名一致
+MODE_SNAKE = "SNAKE"
+MODE_APPLE = "APPLE"
+MODE_2PLAYERS = "2PLAYERS"
+MODE_ARENA = "ARENA"  # 任意条蛇（玩家或机器人）在可配置大小的棋盘上互相吃，最后活着的获胜
+
+# --------------------- 事件 ---------------------
+# step() 返回的事件均为 (类型, 参数) 二元组
+EVENT_APPLE_EATEN = "apple_eaten"      # 参数：吃到苹果的蛇编号
+EVENT_SNAKE_EATEN = "snake_eaten"      # 参数：被咬掉尾巴的蛇编号
+EVENT_PHASE_CHANGED = "phase_changed"  # 参数：新的阶段
+EVENT_SNAKE_DIED = "snake_died"        # 参数：被淘汰的蛇编号（Arena 模式）
+EVENT_GAME_OVER = "game_over"          # 参数：结束原因（见下）
+
+DEATH_WALL = "wall"    # 撞墙
+DEATH_BODY = "body"    # 撞到自己的身体
+DEATH_EATEN = "eaten"  # 2 Players 模式中被吃到只剩蛇头
+BOARD_FULL = "board_full"  # 棋盘已满，没有空格可以放苹果（相当于通关）
+LAST_STANDING = "last_standing"  # Arena 模式中只剩一条（或没有）蛇活着
+
+# 棋盘上的格子（蛇身、苹果）统一用 (x, y) 元组表示；蛇身为 deque，蛇头在左端，
+# 因此插入蛇头、弹出蛇尾都是 O(1)，每帧只新建一个蛇头元组。
+
+# --------------------- 空闲格子索引 ---------------------
+class FreeCells:
+    """
+    空闲格子编号（y * width + x）的集合。cells 是紧凑数组，slots[i] 记录格子 i 在 cells
+    中的位置（-1 表示不空闲）；删除时把最后一个元素换到被删位置，
+    因此增、删和均匀随机抽取都是 O(1)。
+    """
+    __slots__ = ("cells", "slots")
+
+    def __init__(self, size):
+        self.cells = array('i', range(size))
+        self.slots = array('i', range(size))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, i):
+        return self.slots[i] >= 0
+
+    def add(self, i):
+        if self.slots[i] < 0:
+            self.slots[i] = len(self.cells)
+            self.cells.append(i)
+
+    def remove(self, i):
+        slot = self.slots[i]
+        if slot < 0:
+            return
+        last = self.cells.pop()
+        if last != i:
+            self.cells[slot] = last
+            self.slots[last] = slot
+        self.slots[i] = -1
+
+    def choice(self, rng=random):
+        """用 rng 均匀随机返回一个空闲格子编号；没有空闲格子时返回 None。"""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+# --------------------- 占用网格 ---------------------
+EMPTY = 0
+OBSTACLE = 255
+
+class OccupancyGrid:
+    """
+    按格记录棋盘占用情况，每格一个字节：EMPTY 为空，OBSTACLE 为障碍，
+    其余数值为压在该格上的蛇身节数（2 Players 模式中两条蛇可以重叠）。
+    蛇头插入、蛇尾弹出时增量更新，因此任何碰撞查询都是 O(1)，与蛇长无关。
+    free 同步记录所有空格，用于 O(1) 放置苹果。
+    """
+    __slots__ = ("width", "height", "cells", "free")
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.clear()
+
+    def clear(self):
+        self.cells = bytearray(self.width * self.height)
+        self.free = FreeCells(self.width * self.height)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_free(self, x, y):
+        return self.cells[y * self.width + x] == EMPTY
+
+    def is_obstacle(self, x, y):
+        return self.cells[y * self.width + x] == OBSTACLE
+
+    def has_body(self, x, y):
+        return EMPTY < self.cells[y * self.width + x] < OBSTACLE
+
+    def add_obstacle(self, x, y):
+        i = y * self.width + x
+        self.cells[i] = OBSTACLE
+        self.free.remove(i)
+
+    def add_body(self, x, y):
+        i = y * self.width + x
+        if self.cells[i] == EMPTY:
+            self.free.remove(i)
+        self.cells[i] += 1
+
+    def remove_body(self, x, y):
+        i = y * self.width + x
+        self.cells[i] -= 1
+        if self.cells[i] == EMPTY:
+            self.free.add(i)
+
+# --------------------- 蛇身归属网格 ---------------------
+MAX_SNAKES = 64  # OwnerGrid 每格一个 64 位掩码
+
+class OwnerGrid:
+    """
+    按格记录每一格压着哪几条蛇的身体：masks[i] 的第 k 位表示第 k 条蛇有身体在格子 i 上。
+    与 OccupancyGrid 一起在蛇头插入、蛇尾弹出时增量更新，“这一格上有哪些蛇”是 O(1) 查询，
+    与蛇长和蛇的条数都无关。同一条蛇在同一格上压着多节（第 1 阶段蛇可以穿过自己）时，
+    多出来的节数记在 stacked 里，这种情况很少。
+    """
+    __slots__ = ("width", "height", "masks", "stacked")
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.clear()
+
+    def clear(self):
+        self.masks = array('Q', [0]) * (self.width * self.height)
+        self.stacked = {}  # (蛇编号, 格子编号) -> 除第一节外压在这一格上的节数
+
+    def mask(self, x, y):
+        return self.masks[y * self.width + x]
+
+    def count(self, snake, x, y):
+        """第 snake 条蛇压在 (x, y) 上的节数。"""
+        i = y * self.width + x
+        if not self.masks[i] >> snake & 1:
+            return 0
+        return 1 + self.stacked.get((snake, i), 0)
+
+    def add(self, snake, x, y):
+        i = y * self.width + x
+        bit = 1 << snake
+        if self.masks[i] & bit:
+            key = (snake, i)
+            self.stacked[key] = self.stacked.get(key, 0) + 1
+        else:
+            self.masks[i] |= bit
+
+    def remove(self, snake, x, y):
+        i = y * self.width + x
+        key = (snake, i)
+        extra = self.stacked.get(key)
+        if extra:
+            if extra == 1:
+                del self.stacked[key]
+            else:
+                self.stacked[key] = extra - 1
+        else:
+            self.masks[i] &= ~(1 << snake)
+
+def mask_indices(mask):
+    """位掩码中为 1 的各位的编号，从低位到高位。"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+# --------------------- 障碍物、随机位置 ---------------------
+def create_obstacles(width=CELL_WIDTH, height=CELL_HEIGHT, rng=random, num_segments=30):
+    """
+    用 rng（random.Random 或 random 模块）随机生成 num_segments 个短障碍，每个障碍段长度在 1~2 之间，
+    并避免左上角 10x10 的安全区。
+    """
+    obstacles = set()
+    max_length = 2
+    safe_zone = {(x, y) for x in range(10) for y in range(10)}
+    for _ in range(num_segments):
+        while True:
+            start_x = rng.randint(0, width - 1)
+            start_y = rng.randint(0, height - 1)
+            if (start_x, start_y) not in safe_zone:
+                break
+        orientation = rng.choice(['horizontal', 'vertical'])
+        length = rng.randint(1, max_length)
+        for i in range(length):
+            if orientation == 'horizontal':
+                x = start_x + i
+                y = start_y
+            else:
+                x = start_x
+                y = start_y + i
+            if 0 <= x < width and 0 <= y < height:
+                obstacles.add((x, y))
+    return [{'x': x, 'y': y} for (x, y) in obstacles]
+
+def get_random_location(grid, rng=random):
+    """在 grid 的空格（既无障碍也无蛇身）中均匀随机取一个位置 (x, y)；棋盘已满时返回 None。"""
+    i = grid.free.choice(rng)
+    if i is None:
+        return None
+    return (i % grid.width, i // grid.width)
+
+# --------------------- 苹果随机移动（Snake模式） ---------------------
+def update_apple_position(apple, grid, rng=random):
+    """
+    在 Snake 模式下，苹果有 50% 的几率随机移动一格（不会移到蛇身或障碍上），返回新位置。
+    """
+    if rng.random() < 0.5:
+        moves = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        rng.shuffle(moves)
+        for dx, dy in moves:
+            new_x = apple[0] + dx
+            new_y = apple[1] + dy
+            if not grid.in_bounds(new_x, new_y):
+                continue
+            if not grid.is_free(new_x, new_y):
+                continue
+            return (new_x, new_y)
+    return apple
+
+# --------------------- AI 控制蛇的简单函数 ---------------------
+def get_snake_direction(snake_coords, apple, grid):
+    head_x, head_y = snake_coords[0]
+    dx = apple[0] - head_x
+    dy = apple[1] - head_y
+    candidate_dirs = []
+    if abs(dx) >= abs(dy):
+        if dx > 0:
+            candidate_dirs.append(RIGHT)
+        elif dx < 0:
+            candidate_dirs.append(LEFT)
+        if dy > 0:
+            candidate_dirs.append(DOWN)
+        elif dy < 0:
+            candidate_dirs.append(UP)
+    else:
+        if dy > 0:
+            candidate_dirs.append(DOWN)
+        elif dy < 0:
+            candidate_dirs.append(UP)
+        if dx > 0:
+            candidate_dirs.append(RIGHT)
+        elif dx < 0:
+            candidate_dirs.append(LEFT)
+    for d in [UP, DOWN, LEFT, RIGHT]:
+        if d not in candidate_dirs:
+            candidate_dirs.append(d)
+
+    for d in candidate_dirs:
+        dx, dy = DIRECTION_DELTAS[d]
+        new_x = head_x + dx
+        new_y = head_y + dy
+        if not grid.in_bounds(new_x, new_y):
+            continue
+        # 蛇身和障碍都不可进入
+        if not grid.is_free(new_x, new_y):
+            continue
+        return d
+    return None
+
+def move(cell, direction):
+    """返回 cell 沿 direction 移动一格后的新格子。"""
+    dx, dy = DIRECTION_DELTAS[direction]
+    return (cell[0] + dx, cell[1] + dy)
+
+# --------------------- Arena 布局 ---------------------
+ARENA_PLAYERS = 8            # Arena 模式默认的蛇数
+ARENA_APPLES_PER_SNAKE = 2   # 棋盘上保持的苹果数为蛇数的这么多倍
+ARENA_SPAWN_LENGTH = 3
+ARENA_OBSTACLE_DENSITY = 1 / 64  # 每这么多格一个障碍段（默认 50x40 的棋盘上约 30 个）
+
+def arena_layout(players):
+    """出生点排成 cols 列 rows 行，返回 (cols, rows)。"""
+    cols = 1
+    while cols * cols < players:
+        cols += 1
+    return cols, -(-players // cols)
+
+def check_arena_size(width, height, players):
+    """蛇数超过 MAX_SNAKES、或棋盘放不下每条蛇的出生区域时抛出 ValueError。"""
+    if not 1 <= players <= MAX_SNAKES:
+        raise ValueError(f"arena needs 1 to {MAX_SNAKES} snakes, got {players}")
+    cols, rows = arena_layout(players)
+    if width // cols < ARENA_SPAWN_LENGTH + 3 or height // rows < 3:
+        raise ValueError(f"a {width}x{height} board is too small for {players} snakes")
+
+def arena_spawns(width, height, players):
+    """每条蛇在自己那一块区域的中央出生，横着朝右，返回 (snakes, directions)。"""
+    cols, rows = arena_layout(players)
+    snakes = []
+    for k in range(players):
+        row, col = divmod(k, cols)
+        x = (2 * col + 1) * width // (2 * cols) + 1
+        y = (2 * row + 1) * height // (2 * rows)
+        snakes.append(deque((x - i, y) for i in range(ARENA_SPAWN_LENGTH)))
+    return snakes, [RIGHT] * players
+
+def arena_obstacles(width, height, snakes, rng):
+    """按棋盘面积随机放障碍，避开每条蛇的身体和它前方几格。"""
+    count = max(1, int(width * height * ARENA_OBSTACLE_DENSITY))
+    clear = set()
+    for snake in snakes:
+        hx, hy = snake[0]
+        tx = snake[-1][0]
+        clear.update((x, y) for x in range(tx - 1, hx + 5) for y in range(hy - 1, hy + 2))
+    return [obs for obs in create_obstacles(width, height, rng, count) if (obs['x'], obs['y']) not in clear]
+
+# --------------------- 模拟世界 ---------------------
+class SnakeWorld:
+    """
+    一局游戏的全部状态和规则，不涉及任何绘制、音效和计时。
+
+    step(actions) 推进一帧并返回本帧发生的事件列表。actions 按玩家编号给出方向，
+    None（或缺省）表示保持原方向，比蛇的条数多时抛出 ValueError：
+      - SNAKE 模式：actions[0] 为蛇的方向
+      - APPLE 模式：actions[0] 为苹果的方向，蛇由 snake_ai 控制
+      - 2PLAYERS 模式：actions[0]、actions[1] 分别为两条蛇的方向
+      - ARENA 模式：actions[i] 为第 i 条蛇的方向，共 players 条蛇
+
+    每一局都有自己的随机数流 rng（random.Random(seed)），障碍、苹果的位置和苹果的随机移动
+    都只从它取随机数，因此同样的 seed 加上同样的每帧输入可以逐帧重现整局游戏。
+    """
+
+    def __init__(self, mode, width=CELL_WIDTH, height=CELL_HEIGHT, snake_ai=None, seed=None, players=ARENA_PLAYERS):
+        if mode not in (MODE_SNAKE, MODE_APPLE, MODE_2PLAYERS, MODE_ARENA):
+            raise ValueError(f"unknown mode: {mode!r}")
+        if mode == MODE_ARENA:
+            check_arena_size(width, height, players)
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.players = players if mode == MODE_ARENA else (2 if mode == MODE_2PLAYERS else 1)
+        self.snake_ai = snake_ai or get_snake_direction
+        self.rng = None
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        开始新的一局（对应各模式中的“重启”）。seed 为本局的随机种子；
+        为 None 时从上一局的随机数流中取一个（第一局则从 random 模块取），记录在 self.seed 中。
+        """
+        if seed is None:
+            seed = (self.rng or random).getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self.game_over = False
+        self.death_cause = None
+        self.phase = 1
+        self.apple_count = 0
+        if self.mode == MODE_2PLAYERS:
+            w = self.width
+            self.snakes = [
+                deque([(5, 10), (4, 10), (3, 10)]),
+                deque([(w - 6, 10), (w - 5, 10), (w - 4, 10)]),
+            ]
+            self.directions = [RIGHT, LEFT]
+            self.obstacles = []
+        elif self.mode == MODE_ARENA:
+            self.snakes, self.directions = arena_spawns(self.width, self.height, self.players)
+            self.obstacles = arena_obstacles(self.width, self.height, self.snakes, self.rng)
+        else:
+            self.snakes = [deque([(3, 5), (2, 5), (1, 5)])]
+            self.directions = [RIGHT]
+            self.obstacles = create_obstacles(self.width, self.height, self.rng)
+        self.alive = [True] * len(self.snakes)
+        self.living = list(range(len(self.snakes)))  # 活着的蛇的编号，从小到大
+        self.grid = OccupancyGrid(self.width, self.height)
+        # 只有多条蛇时才需要知道每格属于哪条蛇
+        self.owners = OwnerGrid(self.width, self.height) if self.players > 1 or self.mode == MODE_ARENA else None
+        self.rebuild_grid()
+        if self.mode == MODE_ARENA:
+            # Arena 模式的苹果有好几个，都在 apples 里；apple 不用
+            self.apple = None
+            self.apples = set()
+            for _ in range(self.players * ARENA_APPLES_PER_SNAKE):
+                self._spawn_arena_apple()
+        else:
+            self.apple = get_random_location(self.grid, self.rng)
+
+    def rebuild_grid(self):
+        """按当前的障碍和蛇身重新填充占用网格（直接修改 obstacles/snakes 后调用）。"""
+        self.grid.clear()
+        for obs in self.obstacles:
+            self.grid.add_obstacle(obs['x'], obs['y'])
+        if self.owners is not None:
+            self.owners.clear()
+        for index, snake_coords in enumerate(self.snakes):
+            for x, y in snake_coords:
+                self.grid.add_body(x, y)
+                if self.owners is not None:
+                    self.owners.add(index, x, y)
+
+    @property
+    def snake(self):
+        """单蛇模式下的蛇（2 Players 模式中为玩家 1）。"""
+        return self.snakes[0]
+
+    def in_bounds(self, cell):
+        return 0 <= cell[0] < self.width and 0 <= cell[1] < self.height
+
+    def _spawn_apple(self, events):
+        """在空格上放一个新苹果；棋盘已满则以 BOARD_FULL 结束游戏。"""
+        self.apple = get_random_location(self.grid, self.rng)
+        if self.apple is None:
+            self._end(events, BOARD_FULL)
+
+    def _push_head(self, index, head):
+        self.snakes[index].appendleft(head)
+        self.grid.add_body(head[0], head[1])
+        if self.owners is not None:
+            self.owners.add(index, head[0], head[1])
+
+    def _pop_tail(self, index):
+        x, y = self.snakes[index].pop()
+        self.grid.remove_body(x, y)
+        if self.owners is not None:
+            self.owners.remove(index, x, y)
+
+    def _end(self, events, cause):
+        self.game_over = True
+        self.death_cause = cause
+        events.append((EVENT_GAME_OVER, cause))
+
+    def step(self, actions=()):
+        """推进一帧，返回本帧的事件列表；游戏结束后再调用不再有任何变化。"""
+        events = []
+        if self.game_over:
+            return events
+        if len(actions) > len(self.directions):
+            raise ValueError(f"{len(actions)} actions for {len(self.directions)} snakes")
+        for i, direction in enumerate(actions):
+            if direction is not None:
+                self.directions[i] = direction
+        self.tick += 1
+        if self.mode == MODE_SNAKE:
+            self._step_snake(events)
+        elif self.mode == MODE_APPLE:
+            self._step_apple(events)
+        elif self.mode == MODE_2PLAYERS:
+            self._step_2players(events)
+        else:
+            self._step_arena(events)
+        return events
+
+    def _step_snake(self, events):
+        """
+        玩家控制蛇：
+          - 蛇头碰到身体或出界则游戏结束
+          - 蛇移动若碰到障碍则停留
+          - 苹果每帧有 50% 几率随机移动一格
+        """
+        head = move(self.snakes[0][0], self.directions[0])
+        if not self.in_bounds(head):
+            return self._end(events, DEATH_WALL)
+        if self.grid.has_body(head[0], head[1]):
+            return self._end(events, DEATH_BODY)
+        # 碰到障碍则停在原地
+        if not self.grid.is_obstacle(head[0], head[1]):
+            self._push_head(0, head)
+            if head == self.apple:
+                events.append((EVENT_APPLE_EATEN, 0))
+                self._spawn_apple(events)
+                if self.game_over:
+                    return
+            else:
+                self._pop_tail(0)
+
+        self.apple = update_apple_position(self.apple, self.grid, self.rng)
+
+    def _step_apple(self, events):
+        """玩家控制苹果，蛇由 AI 追逐苹果；苹果不能穿过障碍或出界。"""
+        snake_coords = self.snakes[0]
+        new_apple = move(self.apple, self.directions[0])
+        if self.in_bounds(new_apple) and not self.grid.is_obstacle(new_apple[0], new_apple[1]):
+            self.apple = new_apple
+
+        snake_direction = self.snake_ai(snake_coords, self.apple, self.grid)
+        if not snake_direction:
+            return
+        new_head = move(snake_coords[0], snake_direction)
+        if not self.in_bounds(new_head):
+            return
+        if self.grid.has_body(new_head[0], new_head[1]):
+            return self._end(events, DEATH_BODY)
+
+        self._push_head(0, new_head)
+        if new_head == self.apple:
+            events.append((EVENT_APPLE_EATEN, 0))
+            self._spawn_apple(events)
+        else:
+            self._pop_tail(0)
+
+    def _step_2players(self, events):
+        """
+        两名玩家：
+          - 第 1 阶段：抢苹果，共吃到 5 个后进入第 2 阶段
+          - 第 2 阶段：互相吃尾巴（规则见 _step_mutual_eating），任意一方只剩蛇头则游戏结束
+          - 任意一方出界则游戏结束
+        """
+        snake1_coords, snake2_coords = self.snakes
+        new_head1 = move(snake1_coords[0], self.directions[0])
+        new_head2 = move(snake2_coords[0], self.directions[1])
+        if not self.in_bounds(new_head1) or not self.in_bounds(new_head2):
+            return self._end(events, DEATH_WALL)
+
+        if self.phase == 1:
+            # 两个蛇头同时到达苹果时由玩家 1 吃到
+            snake1_grow = new_head1 == self.apple
+            snake2_grow = not snake1_grow and new_head2 == self.apple
+
+            self._push_head(0, new_head1)
+            self._push_head(1, new_head2)
+            if not snake1_grow:
+                self._pop_tail(0)
+            if not snake2_grow:
+                self._pop_tail(1)
+
+            # 蛇身更新后再放新苹果，保证不会落在蛇身上
+            if snake1_grow or snake2_grow:
+                events.append((EVENT_APPLE_EATEN, 0 if snake1_grow else 1))
+                self.apple_count += 1
+                self._spawn_apple(events)
+                if self.game_over:
+                    return
+
+            if self.apple_count >= 5:
+                self.phase = 2
+                events.append((EVENT_PHASE_CHANGED, 2))
+        else:
+            self._step_mutual_eating(events, [new_head1, new_head2])
+
+    def _step_mutual_eating(self, events, heads):
+        """
+        互相吃尾巴（适用于任意条蛇），heads 为各条蛇本帧的新蛇头（已确认没有出界）：
+          - 迎头相撞：几个蛇头要进同一格，或两个蛇头互换位置时，这几条蛇本帧都停在原地
+          - 咬到自己：蛇头进入自己的身体（刚好空出来的蛇尾除外）则游戏结束
+          - 咬到别的蛇：被咬的每条蛇各掉一节尾巴，咬的一方这一帧不掉尾巴（变长一节）
+          - 任意一条蛇只剩蛇头则游戏结束
+        所有判断都针对本帧移动之前的身体，每条蛇的判断都是 O(1)。
+        """
+        snakes = self.snakes
+        owners = self.owners
+        blocked = ()
+        # 常见情况下各蛇头去往不同的格子，也不碰任何旧蛇头，不必逐对检查迎头相撞
+        if len(set(heads)) < len(heads) or not {snake[0] for snake in snakes}.isdisjoint(heads):
+            blocked = self._head_on(heads)
+
+        masks = owners.masks
+        width = self.width
+        victims = []
+        for i, head in enumerate(heads):
+            mask = masks[head[1] * width + head[0]]
+            if not mask or i in blocked:
+                victims.append(0)
+                continue
+            bitten = mask & ~(1 << i)
+            if bitten != mask:
+                own = owners.count(i, head[0], head[1])
+                # 没咬到别的蛇时蛇尾本帧会空出来
+                if not bitten and head == snakes[i][-1]:
+                    own -= 1
+                if own:
+                    return self._end(events, DEATH_BODY)
+            victims.append(bitten)
+
+        for i, head in enumerate(heads):
+            if i not in blocked:
+                self._push_head(i, head)
+        for i, bitten in enumerate(victims):
+            if i in blocked:
+                continue
+            if bitten:
+                for j in mask_indices(bitten):
+                    if len(snakes[j]) > 1:
+                        self._pop_tail(j)
+                        events.append((EVENT_SNAKE_EATEN, j))
+            else:
+                self._pop_tail(i)
+
+        if any(len(snake) <= 1 for snake in snakes):
+            self._end(events, DEATH_EATEN)
+
+    def _head_on(self, heads, indices=None):
+        """迎头相撞的蛇的编号集合，见 _head_on_groups。"""
+        return {i for group in self._head_on_groups(heads, indices) for i in group}
+
+    def _head_on_groups(self, heads, indices=None):
+        """
+        迎头相撞的各组蛇（编号列表）：新蛇头落在同一格的蛇为一组，蛇头互换位置的两条蛇为一组。
+        heads 中 None 表示这条蛇不动；indices 为要检查的蛇的编号（默认全部）。
+        """
+        snakes = self.snakes
+        if indices is None:
+            indices = range(len(snakes))
+        by_target = {}
+        groups = []
+        old_heads = {snakes[i][0]: i for i in indices}
+        for i in indices:
+            head = heads[i]
+            if head is None:
+                continue
+            by_target.setdefault(head, []).append(i)
+            j = old_heads.get(head)
+            if j is not None and j > i and heads[j] == snakes[i][0]:
+                groups.append([i, j])
+        groups.extend(group for group in by_target.values() if len(group) > 1)
+        return groups
+
+    # --------------------- Arena 模式 ---------------------
+    def _spawn_arena_apple(self):
+        """在空格上再放一个苹果（苹果不进占用网格，所以避开已有的苹果）；棋盘满了就不放。"""
+        for _ in range(8):
+            cell = get_random_location(self.grid, self.rng)
+            if cell is None:
+                return
+            if cell not in self.apples:
+                self.apples.add(cell)
+                return
+
+    def _step_arena(self, events):
+        """
+        Arena 模式，与第 2 阶段的互相吃尾巴相同（见 _step_mutual_eating），另外：
+          - 吃到苹果的蛇变长一节，苹果在别处重新长出来
+          - 撞墙、撞障碍、咬到自己或被吃到只剩蛇头的蛇被淘汰，从棋盘上移走，不结束游戏
+          - 迎头相撞时只有最长的一条（一样长时没有）活下来，这一帧停在原地，其余的被淘汰；
+            否则互相挡住的蛇会一直停在原地，对局永远结束不了
+          - 只剩一条（单人时为没有）蛇活着时游戏结束
+        每帧的开销只与活着的蛇的条数有关，与棋盘大小、蛇长和已淘汰的蛇的条数无关。
+        """
+        snakes = self.snakes
+        living = self.living
+        grid = self.grid
+        heads = [None] * len(snakes)
+        dead = set()
+        for i in living:
+            head = move(snakes[i][0], self.directions[i])
+            if not self.in_bounds(head) or grid.is_obstacle(head[0], head[1]):
+                dead.add(i)
+            else:
+                heads[i] = head
+
+        moving = [h for h in heads if h is not None]
+        blocked = ()
+        if len(set(moving)) < len(moving) or not {snakes[i][0] for i in living}.isdisjoint(moving):
+            blocked = set()
+            for group in self._head_on_groups(heads, living):
+                blocked.update(group)
+                longest = max(len(snakes[i]) for i in group)
+                losers = [i for i in group if len(snakes[i]) < longest]
+                if len(losers) < len(group) - 1:
+                    losers = group  # 最长的不止一条：同归于尽
+                dead.update(losers)
+
+        masks = self.owners.masks
+        width = self.width
+        victims = {}
+        fed = set()
+        for i in living:
+            head = heads[i]
+            if head is None or i in blocked:
+                continue
+            mask = masks[head[1] * width + head[0]]
+            bitten = mask & ~(1 << i)
+            if bitten != mask:
+                own = self.owners.count(i, head[0], head[1])
+                if not bitten and head not in self.apples and head == snakes[i][-1]:
+                    own -= 1
+                if own:
+                    dead.add(i)
+                    continue
+            if bitten:
+                victims[i] = bitten
+            if head in self.apples:
+                fed.add(i)
+
+        for i in living:
+            head = heads[i]
+            if head is not None and i not in blocked and i not in dead:
+                self._push_head(i, head)
+        for i in living:
+            head = heads[i]
+            if head is None or i in blocked or i in dead:
+                continue
+            bitten = victims.get(i)
+            if bitten:
+                for j in mask_indices(bitten):
+                    if len(snakes[j]) > 1:
+                        self._pop_tail(j)
+                        events.append((EVENT_SNAKE_EATEN, j))
+            if i in fed:
+                # 同一格不会有两个蛇头（迎头相撞的蛇停在原地），苹果只会被一条蛇吃到
+                self.apples.remove(head)
+                events.append((EVENT_APPLE_EATEN, i))
+            elif not bitten:
+                self._pop_tail(i)
+
+        for i in living:
+            if len(snakes[i]) <= 1:
+                dead.add(i)
+        for i in sorted(dead):
+            self._eliminate(i, events)
+        # 蛇身更新、淘汰的蛇移走后再补苹果
+        for _ in range(self.players * ARENA_APPLES_PER_SNAKE - len(self.apples)):
+            self._spawn_arena_apple()
+
+        if len(living) <= (1 if self.players > 1 else 0):
+            self._end(events, LAST_STANDING)
+
+    def _eliminate(self, index, events):
+        """淘汰第 index 条蛇：从占用网格和归属网格中移走整条蛇。"""
+        snake = self.snakes[index]
+        while snake:
+            self._pop_tail(index)
+        self.alive[index] = False
+        self.living.remove(index)
+        events.append((EVENT_SNAKE_DIED, index))